@@ -2,9 +2,33 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import io
-from complaint_processor import ComplaintProcessor
+import os
+import uuid
 from data_validator import DataValidator
-from utils import format_date, export_to_excel
+from utils import export_to_excel
+from ingestion import DEFAULT_CHUNK_SIZE
+from upload_cache import UploadCache
+from upload_session import UploadSession
+from mapping_inference import SNIFF_ROWS, infer_column_mapping
+from mapping_profiles import MappingProfileStore, header_signature
+from snapshot import SNAPSHOT_EXTENSION, list_snapshots, load_snapshot, save_snapshot
+from complaint_schema import memory_report
+from filter_index import FilterIndex
+from deduplication import DEDUP_POLICIES, DEFAULT_DEDUP_POLICY
+from as_of import recompute_as_of, project_alert_counts
+from business_calendar import BusinessCalendar, available_holiday_sets, calendar_from_description
+from instrumentation import RunTrace, configure_performance_log
+from profiling import PROFILE_ENABLED
+from pipeline import run_analysis
+from job_manager import JOB_STATES, JobManager
+from shared_results import SharedResultCache, analysis_key
+
+# Optional server-side directory for saved analyses
+SNAPSHOT_DIR = os.environ.get('DATAJURIS_SNAPSHOT_DIR')
+# Optional server-side directory of the persistent complaint history
+STORE_DIR = os.environ.get('DATAJURIS_STORE_DIR')
+# Seconds between progress refreshes of running background jobs
+JOB_POLL_SECONDS = 1.0
 
 def main():
     st.set_page_config(
@@ -13,6 +37,8 @@ def main():
         layout="wide"
     )
     
+    configure_performance_log()
+    
     st.title("📊 Sistema de Análise de Reclamações")
     st.markdown("**Automatize a análise de SLA e gestão de prazos de relatórios de reclamações**")
     
@@ -21,12 +47,37 @@ def main():
         st.session_state.processed_data = None
     if 'metrics' not in st.session_state:
         st.session_state.metrics = None
-    if 'column_mapping' not in st.session_state:
-        st.session_state.column_mapping = {}
+    if 'filter_index' not in st.session_state:
+        st.session_state.filter_index = None
+    if 'layout_mappings' not in st.session_state:
+        st.session_state.layout_mappings = {}
     if 'mapping_confirmed' not in st.session_state:
         st.session_state.mapping_confirmed = False
     if 'is_processing' not in st.session_state:
         st.session_state.is_processing = False
+    if 'date_formats' not in st.session_state:
+        st.session_state.date_formats = {}
+    if 'dedup_report' not in st.session_state:
+        st.session_state.dedup_report = None
+    if 'store_report' not in st.session_state:
+        st.session_state.store_report = None
+    if 'calendar' not in st.session_state:
+        st.session_state.calendar = None
+    if 'performance' not in st.session_state:
+        st.session_state.performance = None
+    if 'processing_errors' not in st.session_state:
+        st.session_state.processing_errors = []
+    if 'as_of_view' not in st.session_state:
+        # Processed data re-evaluated for another reference date; the processed result itself is never replaced
+        st.session_state.as_of_view = None
+    if 'session_id' not in st.session_state:
+        # Holder id of this session in the shared result cache
+        st.session_state.session_id = uuid.uuid4().hex
+        st.session_state.shared_key = None
+    if 'jobs' not in st.session_state:
+        # Jobs of this browser tab survive a refresh through the URL
+        st.session_state.jobs = [job_id for job_id in st.query_params.get('jobs', '').split(',') if job_id]
+        st.session_state.active_job = st.session_state.jobs[-1] if st.session_state.jobs else None
 
     # Sidebar for file upload and configuration
     with st.sidebar:
@@ -39,6 +90,13 @@ def main():
         )
         
         header_row = 1
+        chunksize = DEFAULT_CHUNK_SIZE
+        use_profiles = True
+        max_workers = 1
+        dedup_policy = DEFAULT_DEDUP_POLICY
+        use_store = False
+        calendar = None
+        profiling = PROFILE_ENABLED
         if uploaded_files:
             st.success(f"{len(uploaded_files)} arquivo(s) selecionado(s)")
             
@@ -47,30 +105,95 @@ def main():
             header_row = st.number_input(
                 "Linha do cabeçalho (1-based)",
                 min_value=1,
+                value=suggest_header_row(uploaded_files),
+                help="Especifique em qual linha estão os nomes das colunas (sugerida automaticamente a partir das primeiras linhas)"
+            )
+            stream_csv = st.checkbox(
+                "Leitura em blocos (CSV)",
+                value=True,
+                help="Lê arquivos CSV em blocos de linhas, sem montar a tabela bruta do arquivo inteiro. O arquivo e o resultado processado continuam inteiros em memória."
+            )
+            chunksize = DEFAULT_CHUNK_SIZE if stream_csv else None
+            use_profiles = st.checkbox(
+                "Usar perfis de mapeamento salvos",
+                value=True,
+                help="Aplica automaticamente o mapeamento salvo para arquivos com o mesmo cabeçalho"
+            )
+            max_workers = st.number_input(
+                "Processos paralelos",
+                min_value=1,
+                max_value=os.cpu_count() or 1,
                 value=1,
-                help="Especifique em qual linha estão os nomes das colunas"
+                help="Número de arquivos processados ao mesmo tempo (1 = processamento sequencial)"
             )
+            dedup_options = [None] + list(DEDUP_POLICIES)
+            dedup_policy = st.selectbox(
+                "Reclamações repetidas entre arquivos",
+                dedup_options,
+                index=dedup_options.index(DEFAULT_DEDUP_POLICY),
+                format_func=lambda policy: "Manter todas" if policy is None else f"Manter: {DEDUP_POLICIES[policy]}",
+                help="Uma reclamação (protocolo + empresa) presente em mais de um arquivo, ou repetida no mesmo arquivo, é contada uma vez"
+            )
+            sla_basis = st.radio(
+                "Base do SLA",
+                ["Dias corridos", "Dias úteis"],
+                horizontal=True,
+                help="Tempo de resposta e dias até o prazo em dias corridos ou em dias úteis (sem fins de semana e feriados)"
+            )
+            if sla_basis == "Dias úteis":
+                holiday_sets = st.multiselect(
+                    "Feriados",
+                    available_holiday_sets(),
+                    default=['nacional'],
+                    help="Feriados nacionais e conjuntos carregados dos arquivos da pasta de feriados (ex.: municipais)"
+                )
+                calendar = get_business_calendar(tuple(holiday_sets))
+            if STORE_DIR:
+                use_store = st.checkbox(
+                    "Atualizar histórico de reclamações",
+                    value=False,
+                    help="Guarda as reclamações processadas no servidor; nas próximas análises só as linhas novas ou alteradas são processadas (a versão mais recente de cada reclamação é mantida)"
+                )
+            
+            # Hidden toggle (open the app with ?profile=1) for profiling a run on demand
+            if not profiling and st.query_params.get('profile') == '1':
+                profiling = st.checkbox(
+                    "🔬 Perfilar processamento",
+                    value=False,
+                    help="Grava um perfil (pstats e flamegraph) do próximo processamento no servidor; os arquivos são processados um de cada vez"
+                )
             
             # Button to start or reset processing
             if st.session_state.processed_data is None:
                 if st.button("🔄 Processar Arquivos", type="primary"):
                     st.session_state.is_processing = True
                     st.session_state.mapping_confirmed = False
-                    st.session_state.column_mapping = {}
+                    st.session_state.layout_mappings = {}
                     st.rerun()
             else:
                 if st.button("🔄 Iniciar Nova Análise"):
+                    release_shared_result()
                     st.session_state.processed_data = None
+                    st.session_state.filter_index = None
+                    st.session_state.as_of_view = None
+                    st.session_state.excel_exports = {}
                     st.session_state.metrics = None
                     st.session_state.is_processing = False
                     st.session_state.mapping_confirmed = False
-                    st.session_state.column_mapping = {}
+                    st.session_state.layout_mappings = {}
                     st.rerun()
+        
+        if not st.session_state.is_processing:
+            display_snapshot_loader()
 
+    if st.session_state.jobs:
+        display_jobs()
+    
     # Main logic based on state
     if st.session_state.get('is_processing'):
         if uploaded_files:
-            process_files(uploaded_files, header_row)
+            process_files(uploaded_files, header_row, chunksize, max_workers, use_profiles, dedup_policy, use_store,
+                          calendar, profiling)
         else:
             st.warning("Por favor, faça o upload de arquivos para processar.")
             st.session_state.is_processing = False
@@ -79,32 +202,66 @@ def main():
     else:
         display_welcome_screen()
 
-def process_files(uploaded_files, header_row):
+def get_upload_cache():
+    """Per-session cache of parsed uploads and processed results"""
+    if 'upload_cache' not in st.session_state:
+        st.session_state.upload_cache = UploadCache(disk_dir=os.environ.get('DATAJURIS_CACHE_DIR'))
+    return st.session_state.upload_cache
+
+def get_upload_session():
+    """Uploaded reports of this session, each opened once across reruns"""
+    if 'upload_session' not in st.session_state:
+        st.session_state.upload_session = UploadSession(get_upload_cache())
+    return st.session_state.upload_session
+
+def suggest_header_row(uploaded_files):
+    """Header row detected in the first readable uploaded file"""
+    for report in get_upload_session().sync(uploaded_files):
+        try:
+            return report.detect_header_row()
+        except Exception:
+            continue
+    return 1
+
+def get_business_calendar(holiday_sets):
+    """Business calendar for a choice of holiday sets, built once per session"""
+    calendars = st.session_state.setdefault('business_calendars', {})
+    if holiday_sets not in calendars:
+        calendars[holiday_sets] = BusinessCalendar(list(holiday_sets))
+    return calendars[holiday_sets]
+
+def get_profile_store():
+    """Mapping profiles saved on disk, keyed by header signature"""
+    return MappingProfileStore(os.environ.get('DATAJURIS_PROFILE_DIR'))
+
+def process_files(uploaded_files, header_row, chunksize=DEFAULT_CHUNK_SIZE, max_workers=1, use_profiles=True,
+                  dedup_policy=DEFAULT_DEDUP_POLICY, use_store=False, calendar=None,
+                  profiling=PROFILE_ENABLED):
     progress_bar = st.progress(0, text="Iniciando...")
+    trace = RunTrace()
     
     # Step 1: Validate files and extract column information
     progress_bar.progress(10, text="Validando arquivos...")
     
     file_info = []
     validation_errors = []
-    for i, file in enumerate(uploaded_files):
-        try:
-            # Read file to get column names
-            if file.name.endswith('.csv'):
-                df_head = pd.read_csv(file, header=header_row - 1, nrows=0)
-            else:
-                df_head = pd.read_excel(file, header=header_row - 1, nrows=0)
-            
-            file.seek(0) # Reset file pointer
-            file_info.append({
-                'file': file,
-                'name': file.name,
-                'columns': list(df_head.columns)
-            })
-        except Exception as e:
-            err_msg = (f"**{file.name}**: Não foi possível ler o cabeçalho na linha {header_row}. "
-                       f"Verifique o arquivo ou o número da linha. (Erro: {e})")
-            validation_errors.append(err_msg)
+    session = get_upload_session()
+    with trace.span('validate'):
+        for report in session.sync(uploaded_files):
+            try:
+                # Column names come from the report's open workbook (or its parsed frame)
+                columns = report.columns(header_row)
+                file_info.append({
+                    'report': report,
+                    'name': report.name,
+                    'digest': report.digest,
+                    'columns': columns,
+                    'signature': header_signature(columns)
+                })
+            except Exception as e:
+                err_msg = (f"**{report.name}**: Não foi possível ler o cabeçalho na linha {header_row}. "
+                           f"Verifique o arquivo ou o número da linha. (Erro: {e})")
+                validation_errors.append(err_msg)
 
     if validation_errors:
         for error in validation_errors:
@@ -118,82 +275,212 @@ def process_files(uploaded_files, header_row):
 
     progress_bar.progress(30, text="Aguardando mapeamento...")
     
-    # Step 2: Column mapping interface
+    # Step 2: Column mapping per header layout; saved profiles are applied
+    # automatically and only new layouts are mapped by hand
+    layouts = {}
+    for info in file_info:
+        layouts.setdefault(info['signature'], []).append(info)
+    layout_mappings = st.session_state.layout_mappings
+    
     if not st.session_state.mapping_confirmed:
-        with st.sidebar:
-            mapping_done = configure_column_mapping(file_info)
-        if not mapping_done:
+        store = get_profile_store()
+        for signature, infos in layouts.items():
+            if signature in layout_mappings or not use_profiles:
+                continue
+            profile = store.match(infos[0]['columns'])
+            if profile is not None:
+                layout_mappings[signature] = profile['mapping']
+                st.toast(f"Perfil '{profile['name']}' aplicado a {', '.join(info['name'] for info in infos)}")
+        
+        unmapped = [signature for signature in layouts if signature not in layout_mappings]
+        if unmapped:
+            with st.sidebar:
+                configure_column_mapping(layouts[unmapped[0]], header_row, unmapped[0], len(unmapped))
             st.info("👈 Configure o mapeamento de colunas na barra lateral e confirme para continuar.")
             return # Wait for user to submit the form
+        st.session_state.mapping_confirmed = True
 
-    # Step 3: Process files after mapping is confirmed
-    progress_bar.progress(50, text="Processando dados...")
-    
-    processor = ComplaintProcessor()
-    all_data = []
-    processing_errors = []
+    # Step 3: Process files after mapping is confirmed, in a background job
+    # so the session stays responsive and another analysis can be started.
+    # One-off analyses are shared between sessions: the same reports with
+    # the same settings open the result another session already computed,
+    # or follow the job still computing it
+    mappings = [layout_mappings[info['signature']] for info in file_info]
+    # The job parses its own report objects; the session may close its ones meanwhile
+    file_info = [{**info, 'report': info['report'].detached()} for info in file_info]
+    manager = get_job_manager()
+    label = ", ".join(info['name'] for info in file_info)
+    key = None
+    if not use_store and not profiling:
+        key = analysis_key(file_info, mappings, header_row, datetime.now().date(), chunksize, dedup_policy, calendar)
+        shared = get_shared_results()
+        analysis = shared.acquire(key, st.session_state.session_id)
+        if analysis is not None:
+            performance = trace.finish(len(analysis['processed_data']), files=len(file_info), shared=True)
+            apply_analysis(analysis, performance)
+            st.toast(f"{analysis['message']} (resultado compartilhado, sem reprocessar)")
+            st.session_state.is_processing = False
+            st.session_state.mapping_confirmed = False
+            st.rerun()
+        pending = shared.pending_job(key)
+        running = manager.get(pending) if pending else None
+        if running is not None and running.state != 'failed':
+            if pending not in st.session_state.jobs:
+                track_job(pending)
+            st.session_state.active_job = pending
+            st.session_state.is_processing = False
+            st.session_state.mapping_confirmed = False
+            st.rerun()
 
-    for i, info in enumerate(file_info):
-        try:
-            info['file'].seek(0)
-            if info['name'].endswith('.csv'):
-                df = pd.read_csv(info['file'], header=header_row - 1)
-            else:
-                df = pd.read_excel(info['file'], header=header_row - 1)
-            
-            processed_df, errors = processor.process_file(df, st.session_state.column_mapping, info['name'])
-            
-            if not processed_df.empty:
-                all_data.append(processed_df)
-            if errors:
-                processing_errors.extend(errors)
-                
-            progress_bar.progress(50 + int(50 * (i + 1) / len(file_info)), text=f"Processando {info['name']}...")
-        except Exception as e:
-            processing_errors.append(f"Erro crítico ao processar {info['name']}: {e}")
-
-    # Step 4: Combine results and calculate metrics
-    if not all_data:
-        st.error("Nenhum dado válido foi processado. Verifique o mapeamento de colunas e os dados nos arquivos.")
-        st.session_state.is_processing = False
-        st.rerun()
-        return
-        
-    combined_df = pd.concat(all_data, ignore_index=True)
-    metrics = processor.calculate_metrics(combined_df)
-    
-    st.session_state.processed_data = combined_df
-    st.session_state.metrics = metrics
-    
-    if processing_errors:
-        with st.expander("⚠️ Avisos de Processamento", expanded=True):
-            for error in processing_errors:
-                st.warning(error)
-    
-    st.success(f"Processamento concluído! {len(combined_df)} reclamações analisadas.")
+    run_kwargs = dict(
+        chunksize=chunksize, max_workers=max_workers, dedup_policy=dedup_policy,
+        store_dir=STORE_DIR if use_store else None, calendar=calendar, cache=get_upload_cache(),
+        trace=trace, profiling=profiling, label=label
+    )
+    if key is None:
+        job = manager.submit(run_analysis, file_info, mappings, header_row, **run_kwargs)
+    else:
+        job = manager.submit(shared.compute, key, st.session_state.session_id, run_analysis, file_info, mappings,
+                             header_row, **run_kwargs)
+        shared.mark_pending(key, job.id)
+    track_job(job.id)
     st.session_state.is_processing = False
+    st.session_state.mapping_confirmed = False
     st.rerun()
 
-def configure_column_mapping(file_info):
+@st.cache_resource
+def get_job_manager():
+    """Background processing jobs, shared by every session of the server process"""
+    return JobManager()
+
+@st.cache_resource
+def get_shared_results():
+    """Analyses shared by every session of the server process"""
+    return SharedResultCache()
+
+def release_shared_result():
+    """Let the shared cache evict the analysis this session was showing"""
+    if st.session_state.shared_key is not None:
+        get_shared_results().release(st.session_state.shared_key, st.session_state.session_id)
+        st.session_state.shared_key = None
+
+def track_job(job_id):
+    """Follow a job in this session; the ids also go in the URL, so a browser refresh finds them again"""
+    st.session_state.jobs.append(job_id)
+    st.session_state.active_job = job_id
+    st.query_params['jobs'] = ','.join(st.session_state.jobs)
+
+def untrack_job(job_id):
+    """Stop following a job in this session"""
+    if job_id in st.session_state.jobs:
+        st.session_state.jobs.remove(job_id)
+    if st.session_state.active_job == job_id:
+        st.session_state.active_job = None
+    if st.session_state.jobs:
+        st.query_params['jobs'] = ','.join(st.session_state.jobs)
+    else:
+        st.query_params.pop('jobs', None)
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def display_jobs():
+    """Progress of this session's jobs; the latest one opens by itself when it finishes"""
+    manager = get_job_manager()
+    for job_id in list(st.session_state.jobs):
+        job = manager.get(job_id)
+        if job is None:
+            untrack_job(job_id)
+            continue
+        if not job.finished:
+            st.progress(job.progress, text=f"**{job.label}** — {job.message}")
+            continue
+        if job.state == 'done' and job_id == st.session_state.active_job:
+            open_job_result(job_id)
+            st.rerun()
+        col1, col2, col3 = st.columns([6, 1, 1])
+        with col1:
+            if job.state == 'done':
+                st.success(f"**{job.label}** — {JOB_STATES[job.state]} às {job.finished_at.strftime('%H:%M:%S')}")
+            else:
+                st.error(f"**{job.label}** — {JOB_STATES[job.state]}: {job.error}")
+        with col2:
+            if job.state == 'done' and st.button("Abrir", key=f"open_{job_id}"):
+                open_job_result(job_id)
+                st.rerun()
+        with col3:
+            if st.button("✖", key=f"discard_{job_id}", help="Remover da lista"):
+                # Only this session stops following it: other sessions may follow the same
+                # shared job, whose result the manager's expiry removes
+                untrack_job(job_id)
+                st.rerun(scope="fragment")
+
+def open_job_result(job_id):
+    """Show the stored result of a finished job (nothing is recomputed)"""
+    analysis = get_job_manager().result(job_id)
+    if st.session_state.active_job == job_id:
+        st.session_state.active_job = None
+    if analysis is None:
+        st.error("O resultado deste processamento não está mais disponível.")
+        return
+    apply_analysis(analysis)
+    st.toast(analysis['message'])
+
+def apply_analysis(analysis, performance=None):
+    """Keep the results of a processing run in the session (shared analyses are referenced, not copied)"""
+    key = analysis.get('shared_key')
+    if key != st.session_state.shared_key:
+        release_shared_result()
+    if key is not None:
+        get_shared_results().hold(key, st.session_state.session_id)
+        st.session_state.shared_key = key
+    st.session_state.processed_data = analysis['processed_data']
+    st.session_state.filter_index = analysis['filter_index']
+    st.session_state.as_of_view = None
+    st.session_state.excel_exports = {}
+    st.session_state.metrics = analysis['metrics']
+    st.session_state.date_formats = analysis['date_formats']
+    st.session_state.dedup_report = analysis['dedup_report']
+    st.session_state.store_report = analysis['store_report']
+    st.session_state.calendar = analysis['calendar']
+    st.session_state.snapshot_bytes = None
+    st.session_state.processing_errors = analysis['errors']
+    # The performance summary gets export spans appended, so each session keeps its own copy
+    performance = performance or analysis['performance']
+    st.session_state.performance = {**performance, 'spans': list(performance['spans'])}
+    st.session_state.profile_artifacts = analysis['profile_artifacts']
+
+def configure_column_mapping(file_info, header_row, signature, remaining=1):
+    """Mapping form for the files sharing one header layout"""
     st.subheader("🗂️ Mapeamento de Colunas")
+    if remaining > 1:
+        st.caption(f"{remaining} layouts de cabeçalho diferentes aguardam mapeamento")
+    st.markdown(f"**Arquivos:** {', '.join(info['name'] for info in file_info)}")
     st.markdown("**Configure qual coluna corresponde a cada campo necessário:**")
     
     all_columns = sorted(list(set(col for info in file_info for col in info['columns'])))
     column_options = ["-- Selecione --"] + all_columns
     
-    with st.form("column_mapping_form"):
+    # Pre-fill with the columns inferred from header names and sampled values
+    suggested = suggest_column_mapping(file_info, header_row)
+    def suggested_index(field):
+        column = suggested.get(field)
+        return column_options.index(column) if column in column_options else 0
+    
+    with st.form(f"column_mapping_form_{signature}"):
         st.markdown("**Campos Obrigatórios:**")
         col1, col2 = st.columns(2)
         
         with col1:
-            id_col = st.selectbox("ID da Reclamação *", column_options, help="Coluna com o identificador único da reclamação")
-            opening_date_col = st.selectbox("Data de Abertura *", column_options, help="Coluna com a data de criação/abertura da reclamação")
+            id_col = st.selectbox("ID da Reclamação *", column_options, index=suggested_index('id_case'), help="Coluna com o identificador único da reclamação")
+            opening_date_col = st.selectbox("Data de Abertura *", column_options, index=suggested_index('opening_date'), help="Coluna com a data de criação/abertura da reclamação")
         
         with col2:
-            deadline_col = st.selectbox("Data do Prazo *", column_options, help="Coluna com a data limite para resposta")
-            response_date_col = st.selectbox("Data da Resposta", column_options, help="Coluna com a data da resposta (pode estar vazia)")
+            deadline_col = st.selectbox("Data do Prazo *", column_options, index=suggested_index('deadline_date'), help="Coluna com a data limite para resposta")
+            response_date_col = st.selectbox("Data da Resposta", column_options, index=suggested_index('response_date'), help="Coluna com a data da resposta (pode estar vazia)")
+        
+        company_col = st.selectbox("Nome da Empresa *", column_options, index=suggested_index('company_name'), help="Coluna com o nome da empresa reclamada")
         
-        company_col = st.selectbox("Nome da Empresa *", column_options, help="Coluna com o nome da empresa reclamada")
+        save_profile = st.checkbox("Salvar como perfil para este layout", value=True, help="Arquivos futuros com o mesmo cabeçalho usarão este mapeamento automaticamente")
+        profile_name = st.text_input("Nome do perfil (opcional)")
         
         submitted = st.form_submit_button("✅ Confirmar Mapeamento", type="primary")
         
@@ -203,16 +490,156 @@ def configure_column_mapping(file_info):
                 st.error("Por favor, selecione todas as colunas obrigatórias marcadas com *")
                 return False
             
-            st.session_state.column_mapping = {
+            column_mapping = {
                 'id_case': id_col,
                 'opening_date': opening_date_col,
                 'deadline_date': deadline_col,
                 'response_date': response_date_col if response_date_col != "-- Selecione --" else None,
                 'company_name': company_col
             }
-            st.session_state.mapping_confirmed = True
+            if save_profile:
+                try:
+                    get_profile_store().save(file_info[0]['columns'], column_mapping, header_row, profile_name or None)
+                except OSError as e:
+                    st.warning(f"Não foi possível salvar o perfil de mapeamento: {e}")
+            st.session_state.layout_mappings[signature] = column_mapping
             st.rerun()
-    return st.session_state.mapping_confirmed
+    return False
+
+def suggest_column_mapping(file_info, header_row):
+    """Mapping inferred from the first rows of every file, kept until the files or header row change"""
+    key = (tuple(info['digest'] for info in file_info), header_row)
+    if st.session_state.get('suggested_mapping_key') != key:
+        samples = []
+        for info in file_info:
+            try:
+                samples.append(info['report'].preview(header_row, SNIFF_ROWS))
+            except Exception:
+                continue
+        sample = pd.concat(samples, ignore_index=True) if samples else pd.DataFrame()
+        st.session_state.suggested_mapping = infer_column_mapping(sample)
+        st.session_state.suggested_mapping_key = key
+    return st.session_state.suggested_mapping
+
+def display_snapshot_loader():
+    st.header("💾 Análises Salvas")
+    snapshot_file = st.file_uploader(
+        "Abrir análise salva",
+        type=[SNAPSHOT_EXTENSION.lstrip('.')],
+        help="Arquivo .parquet gerado pelo botão 'Salvar Análise'"
+    )
+    if snapshot_file is not None and st.button("📂 Abrir Arquivo"):
+        open_snapshot(snapshot_file.getvalue())
+    
+    saved = list_snapshots(SNAPSHOT_DIR)
+    if saved:
+        labels = {f"{snapshot['name']} ({snapshot['modified'].strftime('%d/%m/%Y %H:%M')})": snapshot['path'] for snapshot in saved}
+        selected = st.selectbox("Análises no servidor", list(labels))
+        if st.button("📂 Abrir do Servidor"):
+            open_snapshot(labels[selected])
+
+def open_snapshot(source):
+    try:
+        df, metrics, info = load_snapshot(source)
+        calendar = calendar_from_description(info['extra'].get('calendar'))
+    except Exception as e:
+        st.error(f"Não foi possível abrir a análise salva: {e}")
+        return
+    
+    release_shared_result()
+    st.session_state.processed_data = df
+    st.session_state.filter_index = FilterIndex(df)
+    st.session_state.as_of_view = None
+    st.session_state.excel_exports = {}
+    st.session_state.metrics = metrics
+    st.session_state.date_formats = info['extra'].get('date_formats', {})
+    st.session_state.dedup_report = info['extra'].get('dedup_report')
+    st.session_state.store_report = None
+    st.session_state.calendar = calendar
+    st.session_state.performance = None
+    st.session_state.processing_errors = []
+    st.session_state.profile_artifacts = None
+    st.session_state.snapshot_bytes = None
+    st.session_state.is_processing = False
+    st.session_state.mapping_confirmed = False
+    st.rerun()
+
+def snapshot_metadata():
+    """Session details saved with a snapshot, so reopening it restores them"""
+    calendar = st.session_state.get('calendar')
+    return {'date_formats': st.session_state.get('date_formats', {}),
+            'dedup_report': st.session_state.get('dedup_report'),
+            'calendar': calendar.describe() if calendar is not None else None}
+
+def display_snapshot_saver(df, metrics):
+    """Serialize the snapshot only when requested, then keep it until the data or its reference date changes"""
+    st.subheader("💾 Salvar Análise")
+    if st.session_state.get('snapshot_as_of') != metrics['processing_date']:
+        st.session_state.snapshot_bytes = None
+        st.session_state.snapshot_as_of = metrics['processing_date']
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.session_state.get('snapshot_bytes') is None:
+            if st.button("⚙️ Gerar Análise (.parquet)", help="Prepara o arquivo para download"):
+                performance = st.session_state.get('performance')
+                trace = RunTrace(performance['run'] if performance else None)
+                with st.spinner("Gerando análise..."), trace.span('snapshot', rows=len(df)):
+                    st.session_state.snapshot_bytes = save_snapshot(df, metrics, extra_metadata=snapshot_metadata())
+                if performance:
+                    performance['spans'].extend(trace.spans)
+        if st.session_state.get('snapshot_bytes') is not None:
+            st.download_button(label="💾 Baixar Análise (.parquet)", data=st.session_state.snapshot_bytes, file_name=f"analise_{datetime.now().strftime('%Y%m%d_%H%M%S')}{SNAPSHOT_EXTENSION}", mime="application/octet-stream", help="Reabra depois em 'Análises Salvas' sem reprocessar os arquivos")
+    with col2:
+        if SNAPSHOT_DIR and st.button("🗄️ Salvar no Servidor"):
+            os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+            path = os.path.join(SNAPSHOT_DIR, f"analise_{datetime.now().strftime('%Y%m%d_%H%M%S')}{SNAPSHOT_EXTENSION}")
+            if st.session_state.get('snapshot_bytes') is not None:
+                with open(path, 'wb') as f:
+                    f.write(st.session_state.snapshot_bytes)
+            else:
+                save_snapshot(df, metrics, path, extra_metadata=snapshot_metadata())
+            st.success(f"Análise salva em {path}")
+
+def display_excel_export(label, export_key, df, metrics, file_prefix):
+    """Generate a workbook only when requested, then keep it per (dataset, filter, reference date) until the data changes"""
+    exports = st.session_state.setdefault('excel_exports', {})
+    if export_key not in exports:
+        if not st.button(f"⚙️ Gerar Excel ({len(df)} registros)", key=f"export_{'_'.join(export_key)}"):
+            return
+        performance = st.session_state.get('performance')
+        trace = RunTrace(performance['run'] if performance else None)
+        with st.spinner("Gerando arquivo Excel..."), trace.span('export', rows=len(df)):
+            exports[export_key] = export_to_excel(df, metrics)
+        if performance:
+            performance['spans'].extend(trace.spans)
+    st.download_button(label=label, data=exports[export_key], file_name=f"{file_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+def display_performance(performance):
+    """Spans of the last processing run: time, throughput and memory per stage"""
+    cached = performance.get('cached_files')
+    cached_text = f", {cached} do cache" if cached else ""
+    if performance.get('shared'):
+        cached_text = ", resultado compartilhado entre sessões"
+    st.caption(f"Execução {performance['run']}: {performance['seconds']:.2f} s, {performance['rows'] or 0} reclamações, "
+               f"{performance.get('files', 0)} arquivo(s){cached_text}")
+    spans = pd.DataFrame(performance['spans'])
+    if spans.empty:
+        return
+    st.dataframe(spans[['name', 'file', 'seconds', 'rows', 'rows_per_second', 'rss_delta_mb', 'rss_mb']].rename(columns={
+        'name': 'Etapa', 'file': 'Arquivo', 'seconds': 'Tempo (s)', 'rows': 'Linhas', 'rows_per_second': 'Linhas/s',
+        'rss_delta_mb': 'Δ Memória (MB)', 'rss_mb': 'Memória (MB)'
+    }), use_container_width=True, hide_index=True)
+    st.bar_chart(spans.groupby('name', sort=False)['seconds'].sum())
+    
+    artifacts = st.session_state.get('profile_artifacts')
+    if artifacts:
+        st.markdown("**Perfil de execução**")
+        st.caption(f"Gravado no servidor em {os.path.dirname(artifacts['collapsed'])}. O arquivo .collapsed abre em "
+                   "speedscope.app ou flamegraph.pl; o .pstats em snakeviz ou python -m pstats.")
+        for kind, label in (('pstats', "⬇️ Perfil (.pstats)"), ('collapsed', "⬇️ Flamegraph (.collapsed)")):
+            if kind in artifacts and os.path.exists(artifacts[kind]):
+                with open(artifacts[kind], 'rb') as f:
+                    st.download_button(label, f.read(), file_name=os.path.basename(artifacts[kind]), key=f"profile_{kind}")
 
 def display_welcome_screen():
     st.markdown("## 🚀 Como usar este sistema")
@@ -232,8 +659,45 @@ def display_results():
     
     df = st.session_state.processed_data
     metrics = st.session_state.metrics
+    index = st.session_state.get('filter_index')
+    if index is None or index.n_rows != len(df):
+        index = st.session_state.filter_index = FilterIndex(df)
+    if st.session_state.shared_key is not None:
+        # Still showing the shared analysis: keep it from being evicted
+        get_shared_results().hold(st.session_state.shared_key, st.session_state.session_id)
     
     st.header("📈 Dashboard de Métricas")
+    calendar = st.session_state.get('calendar')
+    if calendar is not None:
+        st.caption(f"Prazos e tempos de resposta em dias úteis (feriados: {', '.join(calendar.holiday_sets) or 'nenhum'})")
+    
+    # Deadline alerts are re-evaluated for another day without reprocessing
+    processing_day = metrics['processing_date'].date()
+    as_of_day = st.date_input(
+        "Data de referência",
+        value=processing_day,
+        format="DD/MM/YYYY",
+        help="Recalcula dias até o prazo, pendências e alertas para outra data sem reprocessar os arquivos"
+    )
+    if as_of_day != processing_day:
+        # The view is derived once per date and shown, exported and saved instead of the processed result
+        view = st.session_state.as_of_view
+        if view is None or view['day'] != as_of_day:
+            view_df, view_metrics = recompute_as_of(df, metrics, as_of_day, calendar)
+            view = st.session_state.as_of_view = {'day': as_of_day, 'processed_data': view_df,
+                                                  'metrics': view_metrics, 'filter_index': FilterIndex(view_df)}
+        df, metrics, index = view['processed_data'], view['metrics'], view['filter_index']
+    
+    processing_errors = st.session_state.get('processing_errors')
+    if processing_errors:
+        with st.expander(f"⚠️ Avisos de Processamento ({len(processing_errors)})"):
+            for error in processing_errors:
+                st.warning(error)
+    
+    store_report = st.session_state.get('store_report')
+    if store_report:
+        st.caption(f"Histórico de reclamações: {store_report['inserted']} novas, {store_report['changed']} alteradas e "
+                   f"{store_report['unchanged']} sem alteração em {', '.join(store_report['files'])}")
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.metric("Total de Reclamações", metrics['total_complaints'], help="Número total de reclamações processadas")
@@ -247,45 +711,76 @@ def display_results():
     st.subheader("🚨 Alertas de Prazo")
     alert_col1, alert_col2, alert_col3, alert_col4 = st.columns(4)
     with alert_col1:
-        st.metric("🔴 Urgente", len(df[df['alert_level'] == 'Em Cima do Prazo (≤1 dia)']), help="≤1 dia para vencer")
+        st.metric("🔴 Urgente", index.alert_counts.get('Em Cima do Prazo (≤1 dia)', 0), help="≤1 dia para vencer")
     with alert_col2:
-        st.metric("🟡 Atenção", len(df[df['alert_level'] == 'Perto de Ultrapassar o Prazo (2-3 dias)']), help="2-3 dias para vencer")
+        st.metric("🟡 Atenção", index.alert_counts.get('Perto de Ultrapassar o Prazo (2-3 dias)', 0), help="2-3 dias para vencer")
     with alert_col3:
-        st.metric("🟢 Flexível", len(df[df['alert_level'] == 'Prazo Flexível (≥5 dias)']), help="≥5 dias para vencer")
+        st.metric("🟢 Flexível", index.alert_counts.get('Prazo Flexível (≥5 dias)', 0), help="≥5 dias para vencer")
     with alert_col4:
-        st.metric("⚫ Vencidas", len(df[df['status_pending'] == 'Vencida e Não Respondida']), help="Prazo já expirado")
+        st.metric("⚫ Vencidas", index.status_pending_counts.get('Vencida e Não Respondida', 0), help="Prazo já expirado")
+    
+    with st.expander("📅 Projeção de Alertas"):
+        projection_days = st.slider("Dias à frente", min_value=1, max_value=90, value=14)
+        projection = project_alert_counts(df, projection_days, metrics['processing_date'], calendar)
+        st.caption("Reclamações pendentes na data de referência, por nível de alerta nos dias seguintes, supondo que nenhuma seja respondida")
+        st.bar_chart(projection)
+        st.dataframe(projection.set_axis(projection.index.strftime('%d/%m/%Y')), use_container_width=True)
+    
+    if st.session_state.date_formats:
+        with st.expander("🗓️ Formatos de Data Detectados"):
+            format_rows = [
+                {'Arquivo': filename, 'Campo': field, 'Formato': report['format'] or '-',
+                 'Linhas (formato)': report['parsed_by_format'], 'Linhas (fallback)': report['fallback_values']}
+                for filename, fields in st.session_state.date_formats.items()
+                for field, report in fields.items()
+            ]
+            st.dataframe(pd.DataFrame(format_rows), use_container_width=True, hide_index=True)
+    
+    dedup_report = st.session_state.get('dedup_report')
+    if dedup_report:
+        with st.expander(f"🔁 Reclamações Duplicadas ({dedup_report['collapsed']} removidas)"):
+            st.caption(f"Critério: {DEDUP_POLICIES[dedup_report['policy']]}")
+            st.dataframe(pd.DataFrame([
+                {'Arquivo': filename, 'Linhas removidas': removed}
+                for filename, removed in dedup_report['per_file'].items()
+            ]), use_container_width=True, hide_index=True)
+    
+    with st.expander("🧮 Uso de Memória"):
+        if st.checkbox("Comparar com o formato anterior", help="Calcula o uso de memória por coluna dos dados processados"):
+            st.dataframe(memory_report(df), use_container_width=True)
+    
+    performance = st.session_state.get('performance')
+    if performance:
+        with st.expander("⏱️ Desempenho"):
+            display_performance(performance)
     
     st.header("🔍 Filtros e Visualização")
     col1, col2 = st.columns([1, 1])
     with col1:
-        companies = ['Todas'] + sorted(df['company_name'].unique().tolist())
+        companies = ['Todas'] + index.companies
         selected_company = st.selectbox("Filtrar por Empresa", companies)
     with col2:
         status_options = ['Todos', 'Respondida', 'Não Respondida', 'Vencida e Não Respondida']
         selected_status = st.selectbox("Filtrar por Status", status_options)
     
-    filtered_df = df.copy()
-    if selected_company != 'Todas':
-        filtered_df = filtered_df[filtered_df['company_name'] == selected_company]
-    if selected_status != 'Todos':
-        if selected_status == 'Respondida':
-            filtered_df = filtered_df[filtered_df['complaint_status'] == 'Respondida']
-        elif selected_status == 'Não Respondida':
-            filtered_df = filtered_df[filtered_df['complaint_status'] == 'Não Respondida']
-        elif selected_status == 'Vencida e Não Respondida':
-            filtered_df = filtered_df[filtered_df['status_pending'] == 'Vencida e Não Respondida']
+    # Index intersections instead of boolean scans over a copy of the frame
+    status_filter = {}
+    if selected_status in ('Respondida', 'Não Respondida'):
+        status_filter['complaint_status'] = selected_status
+    elif selected_status == 'Vencida e Não Respondida':
+        status_filter['status_pending'] = selected_status
+    filtered_df = index.filter(df, company=None if selected_company == 'Todas' else selected_company, **status_filter)
     
     st.subheader(f"📋 Detalhes das Reclamações ({len(filtered_df)} registros)")
     if not filtered_df.empty:
-        display_df = filtered_df.copy()
-        date_columns = ['opening_date', 'deadline_date', 'response_date']
-        for col in date_columns:
-            if col in display_df.columns:
-                display_df[col] = display_df[col].apply(lambda x: format_date(x) if pd.notna(x) else '')
-        
         column_order = ['case_id', 'company_name', 'complaint_status', 'opening_date', 'deadline_date', 'response_date', 'response_time_days', 'deadline_status', 'alert_level', 'days_to_deadline']
-        display_columns = [col for col in column_order if col in display_df.columns]
-        display_df = display_df[display_columns].rename(columns={
+        display_columns = [col for col in column_order if col in filtered_df.columns]
+        date_columns = [col for col in ['opening_date', 'deadline_date', 'response_date'] if col in filtered_df.columns]
+        display_df = filtered_df[display_columns].assign(**{
+            col: filtered_df[col].dt.strftime('%d/%m/%Y').fillna('') for col in date_columns
+        })
+        
+        display_df = display_df.rename(columns={
             'case_id': 'ID da Reclamação', 'company_name': 'Empresa', 'complaint_status': 'Status',
             'opening_date': 'Data Abertura', 'deadline_date': 'Data Prazo', 'response_date': 'Data Resposta',
             'response_time_days': 'Tempo Resposta (dias)', 'deadline_status': 'Status Prazo',
@@ -312,13 +807,13 @@ def display_results():
         st.subheader("📤 Exportar Resultados")
         col1, col2 = st.columns(2)
         with col1:
-            excel_buffer_filtered = export_to_excel(filtered_df, metrics)
-            st.download_button(label="📊 Baixar Dados Filtrados", data=excel_buffer_filtered, file_name=f"analise_filtrada_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            display_excel_export("📊 Baixar Dados Filtrados", ('filtered', selected_company, selected_status, as_of_day.isoformat()), filtered_df, metrics, "analise_filtrada")
         with col2:
-            excel_buffer_all = export_to_excel(df, metrics)
-            st.download_button(label="📈 Baixar Todos os Dados", data=excel_buffer_all, file_name=f"analise_completa_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            display_excel_export("📈 Baixar Todos os Dados", ('all', as_of_day.isoformat()), df, metrics, "analise_completa")
     else:
         st.info("Nenhum registro encontrado com os filtros aplicados.")
+    
+    display_snapshot_saver(df, metrics)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,120 @@
+import pandas as pd
+import numpy as np
+from datetime import date, datetime, time
+from typing import Any, Dict, Tuple
+from business_calendar import BusinessCalendar
+from complaint_processor import ComplaintProcessor
+from complaint_schema import ALERT_LEVEL_VALUES, STATUS_PENDING_VALUES
+
+# Longest horizon of the alert projection, in days
+MAX_PROJECTION_DAYS = 365
+
+
+def _as_datetime(as_of: date | datetime) -> datetime:
+    """Reference date as a datetime at midnight"""
+    if isinstance(as_of, datetime):
+        return as_of
+    return datetime.combine(as_of, time())
+
+
+def recompute_as_of(df: pd.DataFrame, metrics: Dict[str, Any], as_of: date | datetime,
+                    calendar: BusinessCalendar | None = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Re-evaluate a processed frame and its metrics for another reference date
+
+    Only days_to_deadline, status_pending and alert_level of the open
+    complaints depend on the date; they are recomputed in one vectorized
+    pass, and the metrics that count them are updated. Nothing is re-read
+    or re-parsed.
+
+    Args:
+        df: Processed complaints dataframe (left unchanged)
+        metrics: Metrics calculated for the frame
+        as_of: New reference date
+        calendar: Business calendar the frame was processed with (None for calendar days)
+
+    Returns:
+        Tuple of (dataframe with refreshed time columns, updated metrics)
+    """
+    processing_date = _as_datetime(as_of)
+    refreshed = df.copy(deep=False)
+    if not refreshed.empty:
+        processor = ComplaintProcessor(calendar)
+        processor.processing_date = processing_date
+        processor.refresh_deadline_fields(refreshed)
+
+    updated = dict(metrics)
+    updated['processing_date'] = processing_date
+    if refreshed.empty:
+        return refreshed, updated
+
+    pending_counts = refreshed['status_pending'].value_counts()
+    updated['in_deadline_not_responded'] = int(pending_counts.get(STATUS_PENDING_VALUES[0], 0))
+    updated['overdue_not_responded'] = int(pending_counts.get(STATUS_PENDING_VALUES[1], 0))
+    # Same ordering as MetricsAccumulator.result: most frequent first
+    alert_counts = refreshed['alert_level'].value_counts()
+    updated['alert_breakdown'] = dict(sorted(
+        ((alert, int(count)) for alert, count in alert_counts.items() if count > 0),
+        key=lambda item: -item[1]
+    ))
+    return refreshed, updated
+
+
+def project_alert_counts(df: pd.DataFrame, days: int, start: date | datetime | None = None,
+                         calendar: BusinessCalendar | None = None) -> pd.DataFrame:
+    """
+    Alert level counts of the currently open complaints for each of the next days
+
+    Assumes no further responses, so it shows how the open backlog moves
+    through the alert levels if nothing is answered. Days to deadline are
+    counted once; each day of the horizon is read from cumulative counts.
+
+    Args:
+        df: Processed complaints dataframe
+        days: Number of days after the start to project (0 to MAX_PROJECTION_DAYS)
+        start: First day of the projection (defaults to today)
+        calendar: Business calendar of the day counts (None for calendar days)
+
+    Returns:
+        Dataframe indexed by date with one column per alert level
+    """
+    if not 0 <= days <= MAX_PROJECTION_DAYS:
+        raise ValueError(f"Projection horizon must be between 0 and {MAX_PROJECTION_DAYS} days")
+
+    start_day = pd.Timestamp(_as_datetime(start or date.today()).date())
+    dates = pd.date_range(start_day, periods=days + 1, freq='D')
+    if df.empty:
+        return pd.DataFrame(0, index=dates, columns=ALERT_LEVEL_VALUES)
+
+    open_rows = (df['complaint_status'] == 'Não Respondida').to_numpy()
+    deadlines = df['deadline_date'][open_rows]
+    # Day counts are additive, so on each day the days to deadline are the
+    # start-day count minus the days elapsed since the start
+    if calendar is None:
+        base = (deadlines.dt.normalize() - start_day).dt.days.to_numpy()
+        elapsed = np.arange(days + 1)
+    else:
+        base = calendar.count(start_day, deadlines).astype(np.int64)
+        elapsed = calendar.count(start_day, dates).astype(np.int64)
+
+    # Days to deadline on the start day, shifted so every bin is >= 0: bin 0
+    # is already overdue, bins past the horizon stay flexible throughout
+    limit = int(elapsed[-1]) + 5
+    counts = np.bincount(np.clip(base, -1, limit) + 1, minlength=limit + 2)
+    below = np.concatenate([[0], np.cumsum(counts)])  # below[i]: rows with base < i - 1
+
+    def between(low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        """Rows whose days to deadline on each day fall in [low, high]"""
+        return below[np.clip(high + 2, 0, limit + 2)] - below[np.clip(low + 1, 0, limit + 2)]
+
+    total = len(base)
+    overdue = below[elapsed + 1]
+    projection = pd.DataFrame({
+        ALERT_LEVEL_VALUES[0]: between(elapsed, elapsed + 1),
+        ALERT_LEVEL_VALUES[1]: between(elapsed + 2, elapsed + 3),
+        ALERT_LEVEL_VALUES[2]: between(elapsed + 4, elapsed + 4),
+        ALERT_LEVEL_VALUES[3]: total - overdue - between(elapsed, elapsed + 4),
+        ALERT_LEVEL_VALUES[4]: overdue
+    }, index=dates)
+    projection.index.name = 'date'
+    return projection
@@ -0,0 +1,293 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, time as day_start
+from typing import Any, Dict, List
+
+# Heavy modules (pandas, openpyxl, pyarrow) are imported inside run(), so
+# argument errors and --help return immediately and Streamlit is never loaded
+
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xls', '.csv', '.ods')
+OUTPUT_FORMATS = ['excel', 'parquet', 'json']
+# deduplication.DEDUP_POLICIES plus 'none' (not imported here, see above)
+DEDUP_CHOICES = ['none', 'latest_file', 'with_response', 'latest_opening']
+
+EXIT_OK = 0
+EXIT_FAILED = 1  # Nothing could be processed
+EXIT_USAGE = 2  # Bad arguments, no input files or no usable mapping
+EXIT_PARTIAL = 3  # Results written, but some files failed
+
+
+def find_report_files(inputs: List[str]) -> List[str]:
+    """
+    Expand directories and glob patterns into report files
+
+    Args:
+        inputs: Files, directories or glob patterns
+
+    Returns:
+        Sorted list of supported files, without duplicates
+    """
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = [os.path.join(item, name) for name in os.listdir(item)]
+        else:
+            candidates = glob.glob(item) or [item]
+        paths.extend(path for path in candidates
+                     if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS))
+    return sorted(set(paths))
+
+
+def load_profile(profile: str, store) -> Dict[str, Any]:
+    """
+    Load a mapping profile from a JSON file or from the profile store
+
+    Args:
+        profile: Path to a profile JSON file, or a profile name or signature
+        store: MappingProfileStore searched when the argument is not a file
+
+    Returns:
+        Profile dictionary with at least 'mapping'
+    """
+    if os.path.isfile(profile):
+        with open(profile, 'r', encoding='utf-8') as f:
+            loaded = json.load(f)
+        # A bare mapping is accepted as well as a saved profile
+        return loaded if 'mapping' in loaded else {'name': os.path.basename(profile), 'mapping': loaded}
+
+    found = store.get(profile)
+    if found is None:
+        found = next((saved for saved in store.list() if saved['name'] == profile), None)
+    if found is None:
+        raise ValueError(f"Perfil de mapeamento não encontrado: {profile}")
+    return found
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line arguments of the batch runner"""
+    parser = argparse.ArgumentParser(
+        prog='batch.py',
+        description="Processa relatórios de reclamações sem a interface Streamlit e grava as análises"
+    )
+    parser.add_argument('inputs', nargs='+', help="Arquivos, diretórios ou padrões glob (ex.: 'relatorios/*.xlsx')")
+    parser.add_argument('-p', '--profile', help="Perfil de mapeamento: arquivo JSON, nome ou assinatura de um perfil salvo "
+                                                "(padrão: perfil salvo correspondente ao cabeçalho de cada arquivo)")
+    parser.add_argument('--profile-dir', default=os.environ.get('DATAJURIS_PROFILE_DIR'),
+                        help="Diretório dos perfis de mapeamento salvos")
+    parser.add_argument('-H', '--header-row', type=int,
+                        help="Linha do cabeçalho (1-based; padrão: a do perfil ou detectada no primeiro arquivo)")
+    parser.add_argument('-o', '--output-dir', default='.', help="Diretório de saída (padrão: diretório atual)")
+    parser.add_argument('-f', '--formats', nargs='+', choices=OUTPUT_FORMATS, default=OUTPUT_FORMATS,
+                        help="Formatos de saída (padrão: todos)")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processos paralelos (1 = sequencial; padrão: número de CPUs)")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Linhas por bloco na leitura de CSV (padrão: tamanho padrão; 0 lê o arquivo inteiro)")
+    parser.add_argument('-d', '--dedup', choices=DEDUP_CHOICES, default='latest_file',
+                        help="Reclamações repetidas (protocolo + empresa): 'none' mantém todas; as demais mantêm a do "
+                             "arquivo mais recente, a com data de resposta ou a de abertura mais recente (padrão: latest_file)")
+    parser.add_argument('-s', '--store', help="Diretório do histórico de reclamações: só linhas novas ou alteradas são "
+                                              "processadas e o histórico completo é exportado (ignora --dedup e --workers)")
+    parser.add_argument('--as-of', type=date.fromisoformat,
+                        help="Data de referência dos prazos e alertas, AAAA-MM-DD (padrão: hoje)")
+    parser.add_argument('--projection-days', type=int, default=0,
+                        help="Inclui no resumo JSON a projeção dos alertas para os próximos N dias")
+    parser.add_argument('-b', '--business-days', action='store_true',
+                        help="Conta prazos e tempos de resposta em dias úteis (sem fins de semana e feriados)")
+    parser.add_argument('--holidays', nargs='*', default=None,
+                        help="Conjuntos de feriados dos dias úteis (padrão: nacional; arquivos de --holiday-dir pelo nome)")
+    parser.add_argument('--holiday-dir', default=os.environ.get('DATAJURIS_HOLIDAY_DIR'),
+                        help="Diretório dos arquivos de feriados locais (padrão: $DATAJURIS_HOLIDAY_DIR)")
+    parser.add_argument('--profiling', action='store_true',
+                        help="Grava um perfil do processamento (.pstats e flamegraph .collapsed) no diretório de saída; "
+                             "os arquivos são processados em sequência")
+    parser.add_argument('--prefix', default='analise', help="Prefixo dos arquivos gerados")
+    return parser
+
+
+def run(args: argparse.Namespace) -> int:
+    """
+    Run the validate → process → metrics → export pipeline
+
+    Args:
+        args: Parsed command-line arguments
+
+    Returns:
+        Process exit code
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    def log(message: str):
+        print(message, file=sys.stderr, flush=True)
+
+    stage_start = time.perf_counter()
+    from data_validator import DataValidator
+    from ingestion import DEFAULT_CHUNK_SIZE, NamedBytesIO
+    from mapping_profiles import MappingProfileStore, mapping_fits
+    from pipeline import NoValidDataError, run_analysis
+    from upload_cache import UploadCache
+    from upload_session import UploadSession
+    timings['import'] = time.perf_counter() - stage_start
+
+    paths = find_report_files(args.inputs)
+    if not paths:
+        log("Nenhum arquivo de relatório encontrado")
+        return EXIT_USAGE
+
+    # Validate
+    stage_start = time.perf_counter()
+    files = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            files.append(NamedBytesIO(f.read(), os.path.basename(path)))
+    session = UploadSession()
+    valid_files, errors = DataValidator().validate_files(files, session)
+    for error in errors:
+        log(f"[validação] {error}")
+    reports = [session.report(info['file']) for info in valid_files]
+    timings['validate'] = time.perf_counter() - stage_start
+    if not reports:
+        log("Nenhum arquivo válido")
+        return EXIT_FAILED
+
+    # Mapping: one profile for every file, or the saved profile of each header
+    store = MappingProfileStore(args.profile_dir)
+    try:
+        profile = load_profile(args.profile, store) if args.profile else None
+    except (OSError, ValueError) as e:
+        log(str(e))
+        return EXIT_USAGE
+
+    header_row = args.header_row or (profile or {}).get('header_row') or reports[0].detect_header_row()
+    mappings = []
+    for report in reports:
+        try:
+            columns = report.columns(header_row)
+        except Exception as e:
+            log(f"{report.name}: não foi possível ler o cabeçalho na linha {header_row} ({e})")
+            return EXIT_USAGE
+        if profile is not None:
+            # A profile given by name or file must still fit every file's header
+            if not mapping_fits(profile['mapping'], columns):
+                missing = [column for column in profile['mapping'].values() if column and column not in columns]
+                log(f"{report.name}: o perfil '{profile.get('name', args.profile)}' não corresponde ao cabeçalho "
+                    f"(colunas ausentes: {missing})")
+                return EXIT_USAGE
+            matched = profile
+        else:
+            matched = store.match(columns)
+            if matched is None:
+                log(f"{report.name}: nenhum perfil de mapeamento para este cabeçalho (use --profile)")
+                return EXIT_USAGE
+        mappings.append(matched['mapping'])
+
+    calendar = None
+    if args.business_days:
+        from business_calendar import BusinessCalendar
+        try:
+            calendar = BusinessCalendar(args.holidays, args.holiday_dir)
+        except (OSError, ValueError) as e:
+            log(f"Calendário de dias úteis inválido: {e}")
+            return EXIT_USAGE
+
+    # Process, merge and compute metrics (the same run as the app's)
+    stage_start = time.perf_counter()
+    processing_date = datetime.combine(args.as_of, day_start()) if args.as_of else datetime.now()
+    chunksize = DEFAULT_CHUNK_SIZE if args.chunksize is None else (args.chunksize or None)
+    file_info = [{'report': report, 'name': report.name, 'digest': report.digest} for report in reports]
+    try:
+        analysis = run_analysis(
+            file_info, mappings, header_row, chunksize=chunksize, max_workers=min(args.workers, len(reports)),
+            dedup_policy=None if args.dedup == 'none' else args.dedup, store_dir=args.store, calendar=calendar,
+            # Every file is processed once, so nothing is worth caching
+            cache=UploadCache(max_memory_bytes=0), profiling=args.profiling, processing_date=processing_date,
+            profile_dir=args.output_dir
+        )
+    except NoValidDataError as e:
+        for error in list(errors) + e.errors:
+            log(error)
+        log("Nenhum dado válido foi processado")
+        return EXIT_FAILED
+    timings['process'] = time.perf_counter() - stage_start
+
+    combined_df = analysis['processed_data']
+    metrics = analysis['metrics']
+    dedup_report = analysis['dedup_report']
+    duplicates = dedup_report['collapsed'] if dedup_report else 0
+    processing_errors = list(errors) + analysis['errors']
+    failed_files = analysis['failed_files']
+    rows_read = analysis['rows_read']
+
+    # Export
+    stage_start = time.perf_counter()
+    os.makedirs(args.output_dir, exist_ok=True)
+    stem = os.path.join(args.output_dir, f"{args.prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    outputs = {}
+    if 'excel' in args.formats:
+        from excel_export import write_excel_report
+        outputs['excel'] = f"{stem}.xlsx"
+        write_excel_report(combined_df, metrics, outputs['excel'])
+    if 'parquet' in args.formats:
+        from snapshot import SNAPSHOT_EXTENSION, save_snapshot
+        outputs['parquet'] = f"{stem}{SNAPSHOT_EXTENSION}"
+        save_snapshot(combined_df, metrics, outputs['parquet'],
+                      extra_metadata={'date_formats': analysis['date_formats'],
+                                      'dedup_report': dedup_report,
+                                      'calendar': calendar.describe() if calendar is not None else None})
+    timings['export'] = time.perf_counter() - stage_start
+    timings['total'] = time.perf_counter() - started
+
+    summary = {
+        'files': [report.name for report in reports],
+        'failed_files': failed_files,
+        'header_row': header_row,
+        'sla_basis': calendar.describe() if calendar is not None else {'basis': 'calendar'},
+        'rows_read': rows_read,
+        'complaints': len(combined_df),
+        'duplicates_collapsed': duplicates,
+        'store': analysis['store_report'],
+        'errors': processing_errors,
+        'outputs': outputs,
+        'timings': {stage: round(seconds, 3) for stage, seconds in timings.items()},
+        'spans': analysis['performance']['spans'],
+        'profile': analysis['profile_artifacts']
+    }
+    if args.projection_days:
+        from as_of import project_alert_counts
+        projection = project_alert_counts(combined_df, args.projection_days, processing_date, calendar)
+        summary['alert_projection'] = {day.strftime('%Y-%m-%d'): counts
+                                       for day, counts in projection.to_dict(orient='index').items()}
+    if 'json' in args.formats:
+        from snapshot import metrics_to_json
+        outputs['json'] = f"{stem}.json"
+        with open(outputs['json'], 'w', encoding='utf-8') as f:
+            json.dump({**summary, 'metrics': metrics_to_json(metrics)}, f, ensure_ascii=False, indent=2, default=str)
+
+    log(f"{len(reports)} arquivo(s), {rows_read} linhas lidas, {len(combined_df)} reclamações "
+        f"({duplicates} duplicadas removidas), {len(processing_errors)} aviso(s)")
+    log("Tempos: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+    for output in outputs.values():
+        log(f"Gerado: {output}")
+
+    return EXIT_PARTIAL if failed_files or errors else EXIT_OK
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Entry point: python batch.py <relatórios> [opções]"""
+    args = build_parser().parse_args(argv)
+    if args.header_row is not None and args.header_row < 1:
+        print("--header-row deve ser maior ou igual a 1", file=sys.stderr)
+        return EXIT_USAGE
+    if not 0 <= args.projection_days <= 365:
+        print("--projection-days deve estar entre 0 e 365", file=sys.stderr)
+        return EXIT_USAGE
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,394 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Bump when the generated data changes, so cached files and results of
+# different generators are never compared
+GENERATOR_VERSION = 1
+RESULTS_FORMAT_VERSION = 1
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+REPORT_FORMATS = ['csv', 'xlsx', 'ods']
+# ODS files are written and read cell by cell through odfpy; larger sizes are skipped
+MAX_ROWS_PER_FORMAT = {'ods': 100_000}
+
+# Processing date of every run, so results do not depend on the day they ran
+REFERENCE_DATE = datetime(2025, 6, 30)
+
+REPORT_COLUMNS = {
+    'id_case': 'Protocolo',
+    'opening_date': 'Data Abertura',
+    'deadline_date': 'Prazo',
+    'response_date': 'Data Resposta',
+    'company_name': 'Empresa'
+}
+
+# Date formats of the generated cells and how often each one appears
+GENERATED_DATE_FORMATS = {
+    '%d/%m/%Y': 0.6,
+    '%d/%m/%Y %H:%M:%S': 0.2,
+    '%Y-%m-%d': 0.1,
+    '%d-%m-%Y': 0.1
+}
+INVALID_DATE_VALUES = ['00/00/0000', 'pendente', '31/02/2025']
+
+_COMPANY_SECTORS = ['Banco', 'Telecom', 'Seguradora', 'Varejo', 'Energia', 'Saneamento', 'Operadora',
+                    'Financeira', 'Transportes', 'Construtora']
+_COMPANY_NAMES = ['Alvorada', 'Horizonte', 'Paulista', 'Central', 'Nacional', 'Atlântico', 'Cruzeiro',
+                  'Pioneira', 'Guanabara', 'Bandeirante', 'Ipê', 'Serra Azul']
+_COMPANY_SUFFIXES = ['S.A.', 'Ltda', 'S/A', 'Ltda.']
+
+STAGES = ['read', 'validate', 'parse_dates', 'process', 'metrics', 'accumulate', 'export']
+
+
+def company_names(count: int, rng: np.random.Generator) -> List[str]:
+    """Distinct company names such as 'Banco Horizonte S.A.'"""
+    combinations = [f"{sector} {name}" for sector in _COMPANY_SECTORS for name in _COMPANY_NAMES]
+    chosen = rng.choice(len(combinations), size=min(count, len(combinations)), replace=False)
+    return [f"{combinations[i]} {_COMPANY_SUFFIXES[i % len(_COMPANY_SUFFIXES)]}" for i in chosen]
+
+
+def _format_dates(dates: pd.Series, rng: np.random.Generator) -> np.ndarray:
+    """Date cells as text, each row in one of GENERATED_DATE_FORMATS"""
+    formats = list(GENERATED_DATE_FORMATS)
+    choice = rng.choice(len(formats), size=len(dates), p=list(GENERATED_DATE_FORMATS.values()))
+    cells = np.full(len(dates), '', dtype=object)
+    present = dates.notna().to_numpy()
+    for position, fmt in enumerate(formats):
+        selected = present & (choice == position)
+        cells[selected] = dates[selected].dt.strftime(fmt).to_numpy()
+    return cells
+
+
+def generate_report(rows: int, seed: int = 42, companies: int = 40) -> pd.DataFrame:
+    """
+    Synthetic complaint report as exported by the complaint portals
+
+    Dates are text in mixed Brazilian and ISO formats, about a third of the
+    complaints have no response yet, some protocol numbers are padded with
+    whitespace, and a few cells are blank or unparseable. Company volumes
+    are skewed, as in real reports. The same seed gives the same report.
+
+    Args:
+        rows: Number of data rows
+        seed: Random seed
+        companies: Number of distinct companies
+
+    Returns:
+        Raw dataframe with the REPORT_COLUMNS headers, all cells as text
+    """
+    rng = np.random.default_rng(seed)
+
+    ids = pd.Series(np.arange(rows) + 2025_0000_0000).astype(str).to_numpy(dtype=object)
+    padded = rng.random(rows) < 0.05
+    ids[padded] = [f"  {value} " for value in ids[padded]]
+    ids[rng.random(rows) < 0.001] = ''
+
+    opening = pd.Series(REFERENCE_DATE - pd.to_timedelta(rng.integers(0, 180 * 86_400, rows), unit='s'))
+    deadline = (opening.dt.normalize() + pd.to_timedelta(rng.integers(5, 31, rows), unit='D'))
+    response = opening + pd.to_timedelta(rng.exponential(8 * 86_400, rows).astype(np.int64), unit='s')
+    response[(rng.random(rows) < 0.35) | (response > REFERENCE_DATE)] = pd.NaT
+
+    opening_cells = _format_dates(opening, rng)
+    deadline_cells = _format_dates(deadline, rng)
+    response_cells = _format_dates(response, rng)
+    for cells in (opening_cells, deadline_cells, response_cells):
+        invalid = rng.random(rows) < 0.002
+        cells[invalid] = rng.choice(INVALID_DATE_VALUES, size=int(invalid.sum()))
+
+    names = np.array(company_names(companies, rng), dtype=object)
+    weights = 1.0 / np.arange(1, len(names) + 1)
+    company = names[rng.choice(len(names), size=rows, p=weights / weights.sum())]
+
+    return pd.DataFrame({
+        REPORT_COLUMNS['id_case']: ids,
+        REPORT_COLUMNS['opening_date']: opening_cells,
+        REPORT_COLUMNS['deadline_date']: deadline_cells,
+        REPORT_COLUMNS['response_date']: response_cells,
+        REPORT_COLUMNS['company_name']: company
+    })
+
+
+def write_report(df: pd.DataFrame, path: str):
+    """Write a generated report as CSV, XLSX or ODS, chosen by the extension"""
+    if path.endswith('.csv'):
+        df.to_csv(path, index=False)
+    elif path.endswith('.xlsx'):
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('Reclamações')
+        ws.append(list(df.columns))
+        for row in df.itertuples(index=False):
+            ws.append(list(row))
+        wb.save(path)
+    else:
+        df.to_excel(path, index=False, engine='odf')
+
+
+def report_file(rows: int, report_format: str, seed: int, data_dir: str) -> str:
+    """Path of a generated report, writing it on first use"""
+    path = os.path.join(data_dir, f"reclamacoes_v{GENERATOR_VERSION}_s{seed}_{rows}.{report_format}")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        temporary = path + '.tmp.' + report_format
+        write_report(generate_report(rows, seed), temporary)
+        os.replace(temporary, path)
+    return path
+
+
+def pipeline_stages(data: bytes, filename: str) -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+    """
+    The pipeline of one file as named stages, each reading the results of the earlier ones
+
+    Stages use the same entry points as the app: UploadedReport.read,
+    DataValidator.validate_data_quality, ComplaintProcessor.process_file,
+    calculate_metrics / MetricsAccumulator and the Excel export.
+    """
+    from complaint_processor import ComplaintProcessor
+    from data_validator import DataValidator
+    from excel_export import export_excel_bytes
+    from metrics_accumulator import MetricsAccumulator
+    from upload_session import UploadedReport
+
+    processor = ComplaintProcessor()
+    processor.processing_date = REFERENCE_DATE
+    mapping = dict(REPORT_COLUMNS)
+
+    def parse_dates(results):
+        raw = results['read']
+        return {field: processor._parse_date_column(raw[mapping[field]], skip_falsy=field == 'response_date')
+                for field in ('opening_date', 'deadline_date', 'response_date')}
+
+    return {
+        'read': lambda results: UploadedReport(data, filename).read(1),
+        'validate': lambda results: DataValidator().validate_data_quality(results['read'], mapping),
+        'parse_dates': parse_dates,
+        'process': lambda results: processor.process_file(results['read'], mapping, filename)[0],
+        'metrics': lambda results: processor.calculate_metrics(results['process']),
+        'accumulate': lambda results: MetricsAccumulator.from_frame(results['process']).result(REFERENCE_DATE),
+        'export': lambda results: export_excel_bytes(results['process'], results['metrics'])
+    }
+
+
+def run_pipeline(data: bytes, filename: str, stages: List[str], trace_memory: bool = False) -> Dict[str, Dict[str, float]]:
+    """
+    Run the pipeline stages once
+
+    Args:
+        data: Report file contents
+        filename: Report file name
+        stages: Stages to measure (the stages they depend on run unmeasured)
+        trace_memory: Record the peak Python heap of each stage (slower)
+
+    Returns:
+        {stage: {'seconds': ..., 'peak_memory_mb': ...}} for the measured stages
+    """
+    results: Dict[str, Any] = {}
+    measured = {}
+    for stage, function in pipeline_stages(data, filename).items():
+        if stage not in stages and stage not in ('read', 'process', 'metrics'):
+            continue
+        gc.collect()
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        results[stage] = function(results)
+        seconds = time.perf_counter() - started
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        if stage in stages:
+            measured[stage] = {'seconds': seconds}
+            if trace_memory:
+                measured[stage]['peak_memory_mb'] = peak / 2**20
+    return measured
+
+
+def benchmark_file(path: str, rows: int, stages: List[str], repeat: int, trace_memory: bool) -> Dict[str, Any]:
+    """
+    Time each stage on one report: best of `repeat` runs, plus one traced run for memory
+
+    Returns:
+        Result entry with rows, format, file size and per-stage statistics
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    filename = os.path.basename(path)
+
+    runs = [run_pipeline(data, filename, stages) for _ in range(repeat)]
+    memory = run_pipeline(data, filename, stages, trace_memory=True) if trace_memory else {}
+
+    entry = {
+        'rows': rows,
+        'format': os.path.splitext(path)[1].lstrip('.'),
+        'file_bytes': len(data),
+        'stages': {}
+    }
+    for stage in stages:
+        seconds = [run[stage]['seconds'] for run in runs]
+        best = min(seconds)
+        entry['stages'][stage] = {
+            'seconds': round(best, 6),
+            'median_seconds': round(float(np.median(seconds)), 6),
+            'rows_per_second': round(rows / best) if best > 0 else None,
+            'peak_memory_mb': round(memory[stage]['peak_memory_mb'], 2) if stage in memory else None
+        }
+    return entry
+
+
+def _git_commit() -> str | None:
+    """Commit of the working tree, when it is a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    """Versions and machine the results were measured on"""
+    import openpyxl
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'openpyxl': openpyxl.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+                    min_seconds: float) -> List[Dict[str, Any]]:
+    """
+    Stage timings of two result files side by side
+
+    Args:
+        current: Results of this run
+        baseline: Results loaded from an earlier run
+        threshold: Slowdown ratio reported as a regression
+        min_seconds: Absolute slowdown below which a stage is never a regression (timer noise)
+
+    Returns:
+        One row per (format, rows, stage) present in both, with the ratio and a regression flag
+    """
+    if baseline.get('generator_version') != current['generator_version']:
+        raise ValueError("Os resultados de referência foram gerados com outra versão do gerador de dados")
+
+    previous = {(entry['format'], entry['rows']): entry for entry in baseline.get('results', [])}
+    rows = []
+    for entry in current['results']:
+        old = previous.get((entry['format'], entry['rows']))
+        if old is None:
+            continue
+        for stage, stats in entry['stages'].items():
+            if stage not in old['stages']:
+                continue
+            before, after = old['stages'][stage]['seconds'], stats['seconds']
+            ratio = after / before if before > 0 else float('inf')
+            rows.append({
+                'format': entry['format'],
+                'rows': entry['rows'],
+                'stage': stage,
+                'baseline_seconds': before,
+                'seconds': after,
+                'ratio': round(ratio, 3),
+                'regression': ratio > threshold and after - before > min_seconds
+            })
+    return rows
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line options"""
+    parser = argparse.ArgumentParser(
+        description="Mede cada etapa do processamento (leitura, validação, datas, processamento, métricas, "
+                    "exportação) em relatórios sintéticos e grava os resultados em JSON."
+    )
+    parser.add_argument('-n', '--sizes', nargs='+', type=int, default=DEFAULT_SIZES,
+                        help="Número de linhas dos relatórios (padrão: 1000 10000 100000; até 1000000)")
+    parser.add_argument('-f', '--formats', nargs='+', choices=REPORT_FORMATS, default=REPORT_FORMATS,
+                        help="Formatos dos relatórios (padrão: todos)")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES,
+                        help="Etapas medidas (padrão: todas)")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help="Execuções por relatório; vale o menor tempo (padrão: 3)")
+    parser.add_argument('--seed', type=int, default=42, help="Semente do gerador (padrão: 42)")
+    parser.add_argument('--data-dir', default=os.path.join('.benchmark', 'data'),
+                        help="Diretório dos relatórios gerados, reaproveitados entre execuções (padrão: .benchmark/data)")
+    parser.add_argument('-o', '--output', help="Arquivo JSON de resultados (padrão: .benchmark/<commit>_<data>.json)")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Não mede o pico de memória (dispensa a execução extra com tracemalloc)")
+    parser.add_argument('-c', '--compare', help="Resultados de referência (JSON) para detectar regressões")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="Razão de tempo acima da qual uma etapa é uma regressão (padrão: 1.25)")
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help="Diferença mínima, em segundos, para contar como regressão (padrão: 0.05)")
+    return parser
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Entry point: python benchmark.py [opções]; returns 1 when --compare finds a regression"""
+    args = build_parser().parse_args(argv)
+    if args.repeat < 1 or any(size < 1 for size in args.sizes):
+        print("--repeat e --sizes devem ser maiores que zero", file=sys.stderr)
+        return 2
+
+    commit = _git_commit()
+    current = {
+        'version': RESULTS_FORMAT_VERSION,
+        'generator_version': GENERATOR_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'environment': environment(),
+        'config': {'seed': args.seed, 'repeat': args.repeat, 'stages': args.stages},
+        'results': []
+    }
+
+    for report_format in args.formats:
+        for rows in sorted(args.sizes):
+            if rows > MAX_ROWS_PER_FORMAT.get(report_format, rows):
+                print(f"{report_format} {rows}: ignorado (máximo {MAX_ROWS_PER_FORMAT[report_format]} linhas)",
+                      file=sys.stderr)
+                continue
+            path = report_file(rows, report_format, args.seed, args.data_dir)
+            entry = benchmark_file(path, rows, args.stages, args.repeat, not args.no_memory)
+            current['results'].append(entry)
+            print(f"{report_format} {rows:>9}: " + ", ".join(
+                f"{stage} {stats['seconds']:.3f}s" for stage, stats in entry['stages'].items()), file=sys.stderr)
+
+    # Peak resident memory of the whole run (kilobytes on Linux)
+    current['max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    output = args.output or os.path.join(
+        '.benchmark', f"{commit or 'local'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, ensure_ascii=False, indent=2)
+    print(f"Resultados: {output}", file=sys.stderr)
+
+    if not args.compare:
+        return 0
+    with open(args.compare, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    comparison = compare_results(current, baseline, args.threshold, args.min_seconds)
+    for row in comparison:
+        flag = '  REGRESSÃO' if row['regression'] else ''
+        print(f"{row['format']} {row['rows']:>9} {row['stage']:<12} {row['baseline_seconds']:.3f}s -> "
+              f"{row['seconds']:.3f}s ({row['ratio']:.2f}x){flag}", file=sys.stderr)
+    return 1 if any(row['regression'] for row in comparison) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
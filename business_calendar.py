@@ -0,0 +1,202 @@
+import pandas as pd
+import numpy as np
+import csv
+import hashlib
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List
+
+# Directory of the local holiday files, one set per file (e.g. sao_paulo.csv)
+DEFAULT_HOLIDAY_DIR = os.environ.get('DATAJURIS_HOLIDAY_DIR')
+HOLIDAY_FILE_EXTENSIONS = ('.csv', '.txt', '.json')
+HOLIDAY_DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y']
+NATIONAL_HOLIDAY_SET = 'nacional'
+# Years covered by the built-in national holidays
+NATIONAL_HOLIDAY_YEARS = range(2000, 2051)
+
+# Fixed-date national holidays (month, day)
+NATIONAL_FIXED_HOLIDAYS = [
+    (1, 1),    # Confraternização Universal
+    (4, 21),   # Tiradentes
+    (5, 1),    # Dia do Trabalho
+    (9, 7),    # Independência
+    (10, 12),  # Nossa Senhora Aparecida
+    (11, 2),   # Finados
+    (11, 15),  # Proclamação da República
+    (12, 25)   # Natal
+]
+
+
+def easter_sunday(year: int) -> date:
+    """Easter Sunday of a year (Gregorian calendar, anonymous algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def national_holidays(years: Iterable[int] = NATIONAL_HOLIDAY_YEARS) -> np.ndarray:
+    """
+    Brazilian national holidays (fixed dates, Sexta-feira Santa and, from
+    2024, Dia da Consciência Negra)
+
+    Args:
+        years: Years to generate
+
+    Returns:
+        Sorted datetime64[D] array
+    """
+    days = []
+    for year in years:
+        days.extend(date(year, month, day) for month, day in NATIONAL_FIXED_HOLIDAYS)
+        days.append(easter_sunday(year) - pd.Timedelta(days=2))
+        if year >= 2024:
+            days.append(date(year, 11, 20))
+    return np.unique(np.array(days, dtype='datetime64[D]'))
+
+
+def _parse_holiday(value: Any) -> np.datetime64 | None:
+    """Date of a holiday file entry (ISO or dd/mm/yyyy), None for blank lines and headers"""
+    text = str(value).strip()
+    for fmt in HOLIDAY_DATE_FORMATS:
+        try:
+            return np.datetime64(datetime.strptime(text, fmt).date(), 'D')
+        except ValueError:
+            continue
+    return None
+
+
+def load_holiday_file(path: str) -> np.ndarray:
+    """
+    Read the holidays of a local file
+
+    CSV/TXT files hold one date per line in the first column (other
+    columns, such as a description, and header lines are ignored). JSON
+    files hold a list of dates or a {date: description} object.
+
+    Args:
+        path: Holiday file
+
+    Returns:
+        Sorted datetime64[D] array
+    """
+    if path.lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = list(json.load(f))
+    else:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            delimiter = ';' if ';' in f.read(4096) else ','
+            f.seek(0)
+            entries = [row[0] for row in csv.reader(f, delimiter=delimiter) if row]
+    days = [day for day in map(_parse_holiday, entries) if day is not None]
+    return np.unique(np.array(days, dtype='datetime64[D]'))
+
+
+def available_holiday_sets(directory: str | None = DEFAULT_HOLIDAY_DIR) -> List[str]:
+    """Names of the holiday sets: the built-in national set and one per file in the directory"""
+    names = [NATIONAL_HOLIDAY_SET]
+    if directory and os.path.isdir(directory):
+        names.extend(sorted(
+            os.path.splitext(name)[0] for name in os.listdir(directory)
+            if name.lower().endswith(HOLIDAY_FILE_EXTENSIONS)
+            and os.path.splitext(name)[0] != NATIONAL_HOLIDAY_SET
+        ))
+    return names
+
+
+class BusinessCalendar:
+    """
+    Working days for SLA counts: a week mask plus holiday sets
+
+    Counts follow the legal convention: the start day is excluded and the
+    end day included, so a response on the next business day takes 1 day.
+    Whole columns are counted at once with np.busday_count.
+    """
+
+    def __init__(self, holiday_sets: List[str] | None = None, directory: str | None = DEFAULT_HOLIDAY_DIR,
+                 weekmask: str = '1111100', holidays: np.ndarray | None = None):
+        """
+        Args:
+            holiday_sets: Names of the holiday sets (see available_holiday_sets);
+                defaults to the national set
+            directory: Directory of the holiday files
+            weekmask: Working weekdays, Monday first
+            holidays: Extra holiday dates
+        """
+        self.holiday_sets = [NATIONAL_HOLIDAY_SET] if holiday_sets is None else list(holiday_sets)
+        self.weekmask = weekmask
+
+        loaded = [] if holidays is None else [np.asarray(holidays, dtype='datetime64[D]')]
+        for name in self.holiday_sets:
+            if name == NATIONAL_HOLIDAY_SET:
+                loaded.append(national_holidays())
+                continue
+            path = next((os.path.join(directory, name + extension) for extension in HOLIDAY_FILE_EXTENSIONS
+                         if directory and os.path.exists(os.path.join(directory, name + extension))), None)
+            if path is None:
+                raise ValueError(f"Conjunto de feriados não encontrado: {name}")
+            loaded.append(load_holiday_file(path))
+        self.holidays = np.unique(np.concatenate(loaded)) if loaded else np.array([], dtype='datetime64[D]')
+        self._calendar = np.busdaycalendar(weekmask=self.weekmask, holidays=self.holidays)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Picklable state (worker processes rebuild the numpy calendar)"""
+        return {'holiday_sets': self.holiday_sets, 'weekmask': self.weekmask, 'holidays': self.holidays}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._calendar = np.busdaycalendar(weekmask=self.weekmask, holidays=self.holidays)
+
+    @property
+    def key(self) -> str:
+        """Identity of the calendar, for cache keys and stored results"""
+        digest = hashlib.blake2b(self.weekmask.encode() + self.holidays.astype('int64').tobytes(), digest_size=8)
+        return digest.hexdigest()
+
+    def describe(self) -> Dict[str, Any]:
+        """JSON-compatible description, stored with saved analyses"""
+        return {'basis': 'business', 'holiday_sets': self.holiday_sets, 'weekmask': self.weekmask, 'key': self.key}
+
+    def count(self, start: pd.Series | np.ndarray | datetime, end: pd.Series | np.ndarray | datetime) -> np.ndarray:
+        """
+        Business days after start up to and including end (negative when end is earlier)
+
+        Args:
+            start: Start dates (datetime64 series/array or a single date)
+            end: End dates, aligned with start
+
+        Returns:
+            float64 array of day counts, NaN where either date is missing
+        """
+        start_days = np.asarray(pd.to_datetime(start), dtype='datetime64[D]')
+        end_days = np.asarray(pd.to_datetime(end), dtype='datetime64[D]')
+        start_days, end_days = np.broadcast_arrays(start_days, end_days)
+        missing = np.isnat(start_days) | np.isnat(end_days)
+
+        start_days, end_days = start_days[~missing], end_days[~missing]
+        # busday_count counts [begin, end) forwards but (end, begin] backwards,
+        # so only forward spans are shifted to exclude the start day
+        shift = (end_days >= start_days).astype('timedelta64[D]')
+        counts = np.full(missing.shape, np.nan)
+        counts[~missing] = np.busday_count(start_days + shift, end_days + shift, busdaycal=self._calendar)
+        return counts
+
+    def is_business_day(self, days: pd.Series | np.ndarray) -> np.ndarray:
+        """Whether each date is a working day"""
+        return np.is_busday(np.asarray(pd.to_datetime(days), dtype='datetime64[D]'), busdaycal=self._calendar)
+
+
+def calendar_from_description(description: Dict[str, Any] | None,
+                              directory: str | None = DEFAULT_HOLIDAY_DIR) -> BusinessCalendar | None:
+    """Rebuild the calendar saved with BusinessCalendar.describe (None for calendar days)"""
+    if not description or description.get('basis') != 'business':
+        return None
+    return BusinessCalendar(description['holiday_sets'], directory, description['weekmask'])
@@ -3,14 +3,40 @@ import numpy as np
 from datetime import datetime, date
 from typing import Dict, List, Tuple, Any
 import re
+from date_parser import DATE_FORMATS, parse_date_column
+from complaint_schema import apply_complaint_schema, categorical_from_codes
+from business_calendar import BusinessCalendar
+
+
+class _ColumnarFallback(Exception):
+    """Raised when a file cannot be processed column-wise and needs the row loop"""
+
+
+def _map_unique(col: pd.Series, func) -> pd.Series:
+    """Apply func once per distinct non-null value of col (missing values stay None)"""
+    codes, uniques = pd.factorize(col, use_na_sentinel=True)
+    mapped = np.empty(len(uniques) + 1, dtype=object)
+    mapped[:-1] = [func(value) for value in uniques]
+    mapped[-1] = None
+    return pd.Series(mapped[codes], index=col.index, dtype=object)
 
 class ComplaintProcessor:
     """Process complaint data and calculate SLA metrics"""
     
-    def __init__(self):
+    def __init__(self, calendar: BusinessCalendar | None = None):
+        """
+        Args:
+            calendar: SLA basis; None counts calendar days, a BusinessCalendar
+                counts business days for response times and days to deadline
+        """
         self.processing_date = datetime.now()
+        self.calendar = calendar
+        # Date format inferred for each date column, per processed file
+        self.date_format_report: Dict[str, Dict[str, Dict[str, Any]]] = {}
     
-    def process_file(self, df: pd.DataFrame, column_mapping: Dict[str, str], filename: str) -> Tuple[pd.DataFrame, List[str]]:
+    def process_file(self, df: pd.DataFrame, column_mapping: Dict[str, str], filename: str,
+                     engine: str = 'columnar', row_offset: int = 0,
+                     row_numbers: np.ndarray | None = None) -> Tuple[pd.DataFrame, List[str]]:
         """
         Process a single file's data according to business rules
         
@@ -18,12 +44,17 @@ class ComplaintProcessor:
             df: Raw dataframe from file
             column_mapping: Mapping of logical fields to actual column names
             filename: Name of the source file
+            engine: 'columnar' (whole-column operations) or 'rowwise'
+                (original per-row loop, kept as the reference implementation)
+            row_offset: Number of file rows before this dataframe, when the
+                file is processed in chunks (keeps source_row file-relative)
+            row_numbers: File row number of each dataframe row, when the rows
+                are a selection of the file (overrides row_offset)
             
         Returns:
             Tuple of (processed_dataframe, list_of_errors)
         """
         errors = []
-        processed_rows = []
         
         # Extract mapped columns
         try:
@@ -44,10 +75,31 @@ class ComplaintProcessor:
             errors.append(f"Colunas não encontradas em {filename}: {missing_cols}")
             return pd.DataFrame(), errors
         
+        if row_numbers is None:
+            row_numbers = np.arange(row_offset + 1, row_offset + len(df) + 1, dtype=np.int32)
+        
+        if engine == 'rowwise':
+            return self._process_file_rowwise(df, column_mapping, filename, row_numbers)
+        if engine != 'columnar':
+            raise ValueError(f"Unknown processing engine: {engine}")
+        
+        try:
+            return self._process_file_columnar(df, column_mapping, filename, row_numbers)
+        except _ColumnarFallback:
+            # Values the columnar engine cannot represent (e.g. mixed timezones)
+            # keep the per-row behaviour and its error messages
+            return self._process_file_rowwise(df, column_mapping, filename, row_numbers)
+    
+    def _process_file_rowwise(self, df: pd.DataFrame, column_mapping: Dict[str, str],
+                              filename: str, row_numbers: np.ndarray) -> Tuple[pd.DataFrame, List[str]]:
+        """Reference implementation: process the file one row at a time"""
+        errors = []
+        processed_rows = []
+        
         # Process each row
         for i, (row_idx, row) in enumerate(df.iterrows()):
             try:
-                row_num = i + 1
+                row_num = int(row_numbers[i])
                 processed_row = self._process_single_complaint(
                     row, column_mapping, filename, row_num
                 )
@@ -58,15 +110,162 @@ class ComplaintProcessor:
                     errors.append(f"Linha {row_num} em {filename}: dados críticos faltando")
                     
             except Exception as e:
-                row_num = i + 1
+                row_num = int(row_numbers[i])
                 errors.append(f"Erro na linha {row_num} em {filename}: {str(e)}")
         
         if processed_rows:
-            result_df = pd.DataFrame(processed_rows)
+            result_df = apply_complaint_schema(pd.DataFrame(processed_rows))
             return result_df, errors
         else:
             return pd.DataFrame(), errors
     
+    def _process_file_columnar(self, df: pd.DataFrame, column_mapping: Dict[str, str],
+                               filename: str, row_numbers: np.ndarray) -> Tuple[pd.DataFrame, List[str]]:
+        """Process the file with whole-column operations (same output as the row loop)"""
+        errors = []
+        n_rows = len(df)
+        
+        response_col = column_mapping.get('response_date')
+        if response_col and response_col in df.columns:
+            response_raw = df[response_col]
+        else:
+            response_raw = pd.Series([None] * n_rows, index=df.index, dtype=object)
+        
+        case_id = self._clean_case_id_column(df[column_mapping['id_case']])
+        opening_date, opening_report = self._parse_date_column(df[column_mapping['opening_date']])
+        deadline_date, deadline_report = self._parse_date_column(df[column_mapping['deadline_date']])
+        response_date, response_report = self._parse_date_column(response_raw, skip_falsy=True)
+        self._record_date_formats(filename, {
+            'opening_date': opening_report,
+            'deadline_date': deadline_report,
+            'response_date': response_report
+        })
+        company_name = self._normalize_company_name_column(df[column_mapping['company_name']])
+        
+        # Rows without ID or mandatory dates are reported and dropped
+        invalid = (case_id.isna() | opening_date.isna() | deadline_date.isna()).to_numpy()
+        for pos in np.flatnonzero(invalid):
+            errors.append(f"Linha {row_numbers[pos]} em {filename}: dados críticos faltando")
+        
+        valid = ~invalid
+        if not valid.any():
+            return pd.DataFrame(), errors
+        
+        source_row = np.asarray(row_numbers, dtype=np.int32)[valid]
+        case_id = case_id[valid].reset_index(drop=True)
+        company_name = company_name[valid].reset_index(drop=True)
+        opening_date = opening_date[valid].reset_index(drop=True)
+        deadline_date = deadline_date[valid].reset_index(drop=True)
+        response_date = response_date[valid].reset_index(drop=True)
+        
+        responded = response_date.notna().to_numpy()
+        complaint_status = categorical_from_codes(np.where(responded, 0, 1), 'complaint_status')
+        
+        # Response time and deadline compliance for responded complaints
+        response_time_days = self._day_count_column(opening_date, response_date)
+        deadline_status = categorical_from_codes(
+            np.where(~responded, -1, np.where((response_date <= deadline_date).to_numpy(), 0, 1)),
+            'deadline_status'
+        )
+        
+        # Days to deadline, pending status and alert level for non-responded
+        days_to_deadline, status_pending, alert_level = self._deadline_columns(deadline_date, responded)
+        
+        result_df = pd.DataFrame({
+            'case_id': case_id,
+            'company_name': company_name.astype('category'),
+            'opening_date': opening_date,
+            'deadline_date': deadline_date,
+            'response_date': response_date,
+            'complaint_status': complaint_status,
+            'response_time_days': response_time_days,
+            'deadline_status': deadline_status,
+            'days_to_deadline': days_to_deadline,
+            'status_pending': status_pending,
+            'alert_level': alert_level,
+            'source_file': pd.Categorical.from_codes(np.zeros(len(source_row), dtype=np.int8), categories=[filename]),
+            'source_row': source_row
+        })
+        return result_df, errors
+    
+    def _record_date_formats(self, filename: str, reports: Dict[str, Dict[str, Any]]):
+        """Store the date format reports of a file, adding up counts across chunks"""
+        if filename not in self.date_format_report:
+            self.date_format_report[filename] = reports
+            return
+        
+        for field, report in reports.items():
+            current = self.date_format_report[filename].setdefault(field, report)
+            if current is report:
+                continue
+            current['parsed_by_format'] += report['parsed_by_format']
+            current['fallback_values'] += report['fallback_values']
+            if current['format'] is None:
+                current['format'] = report['format']
+                current['candidates'] = report['candidates']
+
+    def refresh_deadline_fields(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Recompute days_to_deadline, status_pending and alert_level of the
+        open complaints for this processor's processing date
+
+        Responded complaints do not depend on the date and are not touched.
+
+        Args:
+            df: Processed complaints dataframe
+
+        Returns:
+            The same dataframe, updated in place
+        """
+        open_rows = (df['complaint_status'] == 'Não Respondida').to_numpy()
+        if not open_rows.any():
+            return df
+
+        days, status_pending, alert_level = self._deadline_columns(
+            df['deadline_date'][open_rows].reset_index(drop=True), np.zeros(int(open_rows.sum()), dtype=bool)
+        )
+        days_to_deadline = df['days_to_deadline'].to_numpy(dtype='float64', na_value=np.nan)
+        days_to_deadline[open_rows] = days.to_numpy(dtype='float64', na_value=np.nan)
+        df['days_to_deadline'] = pd.array(days_to_deadline, dtype='Int32')
+        for column, values in (('status_pending', status_pending), ('alert_level', alert_level)):
+            codes = df[column].cat.codes.to_numpy().copy()
+            codes[open_rows] = values.codes
+            df[column] = categorical_from_codes(codes, column)
+        return df
+
+    def _deadline_columns(self, deadline_date: pd.Series, responded: np.ndarray) -> Tuple[pd.Series, pd.Categorical, pd.Categorical]:
+        """Vectorized days_to_deadline, status_pending and alert_level"""
+        reference_day = pd.Timestamp(self.processing_date.date())
+        if self.calendar is None:
+            days = (deadline_date.dt.normalize() - reference_day).dt.days
+        else:
+            days = pd.Series(self.calendar.count(reference_day, deadline_date), index=deadline_date.index)
+        days_to_deadline = days.where(~responded).astype('Int32')
+        
+        pending = ~responded
+        overdue = pending & (days < 0).to_numpy()
+        on_time = pending & ~overdue
+        status_pending = categorical_from_codes(
+            np.select([on_time, overdue], [0, 1], default=-1),
+            'status_pending'
+        )
+        
+        # Codes follow ALERT_LEVEL_VALUES
+        days_values = days.to_numpy()
+        alert_level = categorical_from_codes(
+            np.select(
+                [overdue,
+                 on_time & (days_values <= 1),
+                 on_time & (days_values <= 3),
+                 on_time & (days_values == 4),
+                 on_time],
+                [4, 0, 1, 2, 3],
+                default=-1
+            ),
+            'alert_level'
+        )
+        return days_to_deadline, status_pending, alert_level
+    
     def _process_single_complaint(self, row: pd.Series, column_mapping: Dict[str, str], 
                                 filename: str, row_num: int) -> Dict[str, Any] | None:
         """Process a single complaint row"""
@@ -102,7 +301,7 @@ class ComplaintProcessor:
         # Calculate response time
         response_time_days = None
         if response_date and opening_date:
-            response_time_days = (response_date - opening_date).days
+            response_time_days = self._day_count(opening_date, response_date)
         
         # Determine deadline status for responded complaints
         deadline_status = None
@@ -118,7 +317,7 @@ class ComplaintProcessor:
         alert_level = None
         
         if complaint_status == "Não Respondida":
-            days_to_deadline = (deadline_date.date() - self.processing_date.date()).days
+            days_to_deadline = self._day_count(self.processing_date, deadline_date, whole_days=True)
             
             if days_to_deadline < 0:
                 status_pending = "Vencida e Não Respondida"
@@ -143,6 +342,20 @@ class ComplaintProcessor:
             'source_row': row_num
         }
     
+    def _day_count_column(self, start: pd.Series, end: pd.Series) -> pd.Series:
+        """Days from start to end for whole columns, in the processor's SLA basis"""
+        if self.calendar is None:
+            return (end - start).dt.days.astype('Int32')
+        return pd.Series(self.calendar.count(start, end), index=end.index).astype('Int32')
+    
+    def _day_count(self, start: datetime, end: datetime, whole_days: bool = False) -> int:
+        """Days from start to end for a single complaint, in the processor's SLA basis"""
+        if self.calendar is not None:
+            return int(self.calendar.count(pd.Timestamp(start), pd.Timestamp(end))[()])
+        if whole_days:
+            return (end.date() - start.date()).days
+        return (end - start).days
+    
     def _clean_case_id(self, case_id_raw: Any) -> str | None:
         """Clean and validate case ID"""
         if pd.isna(case_id_raw):
@@ -169,29 +382,7 @@ class ComplaintProcessor:
         if not date_str:
             return None
         
-        # Common date formats to try (Brazilian format first)
-        date_formats = [
-            '%d/%m/%Y %H:%M:%S',  # 26/05/2025 16:33:46
-            '%d/%m/%Y %H:%M',     # 26/05/2025 16:33
-            '%d/%m/%Y',           # 09/06/2025
-            '%d-%m-%Y %H:%M:%S',  # 26-05-2025 16:33:46
-            '%d-%m-%Y %H:%M',     # 26-05-2025 16:33
-            '%d-%m-%Y',           # 09-06-2025
-            '%d/%m/%y %H:%M:%S',  # 26/05/25 16:33:46
-            '%d/%m/%y %H:%M',     # 26/05/25 16:33
-            '%d/%m/%y',           # 09/06/25
-            '%Y-%m-%d %H:%M:%S',  # ISO format
-            '%Y-%m-%d %H:%M',
-            '%Y-%m-%d',
-            '%m/%d/%Y %H:%M:%S',  # US format
-            '%m/%d/%Y %H:%M',
-            '%m/%d/%Y',
-            '%Y/%m/%d %H:%M:%S',
-            '%Y/%m/%d %H:%M',
-            '%Y/%m/%d'
-        ]
-        
-        for fmt in date_formats:
+        for fmt in DATE_FORMATS:
             try:
                 return datetime.strptime(date_str, fmt)
             except ValueError:
@@ -217,6 +408,41 @@ class ComplaintProcessor:
         
         return company_name
     
+    def _clean_case_id_column(self, col: pd.Series) -> pd.Series:
+        """Column version of _clean_case_id (None for missing/blank IDs)"""
+        if pd.api.types.infer_dtype(col, skipna=True) in ('string', 'empty'):
+            cleaned = col.str.strip()
+        else:
+            cleaned = _map_unique(col, lambda value: str(value).strip())
+        cleaned = cleaned.astype(object)
+        return cleaned.where(col.notna() & (cleaned != ''), None)
+    
+    def _parse_date_column(self, col: pd.Series, skip_falsy: bool = False) -> Tuple[pd.Series, Dict[str, Any]]:
+        """
+        Column version of _parse_date using per-column format inference
+        
+        Args:
+            col: Raw date column
+            skip_falsy: Treat falsy cells (0, '', False) as missing, like the
+                optional response date in the row-by-row path
+            
+        Returns:
+            Tuple of (datetime64 series with NaT for unparseable values, format report)
+        """
+        try:
+            return parse_date_column(col, self._parse_date, skip_falsy=skip_falsy)
+        except (TypeError, ValueError) as e:
+            raise _ColumnarFallback() from e
+    
+    def _normalize_company_name_column(self, col: pd.Series) -> pd.Series:
+        """Column version of _normalize_company_name"""
+        if pd.api.types.infer_dtype(col, skipna=True) in ('string', 'empty'):
+            cleaned = col.str.strip()
+        else:
+            cleaned = _map_unique(col, lambda value: str(value).strip())
+        cleaned = cleaned.astype(object)
+        return cleaned.where(col.notna() & (cleaned != ''), "Não Identificada")
+    
     def _calculate_alert_level(self, days_to_deadline: int) -> str:
         """Calculate alert level based on days remaining"""
         if days_to_deadline <= 1:
@@ -259,15 +485,19 @@ class ComplaintProcessor:
         overdue_not_responded = len(df[df['status_pending'] == 'Vencida e Não Respondida'])
         
         # Alert level breakdown
-        alert_breakdown = df['alert_level'].value_counts().to_dict()
+        alert_counts = df['alert_level'].value_counts()
+        alert_breakdown = alert_counts[alert_counts > 0].to_dict()
         
         # Company breakdown
-        company_breakdown = df.groupby('company_name').agg({
+        company_breakdown = df.groupby('company_name', observed=True).agg({
             'case_id': 'count',
             'complaint_status': lambda x: (x == 'Respondida').sum(),
             'deadline_status': lambda x: (x == 'Dentro do Prazo').sum(),
             'response_time_days': 'mean'
-        }).round(2)
+        })
+        company_breakdown['response_time_days'] = company_breakdown['response_time_days'].astype(float)
+        company_breakdown.index = company_breakdown.index.astype(object)
+        company_breakdown = company_breakdown.round(2)
         
         company_breakdown.columns = ['Total', 'Respondidas', 'Dentro do Prazo', 'Tempo Médio (dias)']
         
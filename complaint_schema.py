@@ -0,0 +1,164 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List
+
+# Enumerated columns with a fixed set of values (category codes follow this order)
+COMPLAINT_STATUS_VALUES = ['Respondida', 'Não Respondida']
+DEADLINE_STATUS_VALUES = ['Dentro do Prazo', 'Fora do Prazo']
+STATUS_PENDING_VALUES = ['No Prazo, Não Respondida', 'Vencida e Não Respondida']
+ALERT_LEVEL_VALUES = [
+    'Em Cima do Prazo (≤1 dia)',
+    'Perto de Ultrapassar o Prazo (2-3 dias)',
+    'Atenção (4 dias)',
+    'Prazo Flexível (≥5 dias)',
+    'Vencida'
+]
+
+FIXED_CATEGORIES: Dict[str, List[str]] = {
+    'complaint_status': COMPLAINT_STATUS_VALUES,
+    'deadline_status': DEADLINE_STATUS_VALUES,
+    'status_pending': STATUS_PENDING_VALUES,
+    'alert_level': ALERT_LEVEL_VALUES
+}
+
+# Repeated text columns whose values depend on the data
+DATA_CATEGORY_COLUMNS = ['company_name', 'source_file']
+CATEGORICAL_COLUMNS = list(FIXED_CATEGORIES) + DATA_CATEGORY_COLUMNS
+
+DATE_COLUMNS = ['opening_date', 'deadline_date', 'response_date']
+DAY_COUNT_COLUMNS = ['response_time_days', 'days_to_deadline']
+
+COLUMN_ORDER = [
+    'case_id', 'company_name', 'opening_date', 'deadline_date', 'response_date',
+    'complaint_status', 'response_time_days', 'deadline_status', 'days_to_deadline',
+    'status_pending', 'alert_level', 'source_file', 'source_row'
+]
+
+
+def categorical_from_codes(codes: np.ndarray, column: str) -> pd.Categorical:
+    """Build an enumerated column from category codes (-1 for missing)"""
+    return pd.Categorical.from_codes(codes, categories=FIXED_CATEGORIES[column])
+
+
+def _naive_datetimes(values: pd.Series) -> pd.Series:
+    """
+    datetime64 column without timezone
+
+    The row-wise engine keeps the offsets parsed from ISO timestamps, so a
+    column can hold aware values with different offsets, or aware and
+    naive values together; those are converted to UTC and the zone is
+    dropped (naive values are taken as UTC).
+    """
+    try:
+        dates = pd.to_datetime(values)
+    except (ValueError, TypeError):
+        dates = pd.to_datetime(values, utc=True)
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert(None)
+    return dates
+
+
+def apply_complaint_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a processed complaints frame to the compact typed schema
+
+    Categoricals for the enumerated and repeated text columns, nullable
+    Int32 for day counts, datetime64 for dates and int32 for source_row.
+    Columns already in the target type are left untouched.
+
+    Args:
+        df: Processed complaints dataframe
+
+    Returns:
+        The same dataframe, converted in place
+    """
+    if df.empty:
+        return df
+
+    for column, categories in FIXED_CATEGORIES.items():
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = pd.Categorical(df[column], categories=categories)
+
+    for column in DATA_CATEGORY_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+
+    for column in DAY_COUNT_COLUMNS:
+        if column in df.columns and df[column].dtype != 'Int32':
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int32')
+
+    for column in DATE_COLUMNS:
+        if column in df.columns and not pd.api.types.is_datetime64_dtype(df[column].dtype):
+            df[column] = _naive_datetimes(df[column])
+
+    if 'source_row' in df.columns:
+        df['source_row'] = df['source_row'].astype('int32')
+
+    return df
+
+
+def concat_processed_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate processed frames keeping categorical columns categorical
+
+    pd.concat falls back to object columns when the categories of the
+    frames differ (e.g. different companies per file), so those columns
+    are rebuilt with the union of the categories.
+
+    Args:
+        frames: Processed complaints dataframes
+
+    Returns:
+        Combined dataframe with a fresh index
+    """
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+
+    combined = pd.concat(frames, ignore_index=True)
+    for column in CATEGORICAL_COLUMNS:
+        if column not in combined.columns or isinstance(combined[column].dtype, pd.CategoricalDtype):
+            continue
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            combined[column] = pd.api.types.union_categoricals(
+                [frame[column] for frame in frames],
+                sort_categories=column == 'company_name'
+            )
+    return combined
+
+
+def to_legacy_layout(df: pd.DataFrame) -> pd.DataFrame:
+    """Previous layout of the processed frame (object text columns, float64 day counts, int64 rows)"""
+    legacy = df.copy()
+    for column in CATEGORICAL_COLUMNS:
+        if column in legacy.columns:
+            legacy[column] = legacy[column].astype(object).where(legacy[column].notna(), None)
+    for column in DAY_COUNT_COLUMNS:
+        if column in legacy.columns:
+            legacy[column] = legacy[column].astype('float64')
+    if 'source_row' in legacy.columns:
+        legacy['source_row'] = legacy['source_row'].astype('int64')
+    return legacy
+
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare the memory used by the typed schema with the previous layout
+
+    Args:
+        df: Processed complaints dataframe in the typed schema
+
+    Returns:
+        Dataframe with bytes per column in both layouts and the reduction factor
+    """
+    typed_usage = df.memory_usage(deep=True, index=False)
+    legacy_usage = to_legacy_layout(df).memory_usage(deep=True, index=False)
+
+    report = pd.DataFrame({
+        'Tipo': df.dtypes.astype(str),
+        'Atual (bytes)': typed_usage,
+        'Anterior (bytes)': legacy_usage
+    })
+    report.loc['Total'] = ['', typed_usage.sum(), legacy_usage.sum()]
+    report['Redução (x)'] = (report['Anterior (bytes)'] / report['Atual (bytes)'].replace(0, np.nan)).round(1)
+    return report
@@ -0,0 +1,268 @@
+import pandas as pd
+import numpy as np
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, Tuple
+from business_calendar import BusinessCalendar, calendar_from_description
+from complaint_processor import ComplaintProcessor
+from complaint_schema import COLUMN_ORDER, concat_processed_frames
+from deduplication import complaint_keys
+from metrics_accumulator import MetricsAccumulator
+from snapshot import SNAPSHOT_EXTENSION, load_snapshot, save_snapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows: only runs within one process exclude each other
+    fcntl = None
+
+STORE_FORMAT_VERSION = 1
+STORE_FILENAME = f"complaints{SNAPSHOT_EXTENSION}"
+LOCK_FILENAME = 'complaints.lock'
+HASH_COLUMN = 'row_hash'
+
+LOGICAL_FIELDS = ['id_case', 'opening_date', 'deadline_date', 'response_date', 'company_name']
+
+
+def row_hashes(df: pd.DataFrame, column_mapping: Dict[str, str]) -> np.ndarray:
+    """
+    Hash of the mapped raw values of each row
+
+    Columns are taken in logical field order, so the hash does not depend
+    on the column names of the file, only on the values the processor reads.
+
+    Args:
+        df: Raw dataframe
+        column_mapping: Mapping of logical fields to actual column names
+
+    Returns:
+        uint64 hash per row
+    """
+    fields = {}
+    for field in LOGICAL_FIELDS:
+        column = column_mapping.get(field)
+        fields[field] = df[column].to_numpy() if column and column in df.columns else np.full(len(df), None)
+    return pd.util.hash_pandas_object(pd.DataFrame(fields), index=False).to_numpy()
+
+
+class ComplaintStore:
+    """
+    Processed complaints kept on disk between runs, one row per (case_id, company_name)
+
+    Each stored row carries the hash of the raw values it came from. On a
+    new run only rows with an unknown hash are parsed and classified; they
+    replace the stored version of the same complaint. Metrics of responded
+    complaints, which no longer change, are kept as a running accumulator,
+    and only open complaints are re-evaluated for the processing date.
+
+    The store is a snapshot file (see snapshot.py) with the extra row_hash
+    column. All rows share the SLA basis (calendar) of the first update.
+
+    Writers take the store's lock (see locked) around load → update →
+    save, so two runs updating the same store (background jobs, or the
+    app and the batch runner) cannot drop each other's rows.
+    """
+
+    # One lock per store directory for the threads of this process; the
+    # lock file covers other processes
+    _thread_locks: Dict[str, threading.Lock] = {}
+    _thread_locks_guard = threading.Lock()
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Directory of the store file
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, STORE_FILENAME)
+        self.lock_path = os.path.join(directory, LOCK_FILENAME)
+        self.frame: pd.DataFrame | None = None
+        self.closed = MetricsAccumulator()
+        self.updated_at: str | None = None
+        self.calendar: BusinessCalendar | None = None
+        self._hash_index: pd.Index | None = None
+        self._key_index: pd.Index | None = None
+
+    @contextmanager
+    def locked(self) -> Iterator['ComplaintStore']:
+        """
+        Hold the store exclusively, reloaded from disk
+
+        Usage:
+            with store.locked():
+                store.update(...)
+                store.save()
+        """
+        directory = os.path.abspath(self.directory)
+        with ComplaintStore._thread_locks_guard:
+            thread_lock = ComplaintStore._thread_locks.setdefault(directory, threading.Lock())
+        os.makedirs(self.directory, exist_ok=True)
+        with thread_lock, open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Another writer may have saved since this store was loaded
+                yield self.load()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self) -> 'ComplaintStore':
+        """Read the store file, or start empty when there is none"""
+        self.frame = pd.DataFrame()
+        self.closed = MetricsAccumulator()
+        self._hash_index = self._key_index = None
+        if os.path.exists(self.path):
+            frame, _, info = load_snapshot(self.path)
+            store_info = info['extra'].get('store', {})
+            if store_info.get('version') != STORE_FORMAT_VERSION:
+                raise ValueError(f"Versão do histórico não suportada: {store_info.get('version')}")
+            self.frame = frame
+            self.closed = MetricsAccumulator.from_state(store_info['closed_metrics'])
+            self.updated_at = store_info.get('updated_at')
+            self.calendar = calendar_from_description(info['extra'].get('calendar'))
+        return self
+
+    def __len__(self) -> int:
+        """Number of stored complaints"""
+        return 0 if self.frame is None else len(self.frame)
+
+    def _loaded(self) -> pd.DataFrame:
+        """Stored frame, loading the file on first use"""
+        if self.frame is None:
+            self.load()
+        return self.frame
+
+    def update(self, raw_df: pd.DataFrame, filename: str, column_mapping: Dict[str, str],
+               processor: ComplaintProcessor | None = None) -> Dict[str, Any]:
+        """
+        Add a raw file to the store, processing only its new or changed rows
+
+        Args:
+            raw_df: Raw dataframe of the file
+            filename: Name of the source file
+            column_mapping: Mapping of logical fields to actual column names
+            processor: Processor to use (its processing_date classifies the new rows)
+
+        Returns:
+            Dictionary with rows_read, unchanged, inserted, changed, errors and date_formats
+        """
+        stored = self._loaded()
+        processor = processor or ComplaintProcessor(self.calendar)
+        calendar_key = processor.calendar.key if processor.calendar is not None else None
+        if not stored.empty and calendar_key != (self.calendar.key if self.calendar is not None else None):
+            raise ValueError("O histórico foi calculado com outra base de SLA (dias corridos/úteis ou feriados); "
+                             "limpe o histórico para trocar a base")
+        self.calendar = processor.calendar
+
+        hashes = row_hashes(raw_df, column_mapping)
+        if self._hash_index is None:
+            self._hash_index = pd.Index(stored[HASH_COLUMN] if not stored.empty else [], dtype='uint64')
+        known = pd.Index(hashes).isin(self._hash_index)
+        pending = np.flatnonzero(~known)
+
+        summary = {
+            'name': filename,
+            'rows_read': len(raw_df),
+            'unchanged': int(known.sum()),
+            'inserted': 0,
+            'changed': 0,
+            'errors': [],
+            'date_formats': {}
+        }
+        if len(pending) == 0:
+            return summary
+
+        processed, errors = processor.process_file(raw_df.iloc[pending], column_mapping, filename,
+                                                   row_numbers=pending + 1)
+        summary['errors'] = errors
+        summary['date_formats'] = processor.date_format_report.get(filename, {})
+        if processed.empty:
+            return summary
+
+        processed[HASH_COLUMN] = hashes[processed['source_row'].to_numpy() - 1]
+        keys = complaint_keys(processed)
+        # The last row of a complaint within the file wins
+        last = ~pd.Index(keys).duplicated(keep='last')
+        if not last.all():
+            processed = processed[last].reset_index(drop=True)
+            keys = keys[last]
+
+        if self._key_index is None:
+            self._key_index = pd.Index(complaint_keys(stored) if not stored.empty else [], dtype=object)
+        positions = self._key_index.get_indexer(keys)
+        replaced = positions[positions >= 0]
+        summary['changed'] = len(replaced)
+        summary['inserted'] = len(processed) - len(replaced)
+
+        # Responded rows enter the running accumulator; replaced ones leave it
+        responded = processed['complaint_status'] == 'Respondida'
+        self.closed.merge(MetricsAccumulator.from_frame(processed[responded]))
+        if len(replaced):
+            old = stored.iloc[replaced]
+            self.closed.subtract(MetricsAccumulator.from_frame(old[old['complaint_status'] == 'Respondida']))
+            keep = np.ones(len(stored), dtype=bool)
+            keep[replaced] = False
+            stored = stored[keep].reset_index(drop=True)
+            key_index = self._key_index[keep]
+        else:
+            key_index = self._key_index
+
+        self.frame = concat_processed_frames([stored, processed])
+        self._key_index = key_index.append(pd.Index(keys, dtype=object))
+        self._hash_index = pd.Index(self.frame[HASH_COLUMN], dtype='uint64')
+        return summary
+
+    def result(self, processing_date: datetime) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Stored complaints and metrics for a processing date
+
+        Only the open complaints are re-evaluated (days to deadline, pending
+        status, alert level) and counted again; responded ones come from the
+        running accumulator.
+
+        Args:
+            processing_date: Reference date of the analysis
+
+        Returns:
+            Tuple of (processed dataframe, metrics)
+        """
+        stored = self._loaded()
+        if stored.empty:
+            return pd.DataFrame(), MetricsAccumulator().result(processing_date)
+
+        processor = ComplaintProcessor(self.calendar)
+        processor.processing_date = processing_date
+        processor.refresh_deadline_fields(stored)
+
+        open_rows = stored['complaint_status'] != 'Respondida'
+        accumulator = MetricsAccumulator().merge(self.closed).merge(MetricsAccumulator.from_frame(stored[open_rows]))
+        df = stored[[column for column in COLUMN_ORDER if column in stored.columns]]
+        return df, accumulator.result(processing_date)
+
+    def save(self):
+        """Write the store file (replacing the previous one atomically)"""
+        stored = self._loaded()
+        self.updated_at = datetime.now().isoformat()
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = self.path + '.tmp'
+        # Stored as a regular snapshot, with the metrics of the day it was saved
+        _, metrics = self.result(datetime.now())
+        save_snapshot(stored, metrics, temporary,
+                      extra_metadata={'store': {
+                          'version': STORE_FORMAT_VERSION,
+                          'updated_at': self.updated_at,
+                          'closed_metrics': self.closed.to_state()
+                      }, 'calendar': self.calendar.describe() if self.calendar is not None else None})
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        """Delete the store file and start empty"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.frame = pd.DataFrame()
+        self.closed = MetricsAccumulator()
+        self.updated_at = None
+        self.calendar = None
+        self._hash_index = self._key_index = None
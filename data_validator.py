@@ -2,6 +2,12 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Tuple, Any
 import os
+from complaint_processor import ComplaintProcessor
+from date_parser import parse_date_column
+from upload_session import UploadSession
+
+CRITICAL_FIELDS = ['id_case', 'opening_date', 'deadline_date', 'company_name']
+DATE_FIELDS = ['opening_date', 'deadline_date', 'response_date']
 
 class DataValidator:
     """Validate uploaded files and data quality"""
@@ -9,13 +15,15 @@ class DataValidator:
     def __init__(self):
         self.supported_extensions = ['.xlsx', '.xls', '.csv', '.ods']
         self.max_file_size = 50 * 1024 * 1024  # 50MB
+        self.max_failure_samples = 5  # Offending rows listed per date column
     
-    def validate_files(self, uploaded_files: List[Any]) -> Tuple[List[Dict], List[str]]:
+    def validate_files(self, uploaded_files: List[Any], session: UploadSession | None = None) -> Tuple[List[Dict], List[str]]:
         """
         Validate uploaded files for basic requirements
         
         Args:
             uploaded_files: List of uploaded file objects
+            session: Upload session whose open reports are reused (None reads each file)
             
         Returns:
             Tuple of (valid_files_info, list_of_errors)
@@ -28,7 +36,7 @@ class DataValidator:
             return valid_files, errors
         
         for file in uploaded_files:
-            file_info = self._validate_single_file(file)
+            file_info = self._validate_single_file(file, session)
             
             if file_info['valid']:
                 valid_files.append(file_info)
@@ -37,7 +45,7 @@ class DataValidator:
         
         return valid_files, errors
     
-    def _validate_single_file(self, file) -> Dict[str, Any]:
+    def _validate_single_file(self, file, session: UploadSession | None = None) -> Dict[str, Any]:
         """Validate a single uploaded file"""
         file_info = {
             'file': file,
@@ -75,7 +83,9 @@ class DataValidator:
             
             # Try to read file structure
             try:
-                if file_extension == '.csv':
+                if session is not None:
+                    session.report(file).preview(preview_rows=1)
+                elif file_extension == '.csv':
                     # Test CSV reading
                     pd.read_csv(file, nrows=1)
                 else:
@@ -132,6 +142,10 @@ class DataValidator:
         """
         Analyze data quality issues in the dataframe
         
+        Column statistics come from one scan of the mapped columns, and every
+        value of the mapped date columns is parsed with the processor's date
+        parser, so the counts match the rows the processor will drop.
+        
         Args:
             df: Dataframe to analyze
             column_mapping: Column mapping configuration
@@ -144,81 +158,119 @@ class DataValidator:
             'issues': [],
             'column_stats': {},
             'date_parsing_issues': [],
+            'date_parse_stats': {},
             'missing_data_summary': {}
         }
         
-        # Analyze each mapped column
-        for logical_name, column_name in column_mapping.items():
-            if column_name and column_name in df.columns:
-                col_data = df[column_name]
-                
-                # Basic statistics
-                stats = {
-                    'total_values': len(col_data),
-                    'null_count': col_data.isnull().sum(),
-                    'empty_strings': (col_data == '').sum() if col_data.dtype == 'object' else 0,
-                    'unique_values': col_data.nunique()
-                }
-                
-                stats['valid_percentage'] = ((stats['total_values'] - stats['null_count'] - stats['empty_strings']) 
-                                           / stats['total_values'] * 100) if stats['total_values'] > 0 else 0
-                
-                quality_report['column_stats'][logical_name] = stats
-                
-                # Check for critical missing data
-                if logical_name in ['id_case', 'opening_date', 'deadline_date', 'company_name']:
-                    missing_count = stats['null_count'] + stats['empty_strings']
-                    if missing_count > 0:
-                        quality_report['issues'].append(
-                            f"Coluna crítica '{column_name}' ({logical_name}) tem {missing_count} valores faltantes"
-                        )
-                
-                # Date column validation
-                if logical_name in ['opening_date', 'deadline_date', 'response_date']:
-                    date_issues = self._analyze_date_column(col_data, column_name)
-                    if date_issues:
-                        quality_report['date_parsing_issues'].extend(date_issues)
+        mapped = {logical_name: column_name for logical_name, column_name in column_mapping.items()
+                  if column_name and column_name in df.columns}
+        if not mapped:
+            return quality_report
         
-        # Summary of rows with missing critical data
-        critical_columns = [column_mapping.get(name) for name in ['id_case', 'opening_date', 'deadline_date', 'company_name'] 
-                           if column_mapping.get(name)]
+        # One factorization per mapped column gives missing, blank and distinct values
+        columns = list(dict.fromkeys(mapped.values()))
+        null_counts, blank_counts, unique_counts, missing_mask = {}, {}, {}, {}
+        for column_name in columns:
+            codes, uniques = pd.factorize(df[column_name], use_na_sentinel=True)
+            blank_unique = np.array([isinstance(value, str) and not value.strip() for value in uniques] + [False])
+            null_counts[column_name] = int((codes < 0).sum())
+            blank_counts[column_name] = int(blank_unique[codes].sum())
+            unique_counts[column_name] = len(uniques)
+            missing_mask[column_name] = (codes < 0) | blank_unique[codes]
+        
+        # Rows the processor drops: missing ID or unparseable mandatory dates
+        dropped = np.zeros(len(df), dtype=bool)
+        
+        for logical_name, column_name in mapped.items():
+            stats = {
+                'total_values': len(df),
+                'null_count': int(null_counts[column_name]),
+                'empty_strings': int(blank_counts[column_name]),
+                'unique_values': int(unique_counts[column_name])
+            }
+            stats['valid_percentage'] = ((stats['total_values'] - stats['null_count'] - stats['empty_strings'])
+                                       / stats['total_values'] * 100) if stats['total_values'] > 0 else 0
+            quality_report['column_stats'][logical_name] = stats
+            
+            # Check for critical missing data
+            if logical_name in CRITICAL_FIELDS:
+                missing_count = stats['null_count'] + stats['empty_strings']
+                if missing_count > 0:
+                    quality_report['issues'].append(
+                        f"Coluna crítica '{column_name}' ({logical_name}) tem {missing_count} valores faltantes"
+                    )
+            
+            # Date column validation
+            if logical_name in DATE_FIELDS:
+                failed, date_stats = self._analyze_date_column(df[column_name], column_name, missing_mask[column_name],
+                                                               skip_falsy=logical_name == 'response_date')
+                quality_report['date_parse_stats'][logical_name] = date_stats
+                if date_stats['failed']:
+                    samples = ', '.join(f"linha {sample['row']}: '{sample['value']}'" for sample in date_stats['sample_failures'])
+                    quality_report['date_parsing_issues'].append(
+                        f"Coluna '{column_name}': {date_stats['failed']}/{date_stats['values']} valores "
+                        f"não puderam ser interpretados como datas ({samples})"
+                    )
+                if logical_name != 'response_date':
+                    dropped |= failed | missing_mask[column_name]
+            elif logical_name == 'id_case':
+                dropped |= missing_mask[column_name]
         
+        # Summary of rows with missing critical data
+        critical_columns = [mapped[name] for name in CRITICAL_FIELDS if name in mapped]
         if critical_columns:
-            missing_critical = df[critical_columns].isnull().any(axis=1).sum()
+            missing_critical = int(np.logical_or.reduce([missing_mask[column_name] for column_name in critical_columns]).sum())
             quality_report['missing_data_summary']['rows_with_missing_critical_data'] = missing_critical
-            quality_report['missing_data_summary']['processable_rows'] = len(df) - missing_critical
+            quality_report['missing_data_summary']['rows_dropped_by_processing'] = int(dropped.sum())
+            quality_report['missing_data_summary']['processable_rows'] = len(df) - int(dropped.sum())
         
         return quality_report
     
-    def _analyze_date_column(self, col_data: pd.Series, column_name: str) -> List[str]:
-        """Analyze date column for parsing issues"""
-        issues = []
-        
-        # Sample non-null values for date format detection
-        non_null_data = col_data.dropna()
-        if non_null_data.empty:
-            return issues
-        
-        # Try to parse a sample of dates
-        sample_size = min(10, len(non_null_data))
-        sample_data = non_null_data.head(sample_size)
+    def _analyze_date_column(self, col_data: pd.Series, column_name: str, missing: np.ndarray,
+                             skip_falsy: bool = False) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Parse every value of a date column and count the failures
         
-        parsing_failures = 0
-        for value in sample_data:
-            try:
-                pd.to_datetime(value)
-            except:
-                parsing_failures += 1
-        
-        if parsing_failures > 0:
-            issues.append(
-                f"Coluna '{column_name}': {parsing_failures}/{sample_size} valores de amostra "
-                f"não puderam ser interpretados como datas"
-            )
+        Args:
+            col_data: Raw date column
+            column_name: Name of the column in the file
+            missing: Mask of null/blank cells (not counted as failures)
+            skip_falsy: Treat falsy cells as missing, like the processor does
+                for the optional response date
+            
+        Returns:
+            Tuple of (mask of present values that could not be parsed, parse statistics)
+        """
+        parser = ComplaintProcessor()
+        try:
+            parsed, report = parse_date_column(col_data, parser._parse_date, skip_falsy=skip_falsy)
+            parsed_mask = parsed.notna().to_numpy()
+        except (TypeError, ValueError):
+            # Values the bulk parser rejects (e.g. mixed timezones) are checked one by one
+            codes, uniques = pd.factorize(col_data, use_na_sentinel=True)
+            parsed_unique = np.array([parser._parse_date(value) is not None for value in uniques] + [False])
+            parsed_mask = parsed_unique[codes]
+            report = {'format': None, 'candidates': []}
         
-        return issues
+        if skip_falsy:
+            missing = missing | ~col_data.astype(bool).to_numpy()
+        failed = ~missing & ~parsed_mask
+        failed_positions = np.flatnonzero(failed)
+        stats = {
+            'values': int((~missing).sum()),
+            'parsed': int((~missing & parsed_mask).sum()),
+            'failed': len(failed_positions),
+            'format': report['format'],
+            'candidates': report['candidates'],
+            'sample_failures': [
+                {'row': int(pos) + 1, 'value': str(col_data.iloc[pos])}
+                for pos in failed_positions[:self.max_failure_samples]
+            ]
+        }
+        return failed, stats
     
-    def get_file_preview(self, file, header_row: int = 1, preview_rows: int = 5) -> Tuple[pd.DataFrame, List[str]]:
+    def get_file_preview(self, file, header_row: int = 1, preview_rows: int = 5,
+                         session: UploadSession | None = None) -> Tuple[pd.DataFrame, List[str]]:
         """
         Get a preview of the file data for column mapping
         
@@ -226,6 +278,7 @@ class DataValidator:
             file: Uploaded file object
             header_row: Row number where headers are located (1-based)
             preview_rows: Number of data rows to preview
+            session: Upload session whose open reports are reused (None reads the file)
             
         Returns:
             Tuple of (preview_dataframe, list_of_errors)
@@ -233,6 +286,9 @@ class DataValidator:
         errors = []
         
         try:
+            if session is not None:
+                return session.report(file).preview(header_row, preview_rows), errors
+            
             file.seek(0)
             
             if file.name.endswith('.csv'):
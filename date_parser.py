@@ -0,0 +1,206 @@
+import pandas as pd
+import numpy as np
+import re
+from datetime import datetime, date
+from typing import Any, Callable, Dict, List, Tuple
+
+# Common date formats to try (Brazilian format first). The order is the
+# parsing priority: a value is read with the first format that accepts it.
+DATE_FORMATS = [
+    '%d/%m/%Y %H:%M:%S',  # 26/05/2025 16:33:46
+    '%d/%m/%Y %H:%M',     # 26/05/2025 16:33
+    '%d/%m/%Y',           # 09/06/2025
+    '%d-%m-%Y %H:%M:%S',  # 26-05-2025 16:33:46
+    '%d-%m-%Y %H:%M',     # 26-05-2025 16:33
+    '%d-%m-%Y',           # 09-06-2025
+    '%d/%m/%y %H:%M:%S',  # 26/05/25 16:33:46
+    '%d/%m/%y %H:%M',     # 26/05/25 16:33
+    '%d/%m/%y',           # 09/06/25
+    '%Y-%m-%d %H:%M:%S',  # ISO format
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+    '%m/%d/%Y %H:%M:%S',  # US format
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y/%m/%d %H:%M',
+    '%Y/%m/%d'
+]
+
+# pandas rolls a 60/61 seconds field over to the next minute while strptime
+# rejects it, so such strings are left to the fallback parser
+_LEAP_SECOND = re.compile(r':6[01]$')
+
+DEFAULT_SAMPLE_SIZE = 200
+DEFAULT_MAX_CANDIDATES = 3
+
+
+def _format_skeleton(fmt: str) -> str:
+    """Shape of the strings a format accepts (4-digit year vs 1-2 digit fields)"""
+    return re.sub(r'%[dmyHMS]', 'n', fmt.replace('%Y', 'Y'))
+
+
+def _conflicting_formats(formats: List[str]) -> Dict[str, List[str]]:
+    """Map each format to the higher-priority formats that can accept the same strings"""
+    conflicts = {}
+    for i, fmt in enumerate(formats):
+        skeleton = _format_skeleton(fmt)
+        conflicts[fmt] = [earlier for earlier in formats[:i] if _format_skeleton(earlier) == skeleton]
+    return conflicts
+
+
+_CONFLICTS = _conflicting_formats(DATE_FORMATS)
+
+
+def _parse_with_format(values: np.ndarray, fmt: str) -> np.ndarray:
+    """Parse an array of strings with one format (NaT where it does not apply)"""
+    parsed = pd.to_datetime(values, format=fmt, errors='coerce')
+    return np.asarray(parsed, dtype='datetime64[ns]')
+
+
+def infer_date_formats(values: np.ndarray, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                       max_candidates: int = DEFAULT_MAX_CANDIDATES) -> List[str]:
+    """
+    Infer the dominant date formats of a set of stripped date strings
+
+    Args:
+        values: Array of non-empty date strings
+        sample_size: Number of evenly spaced values to inspect
+        max_candidates: Maximum number of formats to return
+
+    Returns:
+        Formats ranked by how many sampled values they would parse
+    """
+    if len(values) == 0:
+        return []
+
+    if len(values) > sample_size:
+        positions = np.linspace(0, len(values) - 1, sample_size).astype(int)
+        sample = values[positions]
+    else:
+        sample = values
+
+    # Credit each sampled value to the first format that accepts it
+    unclaimed = np.ones(len(sample), dtype=bool)
+    wins = {}
+    for fmt in DATE_FORMATS:
+        if not unclaimed.any():
+            break
+        matched = ~np.isnat(_parse_with_format(sample[unclaimed], fmt))
+        if matched.any():
+            wins[fmt] = int(matched.sum())
+            claimed_positions = np.flatnonzero(unclaimed)[matched]
+            unclaimed[claimed_positions] = False
+
+    ranked = sorted(wins, key=lambda fmt: (-wins[fmt], DATE_FORMATS.index(fmt)))
+    return ranked[:max_candidates]
+
+
+def parse_date_column(col: pd.Series, fallback: Callable[[Any], Any],
+                      skip_falsy: bool = False,
+                      sample_size: int = DEFAULT_SAMPLE_SIZE,
+                      max_candidates: int = DEFAULT_MAX_CANDIDATES) -> Tuple[pd.Series, Dict[str, Any]]:
+    """
+    Parse a whole date column with per-column format inference
+
+    Each distinct value is parsed once. String values are parsed in bulk with
+    the formats inferred from a sample, honouring the DATE_FORMATS priority;
+    whatever those formats do not accept goes through the fallback parser.
+
+    Args:
+        col: Raw date column
+        fallback: Single-value parser used for leftover values
+        skip_falsy: Treat falsy cells (0, '', False) as missing
+        sample_size: Number of values sampled for format inference
+        max_candidates: Maximum number of formats applied in bulk
+
+    Returns:
+        Tuple of (datetime64 series with NaT for unparseable values, format report)
+    """
+    report = {
+        'format': None,
+        'candidates': [],
+        'parsed_by_format': 0,
+        'fallback_values': 0
+    }
+
+    if pd.api.types.is_datetime64_any_dtype(col.dtype):
+        if getattr(col.dtype, 'tz', None) is not None:
+            raise ValueError(f"Coluna com fuso horário não suportada: {col.dtype}")
+        report['format'] = 'datetime'
+        report['parsed_by_format'] = int(col.notna().sum())
+        return col.astype('datetime64[ns]'), report
+
+    codes, uniques = pd.factorize(col, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    row_counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+
+    parsed = np.full(len(uniques), np.datetime64('NaT'), dtype='datetime64[ns]')
+    fallback_positions = []
+    string_positions = []
+    string_values = []
+
+    for pos, value in enumerate(uniques):
+        if skip_falsy and not value:
+            continue
+        if isinstance(value, str):
+            stripped = value.strip()
+            if stripped and _LEAP_SECOND.search(stripped):
+                fallback_positions.append(pos)
+            elif stripped:
+                string_positions.append(pos)
+                string_values.append(stripped)
+        elif isinstance(value, datetime) and value.tzinfo is None:
+            parsed[pos] = np.datetime64(pd.Timestamp(value), 'ns')
+        elif isinstance(value, date) and not isinstance(value, datetime):
+            parsed[pos] = np.datetime64(datetime.combine(value, datetime.min.time()), 'ns')
+        else:
+            fallback_positions.append(pos)
+
+    string_positions = np.asarray(string_positions, dtype=np.intp)
+    string_values = np.asarray(string_values, dtype=object)
+
+    candidates = infer_date_formats(string_values, sample_size, max_candidates)
+    report['candidates'] = candidates
+    report['format'] = candidates[0] if candidates else None
+
+    # Apply candidates in priority order so that a value matching several of
+    # them gets the same format the sequential strptime chain would pick
+    remaining = np.ones(len(string_values), dtype=bool)
+    applied = set()
+    for fmt in sorted(candidates, key=DATE_FORMATS.index):
+        if not remaining.any():
+            break
+        idx = np.flatnonzero(remaining)
+        result = _parse_with_format(string_values[idx], fmt)
+        matched = ~np.isnat(result)
+        idx, result = idx[matched], result[matched]
+
+        for earlier in _CONFLICTS[fmt]:
+            if earlier in applied or len(idx) == 0:
+                continue
+            override = _parse_with_format(string_values[idx], earlier)
+            overridden = ~np.isnat(override)
+            result[overridden] = override[overridden]
+
+        parsed[string_positions[idx]] = result
+        remaining[idx] = False
+        applied.add(fmt)
+
+    report['parsed_by_format'] = int(row_counts[string_positions[~remaining]].sum())
+    fallback_positions.extend(string_positions[remaining].tolist())
+
+    # Leftovers go through the full single-value chain
+    if fallback_positions:
+        fallback_positions = np.asarray(fallback_positions, dtype=np.intp)
+        report['fallback_values'] = int(row_counts[fallback_positions].sum())
+        fallback_results = [fallback(uniques[pos]) for pos in fallback_positions]
+        converted = pd.to_datetime(pd.Series(fallback_results, dtype=object), errors='raise')
+        if getattr(converted.dtype, 'tz', None) is not None:
+            raise ValueError("Datas com fuso horário não suportadas no processamento por colunas")
+        parsed[fallback_positions] = converted.to_numpy(dtype='datetime64[ns]')
+
+    values = np.full(len(col), np.datetime64('NaT'), dtype='datetime64[ns]')
+    has_value = codes >= 0
+    values[has_value] = parsed[codes[has_value]]
+    return pd.Series(values, index=col.index), report
@@ -0,0 +1,154 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Tuple
+from complaint_schema import concat_processed_frames
+
+# Which copy of a complaint is kept when the same (case_id, company_name)
+# appears more than once; ties always go to the later file/row
+DEDUP_POLICIES: Dict[str, str] = {
+    'latest_file': 'Arquivo mais recente (ordem de upload)',
+    'with_response': 'Linha com data de resposta',
+    'latest_opening': 'Data de abertura mais recente'
+}
+DEFAULT_DEDUP_POLICY = 'latest_file'
+
+KEY_SEPARATOR = '\x1f'
+
+
+def complaint_keys(df: pd.DataFrame) -> np.ndarray:
+    """
+    Deduplication key of each row: case_id and company_name joined by a separator
+
+    IDs are trimmed, and integral IDs that went through a float column
+    ('2025000.0', as in histories saved before IDs were read as text)
+    lose the '.0', so the same complaint has one key whatever the reader.
+    """
+    case_id = df['case_id'].astype(str).str.strip().str.replace(r'^(\d+)\.0$', r'\1', regex=True)
+    company = df['company_name'].astype(object).where(df['company_name'].notna(), '')
+    return (case_id + KEY_SEPARATOR + company.astype(str)).to_numpy(dtype=object)
+
+
+class DedupIndex:
+    """
+    Hash index of the complaints kept so far, fed one frame at a time
+
+    Frames (file results or chunks) are added in order. Each key keeps a
+    single winning row, looked up through a hash table, so duplicates are
+    resolved incrementally without sorting the combined data.
+    """
+
+    def __init__(self, policy: str = DEFAULT_DEDUP_POLICY):
+        """
+        Args:
+            policy: One of DEDUP_POLICIES
+        """
+        if policy not in DEDUP_POLICIES:
+            raise ValueError(f"Unknown deduplication policy: {policy}")
+        self.policy = policy
+        self.collapsed = 0
+        self._keys = pd.Index([], dtype=object)
+        self._frame = np.empty(0, dtype=np.int32)
+        self._row = np.empty(0, dtype=np.int64)
+        self._score = np.empty(0, dtype=np.int64)
+        self._frame_sizes: List[int] = []
+
+    def _scores(self, df: pd.DataFrame) -> np.ndarray:
+        """Rank of each row under the policy (higher wins)"""
+        if self.policy == 'with_response':
+            return df['response_date'].notna().to_numpy(dtype=np.int64)
+        if self.policy == 'latest_opening':
+            return df['opening_date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        # latest_file: every row ranks the same, so the later one wins
+        return np.zeros(len(df), dtype=np.int64)
+
+    def add(self, df: pd.DataFrame) -> int:
+        """
+        Add a processed frame to the index
+
+        Args:
+            df: Processed complaints dataframe (a file result or a chunk)
+
+        Returns:
+            Number of the frame, in the order frames were added
+        """
+        frame_number = len(self._frame_sizes)
+        self._frame_sizes.append(len(df))
+        if df.empty:
+            return frame_number
+
+        keys = complaint_keys(df)
+        scores = self._scores(df)
+
+        # Best row per key within the frame: highest score, last on ties
+        best = pd.Series(scores).groupby(keys, sort=False).transform('max').to_numpy()
+        candidates = np.flatnonzero(scores == best)
+        candidates = candidates[~pd.Index(keys[candidates]).duplicated(keep='last')]
+        self.collapsed += len(df) - len(candidates)
+        keys, scores = keys[candidates], scores[candidates]
+
+        # Against the rows kept from earlier frames
+        positions = self._keys.get_indexer(keys)
+        seen = positions >= 0
+        self.collapsed += int(seen.sum())
+        replaces = seen.copy()
+        replaces[seen] = scores[seen] >= self._score[positions[seen]]
+        slots = positions[replaces]
+        self._frame[slots] = frame_number
+        self._row[slots] = candidates[replaces]
+        self._score[slots] = scores[replaces]
+
+        new = ~seen
+        self._keys = self._keys.append(pd.Index(keys[new], dtype=object))
+        self._frame = np.concatenate([self._frame, np.full(int(new.sum()), frame_number, dtype=np.int32)])
+        self._row = np.concatenate([self._row, candidates[new]])
+        self._score = np.concatenate([self._score, scores[new]])
+        return frame_number
+
+    def __len__(self) -> int:
+        """Number of distinct complaints"""
+        return len(self._keys)
+
+    def keep_masks(self) -> List[np.ndarray]:
+        """Rows to keep in each added frame (boolean mask per frame, in add order)"""
+        offsets = np.concatenate([[0], np.cumsum(self._frame_sizes, dtype=np.int64)])
+        keep = np.zeros(offsets[-1], dtype=bool)
+        keep[offsets[self._frame] + self._row] = True
+        return np.split(keep, offsets[1:-1])
+
+    def removed_per_frame(self) -> List[int]:
+        """Rows dropped from each added frame"""
+        return [int(len(mask) - mask.sum()) for mask in self.keep_masks()]
+
+    def deduplicate(self, frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Combine the added frames keeping one row per complaint
+
+        Args:
+            frames: The frames passed to add(), in the same order
+
+        Returns:
+            Combined dataframe; kept rows stay in their original order
+        """
+        if len(frames) != len(self._frame_sizes):
+            raise ValueError("Frames do not match the ones added to the index")
+        return concat_processed_frames([
+            frame if mask.all() else frame[mask].reset_index(drop=True)
+            for frame, mask in zip(frames, self.keep_masks())
+        ])
+
+
+def deduplicate_frames(frames: List[pd.DataFrame], policy: str = DEFAULT_DEDUP_POLICY) -> Tuple[pd.DataFrame, int]:
+    """
+    Combine processed frames keeping one row per (case_id, company_name)
+
+    Args:
+        frames: Processed complaints dataframes, oldest file first
+        policy: One of DEDUP_POLICIES
+
+    Returns:
+        Tuple of (combined dataframe, number of duplicate rows collapsed)
+    """
+    index = DedupIndex(policy)
+    for frame in frames:
+        index.add(frame)
+    return index.deduplicate(frames), index.collapsed
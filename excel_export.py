@@ -0,0 +1,169 @@
+import pandas as pd
+import io
+from typing import Any, BinaryIO, Dict, Iterator, List
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from complaint_schema import DATE_COLUMNS
+
+# Rows converted to Python values at a time while writing the data sheet
+EXPORT_BLOCK_SIZE = 20_000
+
+EXPORT_COLUMN_NAMES = {
+    'case_id': 'ID da Reclamação',
+    'company_name': 'Empresa',
+    'opening_date': 'Data de Abertura',
+    'deadline_date': 'Data do Prazo',
+    'response_date': 'Data da Resposta',
+    'complaint_status': 'Status da Reclamação',
+    'response_time_days': 'Tempo de Resposta (dias)',
+    'deadline_status': 'Status do Prazo',
+    'days_to_deadline': 'Dias para o Prazo',
+    'status_pending': 'Status de Pendência',
+    'alert_level': 'Nível de Alerta',
+    'source_file': 'Arquivo de Origem',
+    'source_row': 'Linha de Origem'
+}
+
+# Same header look as pandas' ExcelWriter
+_HEADER_FONT = Font(bold=True)
+_HEADER_BORDER = Border(*(Side(style='thin'),) * 4)
+_HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+
+
+def _header_row(ws, values: List[Any]) -> List[WriteOnlyCell]:
+    """Bold header cells for a write-only sheet"""
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = _HEADER_FONT
+        cell.border = _HEADER_BORDER
+        cell.alignment = _HEADER_ALIGNMENT
+        cells.append(cell)
+    return cells
+
+
+def _column_values(col: pd.Series) -> List[Any]:
+    """Python values of a column, with None for missing cells"""
+    if col.name in DATE_COLUMNS and pd.api.types.is_datetime64_any_dtype(col.dtype):
+        values = col.dt.strftime('%d/%m/%Y')
+    elif isinstance(col.dtype, pd.CategoricalDtype):
+        values = col.astype(object)
+    elif pd.api.types.is_extension_array_dtype(col.dtype) or col.dtype == object:
+        values = col.astype(object)
+    else:
+        return col.tolist()
+    return values.where(values.notna(), None).tolist()
+
+
+def iter_export_rows(df: pd.DataFrame, block_size: int = EXPORT_BLOCK_SIZE) -> Iterator[List[Any]]:
+    """
+    Rows of the processed data sheet, converted one block at a time
+
+    Dates are formatted with a vectorized strftime per block instead of a
+    per-cell apply, and only one block of Python values exists at a time.
+
+    Args:
+        df: Processed complaints dataframe
+        block_size: Rows converted per block
+
+    Yields:
+        Lists of cell values
+    """
+    for start in range(0, len(df), block_size):
+        block = df.iloc[start:start + block_size]
+        columns = [_column_values(block[column]) for column in block.columns]
+        yield from zip(*columns)
+
+
+def _metrics_rows(metrics: Dict[str, Any]) -> List[List[Any]]:
+    """Rows of the metrics summary sheet"""
+    rows = [
+        ['MÉTRICAS GERAIS', None],
+        ['Total de Reclamações', metrics['total_complaints']],
+        ['Total Respondidas', f"{metrics['total_responded']} ({metrics['responded_percentage']:.1f}%)"],
+        ['Total Não Respondidas', metrics['total_not_responded']],
+        ['Tempo Médio de Resposta', f"{metrics['average_response_time']:.1f} dias"],
+        [None, None],
+
+        ['CUMPRIMENTO DE PRAZOS', None],
+        ['Respondidas Dentro do Prazo', f"{metrics['within_deadline']} ({metrics['within_deadline_percentage']:.1f}%)"],
+        ['Respondidas Fora do Prazo', metrics['total_responded'] - metrics['within_deadline']],
+        [None, None],
+
+        ['PENDÊNCIAS', None],
+        ['No Prazo (Não Respondidas)', metrics['in_deadline_not_responded']],
+        ['Vencidas (Não Respondidas)', metrics['overdue_not_responded']],
+        [None, None],
+
+        ['ALERTAS DE PRAZO', None]
+    ]
+
+    # Alert breakdown
+    for alert_type, count in metrics['alert_breakdown'].items():
+        rows.append([alert_type, count])
+
+    rows.extend([
+        [None, None],
+        ['Data de Processamento', metrics['processing_date'].strftime('%d/%m/%Y %H:%M:%S')]
+    ])
+    return rows
+
+
+def _frame_rows(df: pd.DataFrame) -> Iterator[List[Any]]:
+    """Rows of a small summary frame, index first"""
+    for label, values in zip(df.index.tolist(), df.itertuples(index=False, name=None)):
+        yield [label] + [None if pd.isna(value) else value for value in values]
+
+
+def write_excel_report(df: pd.DataFrame, metrics: Dict[str, Any], destination: str | BinaryIO) -> None:
+    """
+    Write processed data and metrics to an Excel workbook with a streaming writer
+
+    openpyxl's write-only mode serializes rows as they are appended, so the
+    data sheet is never held as a tree of cell objects.
+
+    Args:
+        df: Processed complaints dataframe
+        metrics: Calculated metrics dictionary
+        destination: File path or binary file object
+    """
+    wb = Workbook(write_only=True)
+
+    # Sheet 1: Processed Data
+    ws = wb.create_sheet('Dados Processados')
+    ws.append(_header_row(ws, [EXPORT_COLUMN_NAMES.get(column, column) for column in df.columns]))
+    for row in iter_export_rows(df):
+        ws.append(row)
+
+    # Sheet 2: Metrics Summary
+    ws = wb.create_sheet('Métricas')
+    ws.append(_header_row(ws, ['Métrica', 'Valor']))
+    for row in _metrics_rows(metrics):
+        ws.append(row)
+
+    # Sheet 3: Company Breakdown
+    company_df = metrics['company_breakdown']
+    if not company_df.empty:
+        ws = wb.create_sheet('Por Empresa')
+        ws.append(_header_row(ws, [company_df.index.name or 'index'] + company_df.columns.tolist()))
+        for row in _frame_rows(company_df):
+            ws.append(row)
+
+    # Sheet 4: Alert Summary
+    if not df.empty:
+        alert_summary = df.groupby(['company_name', 'alert_level'], observed=True).size().unstack(fill_value=0)
+        if not alert_summary.empty:
+            ws = wb.create_sheet('Resumo de Alertas')
+            ws.append(_header_row(ws, [alert_summary.index.name] + alert_summary.columns.astype(object).tolist()))
+            for row in _frame_rows(alert_summary):
+                ws.append(row)
+
+    wb.save(destination)
+
+
+def export_excel_bytes(df: pd.DataFrame, metrics: Dict[str, Any]) -> bytes:
+    """Excel workbook of write_excel_report as bytes"""
+    output = io.BytesIO()
+    write_excel_report(df, metrics, output)
+    return output.getvalue()
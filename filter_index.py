@@ -0,0 +1,87 @@
+import pandas as pd
+import numpy as np
+from functools import reduce
+from typing import Dict, List
+
+
+def _positions_by_value(col: pd.Series) -> Dict[str, np.ndarray]:
+    """Sorted row positions of each distinct value of a column (missing values skipped)"""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        codes = col.cat.codes.to_numpy()
+        categories = col.cat.categories
+    else:
+        codes, categories = pd.factorize(col, use_na_sentinel=True)
+
+    # A stable sort keeps positions ascending inside each value
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+    start = int((codes < 0).sum())
+
+    positions = {}
+    for category, count in zip(categories, counts):
+        if count:
+            positions[category] = order[start:start + count]
+        start += count
+    return positions
+
+
+class FilterIndex:
+    """Row-position indexes of the dashboard filters, built once per processed dataset"""
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df: Processed complaints dataframe
+        """
+        self.n_rows = len(df)
+        self.by_company = _positions_by_value(df['company_name'])
+        self.by_complaint_status = _positions_by_value(df['complaint_status'])
+        self.by_status_pending = _positions_by_value(df['status_pending'])
+        by_alert_level = _positions_by_value(df['alert_level'])
+
+        self.companies: List[str] = sorted(self.by_company)
+        self.alert_counts = {alert: len(positions) for alert, positions in by_alert_level.items()}
+        self.status_pending_counts = {status: len(positions) for status, positions in self.by_status_pending.items()}
+
+    def positions(self, company: str | None = None, complaint_status: str | None = None,
+                  status_pending: str | None = None) -> np.ndarray | None:
+        """
+        Row positions matching every given filter
+
+        Args:
+            company: Company name (None for all companies)
+            complaint_status: Complaint status (None for all)
+            status_pending: Pending status (None for all)
+
+        Returns:
+            Sorted row positions, or None when no filter is applied
+        """
+        selected = []
+        for index, value in [(self.by_company, company),
+                             (self.by_complaint_status, complaint_status),
+                             (self.by_status_pending, status_pending)]:
+            if value is not None:
+                selected.append(index.get(value, np.empty(0, dtype=np.intp)))
+
+        if not selected:
+            return None
+        return reduce(lambda left, right: np.intersect1d(left, right, assume_unique=True), selected)
+
+    def filter(self, df: pd.DataFrame, company: str | None = None, complaint_status: str | None = None,
+               status_pending: str | None = None) -> pd.DataFrame:
+        """
+        Rows of df matching the filters, without copying the frame when none applies
+
+        Args:
+            df: The dataframe the index was built from
+            company: Company name (None for all companies)
+            complaint_status: Complaint status (None for all)
+            status_pending: Pending status (None for all)
+
+        Returns:
+            Filtered dataframe
+        """
+        positions = self.positions(company, complaint_status, status_pending)
+        if positions is None:
+            return df
+        return df.take(positions)
@@ -0,0 +1,383 @@
+import pandas as pd
+import io
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from complaint_processor import ComplaintProcessor
+from metrics_accumulator import MetricsAccumulator
+from complaint_schema import concat_processed_frames
+from business_calendar import BusinessCalendar
+from instrumentation import RunTrace, current_rss
+
+# Rows per chunk when streaming CSV uploads
+DEFAULT_CHUNK_SIZE = 50_000
+
+REQUIRED_FIELDS = ['id_case', 'opening_date', 'deadline_date', 'company_name']
+
+
+# Logical fields whose mapped columns every reader keeps as text: IDs keep
+# their exact digits (a numeric column would turn 2025000 into '2025000.0'
+# when a cell is blank, and round long protocol numbers)
+TEXT_FIELDS = ['id_case', 'company_name']
+
+
+def text_columns(column_mapping: Dict[str, str]) -> List[str]:
+    """Columns of a mapping read as text (see TEXT_FIELDS)"""
+    return [column_mapping[field] for field in TEXT_FIELDS if column_mapping.get(field)]
+
+
+def is_csv(filename: str) -> bool:
+    """Check whether a file is read with the CSV reader"""
+    return filename.lower().endswith('.csv')
+
+
+def read_file(file, header_row: int = 1, text_columns: List[str] | None = None) -> pd.DataFrame:
+    """
+    Read a whole uploaded file into a dataframe
+
+    Args:
+        file: Uploaded file object
+        header_row: Row number where headers are located (1-based)
+        text_columns: Columns read as text (see TEXT_FIELDS)
+
+    Returns:
+        Raw dataframe
+    """
+    file.seek(0)
+    dtype = {col: str for col in text_columns} if text_columns else None
+    if is_csv(file.name):
+        return pd.read_csv(file, header=header_row - 1, dtype=dtype)
+    return pd.read_excel(file, header=header_row - 1, dtype=dtype)
+
+
+def iter_file_chunks(file, header_row: int = 1, chunksize: int = DEFAULT_CHUNK_SIZE,
+                     text_columns: List[str] | None = None) -> Iterator[pd.DataFrame]:
+    """
+    Read an uploaded file in chunks of rows
+
+    CSV files are parsed ``chunksize`` rows at a time from the file object
+    (an in-memory upload, so the whole file is already held). Excel/ODS files
+    have no chunked reader in pandas and are yielded as a single chunk.
+
+    Args:
+        file: Uploaded file object
+        header_row: Row number where headers are located (1-based)
+        chunksize: Maximum number of rows per chunk
+        text_columns: Columns read as text (see TEXT_FIELDS), which also
+            keeps their type from changing between chunks
+
+    Yields:
+        Raw dataframe chunks
+    """
+    file.seek(0)
+    dtype = {col: str for col in text_columns} if text_columns else None
+    if not is_csv(file.name):
+        yield pd.read_excel(file, header=header_row - 1, dtype=dtype)
+        return
+
+    with pd.read_csv(file, header=header_row - 1, chunksize=chunksize, dtype=dtype) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def _file_size(file) -> int:
+    """Size in bytes of an uploaded file object"""
+    position = file.tell()
+    file.seek(0, 2)
+    size = file.tell()
+    file.seek(position)
+    return size
+
+
+def process_file_in_chunks(processor: ComplaintProcessor, file, column_mapping: Dict[str, str],
+                           header_row: int = 1, chunksize: int = DEFAULT_CHUNK_SIZE,
+                           progress_callback: Callable[[int, float], Any] | None = None,
+                           trace: RunTrace | None = None) -> Tuple[List[pd.DataFrame], List[str], int]:
+    """
+    Run a file through the processor chunk by chunk
+
+    Only one raw (unprocessed) chunk is parsed at a time, which avoids
+    building the raw frame of the whole file. Memory still grows with the
+    file: its bytes stay held by the file object and every processed chunk
+    is kept and returned for a single final concatenation.
+
+    Args:
+        processor: Processor used for every chunk
+        file: Uploaded file object
+        column_mapping: Mapping of logical fields to actual column names
+        header_row: Row number where headers are located (1-based)
+        chunksize: Maximum number of rows per chunk
+        progress_callback: Called after each chunk with (rows_read, fraction_of_file_read)
+        trace: Run trace receiving 'read' and 'process' spans, each summed over the chunks
+
+    Returns:
+        Tuple of (processed_chunks, list_of_errors, rows_read)
+    """
+    processed_chunks = []
+    errors = []
+    rows_read = 0
+
+    file_size = _file_size(file)
+    columns_as_text = text_columns(column_mapping)
+    required_cols = [column_mapping.get(field) for field in REQUIRED_FIELDS]
+
+    read_seconds = process_seconds = 0.0
+    rss_before = current_rss()
+    started = time.perf_counter()
+    for chunk in iter_file_chunks(file, header_row, chunksize, columns_as_text):
+        chunk_started = time.perf_counter()
+        read_seconds += chunk_started - started
+        processed_df, chunk_errors = processor.process_file(
+            chunk, column_mapping, file.name, row_offset=rows_read
+        )
+        started = time.perf_counter()
+        process_seconds += started - chunk_started
+        rows_read += len(chunk)
+
+        if not processed_df.empty:
+            processed_chunks.append(processed_df)
+        errors.extend(chunk_errors)
+
+        # A mapping problem is reported once, not once per chunk
+        if any(col is None or col not in chunk.columns for col in required_cols):
+            break
+
+        if progress_callback:
+            fraction = min(file.tell() / file_size, 1.0) if file_size and is_csv(file.name) else 1.0
+            progress_callback(rows_read, fraction)
+    read_seconds += time.perf_counter() - started
+
+    if trace is not None:
+        # Reading and processing interleave, so memory growth is reported on 'process'
+        rss_after = current_rss()
+        trace.record('read', read_seconds, rows_read, file.name)
+        trace.record('process', process_seconds, rows_read, file.name,
+                     rss_after - rss_before if rss_before is not None and rss_after is not None else None)
+    return processed_chunks, errors, rows_read
+
+
+class NamedBytesIO(io.BytesIO):
+    """In-memory file with a name, standing in for an uploaded file"""
+
+    def __init__(self, data: bytes, name: str):
+        super().__init__(data)
+        self.name = name
+
+
+def _job_result(filename: str, chunks: List[pd.DataFrame], errors: List[str], rows_read: int,
+                processor: ComplaintProcessor, trace: RunTrace) -> Dict[str, Any]:
+    """Compact result of a processed file"""
+    accumulator = MetricsAccumulator()
+    for chunk in chunks:
+        accumulator.update(chunk)
+
+    return {
+        'name': filename,
+        'processed': concat_processed_frames(chunks),
+        'errors': errors,
+        'rows_read': rows_read,
+        'accumulator': accumulator,
+        'date_formats': processor.date_format_report.get(filename, {}),
+        'spans': trace.spans
+    }
+
+
+def process_raw_frame(df: pd.DataFrame, filename: str, column_mapping: Dict[str, str],
+                      processing_date: datetime | None = None,
+                      calendar: BusinessCalendar | None = None,
+                      trace: RunTrace | None = None) -> Dict[str, Any]:
+    """
+    Process an already parsed file, returning the same result as process_file_job
+
+    Args:
+        df: Raw dataframe of the file
+        filename: Name of the source file
+        column_mapping: Mapping of logical fields to actual column names
+        processing_date: Reference date shared by every file of the run
+        calendar: Business calendar of the SLA counts (None counts calendar days)
+        trace: Trace receiving the 'process' span (the result carries its spans)
+
+    Returns:
+        Dictionary with the processed frame, errors, rows read, partial
+        metrics, the date format report and the timing spans of the file
+    """
+    trace = trace or RunTrace(log=False)
+    processor = ComplaintProcessor(calendar)
+    if processing_date is not None:
+        processor.processing_date = processing_date
+
+    with trace.span('process', filename, len(df)):
+        processed_df, errors = processor.process_file(df, column_mapping, filename)
+    chunks = [processed_df] if not processed_df.empty else []
+    return _job_result(filename, chunks, errors, len(df), processor, trace)
+
+
+def process_file_job(data: bytes, filename: str, column_mapping: Dict[str, str],
+                     header_row: int = 1, chunksize: int | None = DEFAULT_CHUNK_SIZE,
+                     processing_date: datetime | None = None,
+                     progress_callback: Callable[[int, float], Any] | None = None,
+                     keep_raw: bool = False, calendar: BusinessCalendar | None = None) -> Dict[str, Any]:
+    """
+    Read and process one file, returning a compact result
+
+    This is the unit of work sent to the process pool, so it only takes and
+    returns picklable values. The whole file and its whole processed frame
+    are held in memory either way; ``chunksize`` only limits how many raw
+    CSV rows are parsed at once.
+
+    Args:
+        data: Raw file contents
+        filename: Name of the source file
+        column_mapping: Mapping of logical fields to actual column names
+        header_row: Row number where headers are located (1-based)
+        chunksize: Rows per chunk for CSV files (None reads the whole file)
+        processing_date: Reference date shared by every file of the run
+        progress_callback: Called with (rows_read, fraction_of_file_read)
+        keep_raw: Also return the parsed raw frame (under 'raw') when the
+            file is read whole, so the caller can cache it
+        calendar: Business calendar of the SLA counts (None counts calendar days)
+
+    Returns:
+        Dictionary with the processed frame, errors, rows read, partial
+        metrics, the date format report and the 'read'/'process' timing
+        spans of the file
+    """
+    file = NamedBytesIO(data, filename)
+    # Spans are returned with the result and logged by the caller's trace
+    trace = RunTrace(log=False)
+
+    if chunksize and is_csv(filename):
+        processor = ComplaintProcessor(calendar)
+        if processing_date is not None:
+            processor.processing_date = processing_date
+        chunks, errors, rows_read = process_file_in_chunks(
+            processor, file, column_mapping, header_row,
+            chunksize=chunksize, progress_callback=progress_callback, trace=trace
+        )
+        return _job_result(filename, chunks, errors, rows_read, processor, trace)
+
+    with trace.span('read', filename) as span:
+        df = read_file(file, header_row, text_columns(column_mapping))
+        span['rows'] = len(df)
+    result = process_raw_frame(df, filename, column_mapping, processing_date, calendar, trace)
+    if keep_raw:
+        result['raw'] = df
+    del df
+    if progress_callback:
+        progress_callback(result['rows_read'], 1.0)
+    return result
+
+
+def failed_job_result(filename: str, error: Exception) -> Dict[str, Any]:
+    """Result of a file that could not be read or processed"""
+    return {
+        'name': filename,
+        'failed': True,
+        'processed': pd.DataFrame(),
+        'errors': [f"Erro crítico ao processar {filename}: {error}"],
+        'rows_read': 0,
+        'accumulator': MetricsAccumulator(),
+        'date_formats': {},
+        'spans': []
+    }
+
+
+def process_files_sequential(files: List[Tuple[bytes, str]], column_mapping: Dict[str, str],
+                             header_row: int = 1, chunksize: int | None = DEFAULT_CHUNK_SIZE,
+                             processing_date: datetime | None = None,
+                             on_progress: Callable[[int, int, float], Any] | None = None,
+                             keep_raw: bool = False,
+                             file_mappings: List[Dict[str, str]] | None = None,
+                             calendar: BusinessCalendar | None = None) -> List[Dict[str, Any]]:
+    """
+    Process several files one after another in the current process
+
+    Args:
+        files: List of (file contents, file name)
+        column_mapping: Mapping of logical fields to actual column names
+        header_row: Row number where headers are located (1-based)
+        chunksize: Rows per chunk for CSV files (None reads whole files)
+        processing_date: Reference date shared by every file of the run
+        on_progress: Called with (file_position, rows_read, fraction_of_file_read)
+        keep_raw: Also return the parsed raw frames of files read whole
+        file_mappings: Mapping of each file, in the order of ``files``
+            (overrides column_mapping)
+        calendar: Business calendar of the SLA counts (None counts calendar days)
+
+    Returns:
+        List of process_file_job results, one per file, in input order
+    """
+    processing_date = processing_date or datetime.now()
+    results = []
+
+    for position, (data, name) in enumerate(files):
+        def report_progress(rows_read, fraction):
+            if on_progress:
+                on_progress(position, rows_read, fraction)
+
+        mapping = file_mappings[position] if file_mappings else column_mapping
+        try:
+            results.append(process_file_job(data, name, mapping, header_row, chunksize,
+                                            processing_date, report_progress, keep_raw, calendar))
+        except Exception as e:
+            results.append(failed_job_result(name, e))
+
+    return results
+
+
+def process_files_parallel(files: List[Tuple[bytes, str]], column_mapping: Dict[str, str],
+                           header_row: int = 1, chunksize: int | None = DEFAULT_CHUNK_SIZE,
+                           processing_date: datetime | None = None, max_workers: int = 2,
+                           on_file_done: Callable[[int, int, str], Any] | None = None,
+                           keep_raw: bool = False,
+                           file_mappings: List[Dict[str, str]] | None = None,
+                           calendar: BusinessCalendar | None = None) -> List[Dict[str, Any]]:
+    """
+    Process several files in a pool of worker processes
+
+    Workers are started with the 'spawn' method, which is safe inside the
+    multithreaded Streamlit server. Results are returned in the order of
+    ``files`` regardless of completion order, so source_file/source_row and
+    the error list stay deterministic.
+
+    Args:
+        files: List of (file contents, file name)
+        column_mapping: Mapping of logical fields to actual column names
+        header_row: Row number where headers are located (1-based)
+        chunksize: Rows per chunk for CSV files (None reads whole files)
+        processing_date: Reference date shared by every file of the run
+        max_workers: Number of worker processes
+        on_file_done: Called with (files_completed, total_files, file_name)
+            as each file finishes
+        keep_raw: Also return the parsed raw frames of files read whole
+        file_mappings: Mapping of each file, in the order of ``files``
+            (overrides column_mapping)
+        calendar: Business calendar of the SLA counts (None counts calendar days)
+
+    Returns:
+        List of process_file_job results, one per file, in input order
+    """
+    processing_date = processing_date or datetime.now()
+    results: List[Dict[str, Any] | None] = [None] * len(files)
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = {
+            executor.submit(process_file_job, data, name,
+                            file_mappings[position] if file_mappings else column_mapping,
+                            header_row, chunksize, processing_date, None, keep_raw, calendar): position
+            for position, (data, name) in enumerate(files)
+        }
+        for completed, future in enumerate(as_completed(futures), start=1):
+            position = futures[future]
+            name = files[position][1]
+            try:
+                results[position] = future.result()
+            except Exception as e:
+                results[position] = failed_job_result(name, e)
+            if on_file_done:
+                on_file_done(completed, len(files), name)
+
+    return results
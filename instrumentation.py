@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+# Where the JSON span log goes: unset or '-' for stderr, a file path, or 'off'
+PERFORMANCE_LOG = os.environ.get('DATAJURIS_PERF_LOG')
+
+logger = logging.getLogger('datajuris.performance')
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss() -> int | None:
+    """Resident memory of this process in bytes (None where /proc is not available)"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def configure_performance_log(destination: str | None = PERFORMANCE_LOG):
+    """
+    Send span records to stderr or a file, one JSON object per line
+
+    Safe to call on every Streamlit rerun: the handler is only added once.
+
+    Args:
+        destination: '-' or None for stderr, a file path, or 'off' to disable
+    """
+    if logger.handlers:
+        return
+    logger.propagate = False
+    if destination == 'off':
+        logger.setLevel(logging.WARNING)
+        logger.addHandler(logging.NullHandler())
+        return
+    if destination in (None, '', '-'):
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        handler = logging.FileHandler(destination, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+def _megabytes(size: int | None, digits: int = 1) -> float | None:
+    """Byte count in MB, None stays None"""
+    return None if size is None else round(size / 2**20, digits)
+
+
+def _span_record(name: str, seconds: float, rows: int | None = None, file: str | None = None,
+                 rss_delta: int | None = None, rss: int | None = None) -> Dict[str, Any]:
+    """Span as a flat, JSON-compatible dictionary"""
+    return {
+        'name': name,
+        'file': file,
+        'seconds': round(seconds, 6),
+        'rows': rows,
+        'rows_per_second': round(rows / seconds) if rows and seconds > 0 else None,
+        'rss_delta_mb': _megabytes(rss_delta, 2),
+        'rss_mb': _megabytes(rss)
+    }
+
+
+class RunTrace:
+    """
+    Named spans of one processing run: wall time, rows/sec and resident memory change
+
+    A span costs two clock reads and two reads of /proc/self/statm, so
+    tracing stays on in production. Worker processes record into their own
+    trace (log=False) and return the span dictionaries with their results;
+    the parent adds them with extend(), which logs them under its run id.
+    """
+
+    def __init__(self, run_id: str | None = None, log: bool = True):
+        """
+        Args:
+            run_id: Identifier written with every log record (random by default)
+            log: Emit a JSON log record per span
+        """
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.log = log
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def span(self, name: str, file: str | None = None, rows: int | None = None) -> Iterator[Dict[str, Any]]:
+        """
+        Measure a block; rows can be set on the yielded dictionary once known
+
+        Usage:
+            with trace.span('read', filename) as span:
+                df = read_file(...)
+                span['rows'] = len(df)
+        """
+        state = {'rows': rows}
+        rss_before = current_rss()
+        started = time.perf_counter()
+        try:
+            yield state
+        finally:
+            seconds = time.perf_counter() - started
+            rss_after = current_rss()
+            rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+            self._add(_span_record(name, seconds, state['rows'], file, rss_delta, rss_after))
+
+    def record(self, name: str, seconds: float, rows: int | None = None, file: str | None = None,
+               rss_delta: int | None = None) -> Dict[str, Any]:
+        """Add a span measured by the caller (e.g. time summed over chunks)"""
+        span = _span_record(name, seconds, rows, file, rss_delta, current_rss())
+        self._add(span)
+        return span
+
+    def extend(self, spans: List[Dict[str, Any]]):
+        """Add spans recorded elsewhere, such as in a worker process"""
+        for span in spans:
+            self._add(dict(span))
+
+    def _add(self, span: Dict[str, Any]):
+        self.spans.append(span)
+        if self.log and logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({'event': 'span', 'run': self.run_id, 'time': datetime.now().isoformat(), **span},
+                                   ensure_ascii=False))
+
+    def finish(self, rows: int | None = None, **fields) -> Dict[str, Any]:
+        """
+        Close the run and log its total
+
+        Args:
+            rows: Rows of the final result
+            **fields: Extra values of the run summary (files, cached files, ...)
+
+        Returns:
+            Run summary: run id, total seconds, rows and the spans
+        """
+        total = time.perf_counter() - self.started
+        summary = {'run': self.run_id, 'seconds': round(total, 6), 'rows': rows, **fields}
+        if self.log and logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({'event': 'run', 'time': datetime.now().isoformat(), **summary,
+                                    'rss_mb': _megabytes(current_rss())}, ensure_ascii=False, default=str))
+        return {**summary, 'spans': self.spans}
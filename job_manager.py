@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+# Processing runs executed at the same time across all sessions
+DEFAULT_JOB_WORKERS = int(os.environ.get('DATAJURIS_JOB_WORKERS', 2))
+# Finished jobs (and their results) are kept this long, and at most this many
+DEFAULT_RESULT_TTL = 2 * 60 * 60
+DEFAULT_MAX_FINISHED_JOBS = 20
+
+JOB_STATES = {
+    'queued': "Na fila",
+    'running': "Em andamento",
+    'done': "Concluído",
+    'failed': "Falhou"
+}
+
+
+class Job:
+    """A submitted run: state, progress reported by the worker, and timing"""
+
+    def __init__(self, job_id: str, label: str):
+        """
+        Args:
+            job_id: Identifier kept by the session that submitted the job
+            label: Description shown to the user (e.g. the file names)
+        """
+        self.id = job_id
+        self.label = label
+        self.state = 'queued'
+        self.progress = 0.0
+        self.message = JOB_STATES['queued']
+        self.error: str | None = None
+        self.submitted_at = datetime.now()
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+        self.future: Future | None = None
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job is done or failed"""
+        return self.state in ('done', 'failed')
+
+    def report(self, fraction: float, message: str | None = None):
+        """Progress callback handed to the job function (called from the worker thread)"""
+        self.progress = min(max(fraction, 0.0), 1.0)
+        if message:
+            self.message = message
+
+
+class JobManager:
+    """
+    Process-wide pool running processing jobs in background threads
+
+    Sessions submit a function and keep only the job id; the Streamlit
+    script keeps rerunning while the job works, and reads its progress and
+    result by id. Results stay in the manager's result store until they
+    expire, so reopening a finished job (or the page after a browser
+    refresh) does not recompute anything.
+
+    Job functions must not call Streamlit: they run outside any script
+    run. They receive an on_progress(fraction, message) keyword argument.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_JOB_WORKERS, result_ttl: float = DEFAULT_RESULT_TTL,
+                 max_finished: int = DEFAULT_MAX_FINISHED_JOBS):
+        """
+        Args:
+            max_workers: Jobs running at the same time; later ones wait in the queue
+            result_ttl: Seconds a finished job and its result are kept
+            max_finished: Most finished jobs kept (oldest are dropped first)
+        """
+        self.result_ttl = result_ttl
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max(max_workers, 1), thread_name_prefix='datajuris-job')
+        self._jobs: Dict[str, Job] = {}
+        self._results: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, function: Callable[..., Any], *args, label: str = '', **kwargs) -> Job:
+        """
+        Queue a job
+
+        Args:
+            function: Job function, called as function(*args, on_progress=..., **kwargs)
+            *args: Positional arguments of the function
+            label: Description shown to the user
+            **kwargs: Keyword arguments of the function
+
+        Returns:
+            The queued job
+        """
+        job = Job(uuid.uuid4().hex[:12], label)
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, function, args, kwargs)
+        return job
+
+    def _run(self, job: Job, function: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]):
+        """Worker side of a job: run it and keep its result or error"""
+        job.state = 'running'
+        job.started_at = datetime.now()
+        job.message = JOB_STATES['running']
+        # finished_at is set before the state: other threads read finished jobs by it
+        try:
+            result = function(*args, on_progress=job.report, **kwargs)
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            job.finished_at = datetime.now()
+            job.state = 'failed'
+        else:
+            with self._lock:
+                self._results[job.id] = result
+            job.progress = 1.0
+            job.finished_at = datetime.now()
+            job.state = 'done'
+
+    def get(self, job_id: str) -> Job | None:
+        """Job by id (None when unknown or expired)"""
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def result(self, job_id: str) -> Any | None:
+        """Stored result of a finished job (None when it failed, is still running or expired)"""
+        with self._lock:
+            return self._results.get(job_id)
+
+    def jobs(self, job_ids: List[str]) -> List[Job]:
+        """The known jobs among job_ids, in the same order"""
+        with self._lock:
+            self._expire()
+            return [self._jobs[job_id] for job_id in job_ids if job_id in self._jobs]
+
+    def discard(self, job_id: str):
+        """
+        Forget a finished job and its result for every session
+
+        A running job keeps running until it ends. Sessions that stop
+        following a job just untrack it, since other sessions may follow
+        the same job; finished jobs otherwise leave through expiry.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.finished:
+                del self._jobs[job_id]
+                self._results.pop(job_id, None)
+
+    def wait(self, job_id: str, timeout: float | None = None) -> Job | None:
+        """Block until a job finishes (for scripts; the app polls instead)"""
+        job = self.get(job_id)
+        if job is not None and job.future is not None:
+            try:
+                job.future.result(timeout)
+            except TimeoutError:
+                pass
+        return job
+
+    def _expire(self):
+        """Drop finished jobs past their time to live or over the count limit (lock held)"""
+        now = time.time()
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at)
+        for position, job in enumerate(finished):
+            if now - job.finished_at.timestamp() > self.result_ttl or position < len(finished) - self.max_finished:
+                del self._jobs[job.id]
+                self._results.pop(job.id, None)
+
+    def shutdown(self):
+        """Stop accepting jobs and wait for the running ones"""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,250 @@
+import pandas as pd
+import numpy as np
+import re
+import unicodedata
+from datetime import date, datetime
+from typing import Any, Dict, List
+from date_parser import parse_date_column
+
+# Rows scanned when looking for the header row
+HEADER_SCAN_ROWS = 30
+# Data rows sniffed per column when scoring the mapping
+SNIFF_ROWS = 200
+# Minimum score for a column to be suggested for a field
+MIN_FIELD_SCORE = 0.35
+
+LOGICAL_FIELDS = ['id_case', 'opening_date', 'deadline_date', 'response_date', 'company_name']
+DATE_FIELDS = ['opening_date', 'deadline_date', 'response_date']
+
+# Header words per logical field (accents removed, lower case)
+FIELD_KEYWORDS: Dict[str, List[str]] = {
+    'id_case': ['id', 'protocolo', 'numero', 'num', 'no', 'n', 'codigo', 'cod', 'reclamacao', 'caso',
+                'ticket', 'chamado', 'processo', 'identificador'],
+    'opening_date': ['abertura', 'criacao', 'entrada', 'registro', 'recebimento', 'cadastro', 'inicio',
+                     'aberto', 'criado', 'abertas'],
+    'deadline_date': ['prazo', 'vencimento', 'limite', 'sla', 'deadline', 'vence', 'expiracao'],
+    'response_date': ['resposta', 'respondido', 'respondida', 'resolucao', 'fechamento', 'conclusao',
+                      'finalizacao', 'encerramento', 'retorno'],
+    'company_name': ['empresa', 'fornecedor', 'reclamada', 'razao', 'social', 'fantasia', 'companhia',
+                     'marca', 'instituicao', 'banco', 'parceiro']
+}
+DATE_KEYWORDS = ['data', 'dt', 'date', 'dia']
+
+
+def normalize_header(value: Any) -> str:
+    """Lower-case header text without accents or punctuation"""
+    text = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', ' ', text.lower()).strip()
+
+
+def _header_words(value: Any) -> List[str]:
+    """Words of a header cell"""
+    return normalize_header(value).split()
+
+
+def _is_number_text(value: str) -> bool:
+    """Whether a string holds a number"""
+    try:
+        float(value.replace(',', '.'))
+        return True
+    except ValueError:
+        return False
+
+
+def _looks_like_label(value: Any) -> bool:
+    """Whether a cell looks like a column title rather than data"""
+    if not isinstance(value, str):
+        return False
+    text = value.strip()
+    if not text or _is_number_text(text):
+        return False
+    return not re.match(r'^\d{1,4}[/.-]\d{1,2}[/.-]\d{1,4}', text)
+
+
+def _keyword_hits(value: Any) -> int:
+    """Number of logical fields whose keywords appear in a header cell"""
+    words = set(_header_words(value))
+    return sum(1 for keywords in FIELD_KEYWORDS.values() if words & set(keywords))
+
+
+def detect_header_row(rows: List[List[Any]], max_rows: int = HEADER_SCAN_ROWS) -> int:
+    """
+    Find the most likely header row among the first rows of a sheet
+
+    A header row is wide, made of distinct text labels, mentions the
+    logical fields, and is followed by rows at least as wide.
+
+    Args:
+        rows: First rows of the sheet ('' for empty cells)
+        max_rows: Number of rows considered
+
+    Returns:
+        Header row number (1-based), 1 when nothing stands out
+    """
+    rows = rows[:max_rows]
+    width = max((sum(1 for value in row if value != '' and not pd.isna(value)) for row in rows), default=0)
+    if width == 0:
+        return 1
+
+    best_row, best_score = 1, 0.0
+    for position, row in enumerate(rows):
+        cells = [value for value in row if value != '' and not pd.isna(value)]
+        if len(cells) < 2:
+            continue
+
+        labels = [value for value in cells if _looks_like_label(value)]
+        label_ratio = len(labels) / len(cells)
+        fill = len(cells) / width
+        distinct = len({str(value).strip() for value in cells}) / len(cells)
+        hits = min(sum(1 for value in labels if _keyword_hits(value)), len(LOGICAL_FIELDS)) / len(LOGICAL_FIELDS)
+
+        below = rows[position + 1:position + 4]
+        data_like = np.mean([
+            sum(1 for value in next_row if value != '' and not pd.isna(value)) >= 0.5 * len(cells)
+            for next_row in below
+        ]) if below else 0.0
+
+        score = label_ratio * fill * distinct + 0.5 * hits + 0.2 * data_like
+        if score > best_score:
+            best_row, best_score = position + 1, score
+
+    return best_row
+
+
+def _name_score(column: Any, field: str) -> float:
+    """How well a header name matches a logical field (0-1)"""
+    words = _header_words(column)
+    if not words:
+        return 0.0
+    keywords = set(FIELD_KEYWORDS[field])
+    matched = [word for word in words if word in keywords]
+    if not matched:
+        return 0.0
+    score = 0.8
+    if field in DATE_FIELDS and set(words) & set(DATE_KEYWORDS):
+        score = 1.0
+    # Short identifiers ('n', 'no') are only trusted next to other ID words
+    if field == 'id_case' and all(len(word) <= 2 for word in matched) and len(words) > 2:
+        score = 0.4
+    return score
+
+
+def _date_ratio(col: pd.Series) -> float:
+    """Fraction of the non-empty values that parse as dates"""
+    present = col[col.notna() & (col.astype(str).str.strip() != '')]
+    if present.empty:
+        return 0.0
+    if pd.api.types.is_datetime64_any_dtype(present.dtype):
+        return 1.0
+    if all(isinstance(value, (datetime, date)) for value in present):
+        return 1.0
+    try:
+        parsed, _ = parse_date_column(present.astype(str), lambda value: None)
+    except (TypeError, ValueError):
+        return 0.0
+    return float(parsed.notna().mean())
+
+
+def _value_scores(col: pd.Series) -> Dict[str, float]:
+    """Scores of a sampled column against each logical field from its values (0-1)"""
+    present = col[col.notna()]
+    text = present.astype(str).str.strip()
+    text = text[text != '']
+    fill = len(text) / len(col) if len(col) else 0.0
+    if text.empty:
+        return {field: 0.0 for field in LOGICAL_FIELDS}
+
+    date_ratio = _date_ratio(col)
+    unique_ratio = text.nunique() / len(text)
+    numeric_ratio = float(text.map(_is_number_text).mean())
+    letter_ratio = float(text.str.contains(r'[A-Za-zÀ-ÿ]', regex=True).mean())
+
+    date_score = date_ratio
+    return {
+        'id_case': (1 - date_ratio) * unique_ratio * fill * (0.5 + 0.5 * max(numeric_ratio, 1 - letter_ratio)),
+        'opening_date': date_score * fill,
+        'deadline_date': date_score * fill,
+        # Response dates are the date column that is allowed to be blank
+        'response_date': date_score * (0.7 + 0.3 * (1 - fill)),
+        'company_name': (1 - date_ratio) * letter_ratio * (1 - numeric_ratio) * (1 - 0.5 * unique_ratio)
+    }
+
+
+def score_columns(sample: pd.DataFrame) -> pd.DataFrame:
+    """
+    Score every column of a sample against the logical fields
+
+    Header names weigh more than values; values sniff dates, IDs and
+    company names from the first rows.
+
+    Args:
+        sample: First data rows of the file(s), with their header
+
+    Returns:
+        Dataframe of scores (columns as rows, logical fields as columns)
+    """
+    sample = sample.head(SNIFF_ROWS)
+    scores = {}
+    for column in sample.columns:
+        if str(column).startswith('Unnamed:'):
+            continue
+        values = _value_scores(sample[column])
+        scores[column] = {
+            field: 0.6 * _name_score(column, field) + 0.4 * values[field]
+            for field in LOGICAL_FIELDS
+        }
+        # A date field needs date values (or a header that says so)
+        for field in DATE_FIELDS:
+            if values[field] == 0 and _name_score(column, field) < 1.0:
+                scores[column][field] *= 0.5
+    return pd.DataFrame.from_dict(scores, orient='index', columns=LOGICAL_FIELDS)
+
+
+def infer_column_mapping(sample: pd.DataFrame, min_score: float = MIN_FIELD_SCORE) -> Dict[str, str | None]:
+    """
+    Suggest a column for each logical field
+
+    Fields are assigned greedily from the best (field, column) score down,
+    each column used at most once.
+
+    Args:
+        sample: First data rows of the file(s), with their header
+        min_score: Scores below this leave the field unmapped
+
+    Returns:
+        Mapping of logical fields to column names (None when no column fits)
+    """
+    mapping: Dict[str, str | None] = {field: None for field in LOGICAL_FIELDS}
+    scores = score_columns(sample)
+    if scores.empty:
+        return mapping
+
+    candidates = scores.stack().sort_values(ascending=False, kind='stable')
+    used = set()
+    for (column, field), score in candidates.items():
+        if score < min_score:
+            break
+        if mapping[field] is not None or column in used:
+            continue
+        mapping[field] = column
+        used.add(column)
+
+    # Without clear names, the earlier of two date columns is the opening date
+    opening, deadline = mapping['opening_date'], mapping['deadline_date']
+    if opening is not None and deadline is not None and max(_name_score(opening, 'opening_date'),
+                                                            _name_score(deadline, 'deadline_date')) == 0:
+        medians = [_date_median(sample[column]) for column in (opening, deadline)]
+        if None not in medians and medians[0] > medians[1]:
+            mapping['opening_date'], mapping['deadline_date'] = deadline, opening
+
+    return mapping
+
+
+def _date_median(col: pd.Series) -> pd.Timestamp | None:
+    """Median of the values of a date column (None when nothing parses)"""
+    try:
+        parsed, _ = parse_date_column(col, lambda value: None)
+    except (TypeError, ValueError):
+        return None
+    parsed = parsed.dropna()
+    return parsed.median() if not parsed.empty else None
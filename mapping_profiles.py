@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.expanduser('~'), '.datajuris', 'mapping_profiles')
+PROFILE_FORMAT_VERSION = 1
+
+
+def header_signature(columns: List[Any]) -> str:
+    """Hash of a file's header set (order and duplicates do not matter)"""
+    names = sorted({str(column).strip() for column in columns})
+    return hashlib.blake2b(json.dumps(names, ensure_ascii=False).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def mapping_fits(column_mapping: Dict[str, str | None], columns: List[Any]) -> bool:
+    """Whether every mapped column exists in the header"""
+    available = set(columns)
+    return all(column in available for column in column_mapping.values() if column)
+
+
+class MappingProfileStore:
+    """Column mappings saved on disk, one JSON file per header signature"""
+
+    def __init__(self, directory: str | None = None):
+        """
+        Args:
+            directory: Profile directory (DEFAULT_PROFILE_DIR when omitted)
+        """
+        self.directory = directory or DEFAULT_PROFILE_DIR
+
+    def _path(self, signature: str) -> str:
+        """File of a profile"""
+        return os.path.join(self.directory, f"{signature}.json")
+
+    def get(self, signature: str) -> Dict[str, Any] | None:
+        """
+        Profile saved for a header signature
+
+        Args:
+            signature: Header signature (see header_signature)
+
+        Returns:
+            Profile dictionary, or None when there is no usable profile
+        """
+        try:
+            with open(self._path(signature), 'r', encoding='utf-8') as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if profile.get('version') != PROFILE_FORMAT_VERSION:
+            return None
+        return profile
+
+    def match(self, columns: List[Any]) -> Dict[str, Any] | None:
+        """Profile of a file's header, when it still fits its columns"""
+        profile = self.get(header_signature(columns))
+        if profile is None or not mapping_fits(profile['mapping'], columns):
+            return None
+        return profile
+
+    def save(self, columns: List[Any], column_mapping: Dict[str, str | None], header_row: int = 1,
+             name: str | None = None) -> Dict[str, Any]:
+        """
+        Save (or replace) the profile of a header layout
+
+        Args:
+            columns: Columns of the header the mapping applies to
+            column_mapping: Mapping of logical fields to column names
+            header_row: Header row the columns were read from (1-based)
+            name: Label shown to the user (defaults to the previous one or the signature)
+
+        Returns:
+            The saved profile
+        """
+        signature = header_signature(columns)
+        previous = self.get(signature) or {}
+        profile = {
+            'version': PROFILE_FORMAT_VERSION,
+            'signature': signature,
+            'name': name or previous.get('name') or f"Layout {signature[:8]}",
+            'columns': [str(column) for column in columns],
+            'mapping': column_mapping,
+            'header_row': header_row,
+            'created_at': previous.get('created_at', datetime.now().isoformat()),
+            'updated_at': datetime.now().isoformat()
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(signature)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(profile, f, ensure_ascii=False, indent=2)
+        os.replace(path + '.tmp', path)
+        return profile
+
+    def delete(self, signature: str) -> bool:
+        """Remove a profile, returning whether it existed"""
+        try:
+            os.remove(self._path(signature))
+            return True
+        except OSError:
+            return False
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Saved profiles, most recently updated first"""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                profile = self.get(name[:-len('.json')])
+                if profile is not None:
+                    profiles.append(profile)
+        return sorted(profiles, key=lambda profile: profile['updated_at'], reverse=True)
@@ -0,0 +1,222 @@
+import pandas as pd
+import numpy as np
+from datetime import datetime
+from typing import Any, Dict
+
+COMPANY_COLUMNS = ['total', 'responded', 'within_deadline', 'response_time_sum', 'response_time_count']
+STATE_FIELDS = ['total_complaints', 'total_responded', 'total_not_responded', 'within_deadline',
+                'response_time_sum', 'response_time_count', 'in_deadline_not_responded', 'overdue_not_responded']
+
+
+class MetricsAccumulator:
+    """Mergeable SLA metrics that can be updated chunk by chunk or file by file"""
+
+    def __init__(self):
+        self.total_complaints = 0
+        self.total_responded = 0
+        self.total_not_responded = 0
+        self.within_deadline = 0
+        self.response_time_sum = 0.0
+        self.response_time_count = 0
+        self.in_deadline_not_responded = 0
+        self.overdue_not_responded = 0
+        self.alert_counts: Dict[str, int] = {}
+        self.companies = pd.DataFrame(columns=COMPANY_COLUMNS, dtype=float)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'MetricsAccumulator':
+        """Build an accumulator from a processed dataframe"""
+        accumulator = cls()
+        accumulator.update(df)
+        return accumulator
+
+    def update(self, df: pd.DataFrame) -> 'MetricsAccumulator':
+        """
+        Add a processed chunk to the running metrics
+
+        Args:
+            df: Processed complaints dataframe (output of process_file)
+
+        Returns:
+            The accumulator itself
+        """
+        if df.empty:
+            return self
+
+        responded = (df['complaint_status'] == 'Respondida').to_numpy()
+        within = responded & (df['deadline_status'] == 'Dentro do Prazo').to_numpy()
+        response_times = df['response_time_days'].astype(float)
+        has_response_time = response_times.notna().to_numpy()
+
+        self.total_complaints += len(df)
+        self.total_responded += int(responded.sum())
+        self.total_not_responded += int((df['complaint_status'] == 'Não Respondida').sum())
+        self.within_deadline += int(within.sum())
+        self.response_time_sum += float(response_times[responded & has_response_time].sum())
+        self.response_time_count += int((responded & has_response_time).sum())
+        self.in_deadline_not_responded += int((df['status_pending'] == 'No Prazo, Não Respondida').sum())
+        self.overdue_not_responded += int((df['status_pending'] == 'Vencida e Não Respondida').sum())
+
+        for alert, count in df['alert_level'].value_counts().items():
+            if count == 0:
+                continue
+            self.alert_counts[alert] = self.alert_counts.get(alert, 0) + int(count)
+
+        # Per-company partial sums, merged by company name
+        parts = pd.DataFrame({
+            'company_name': df['company_name'].array,
+            'total': df['case_id'].notna().to_numpy(dtype=float),
+            'responded': responded.astype(float),
+            'within_deadline': (df['deadline_status'] == 'Dentro do Prazo').to_numpy(dtype=float),
+            'response_time_sum': response_times.fillna(0).to_numpy(),
+            'response_time_count': has_response_time.astype(float)
+        })
+        grouped = parts.groupby('company_name', sort=False, observed=True).sum()
+        grouped.index = grouped.index.astype(object)
+        self._merge_companies(grouped)
+        return self
+
+    def merge(self, other: 'MetricsAccumulator') -> 'MetricsAccumulator':
+        """
+        Combine another accumulator (e.g. from another file or worker) into this one
+
+        Args:
+            other: Accumulator to merge
+
+        Returns:
+            The accumulator itself
+        """
+        self.total_complaints += other.total_complaints
+        self.total_responded += other.total_responded
+        self.total_not_responded += other.total_not_responded
+        self.within_deadline += other.within_deadline
+        self.response_time_sum += other.response_time_sum
+        self.response_time_count += other.response_time_count
+        self.in_deadline_not_responded += other.in_deadline_not_responded
+        self.overdue_not_responded += other.overdue_not_responded
+
+        for alert, count in other.alert_counts.items():
+            self.alert_counts[alert] = self.alert_counts.get(alert, 0) + count
+
+        self._merge_companies(other.companies)
+        return self
+
+    def subtract(self, other: 'MetricsAccumulator') -> 'MetricsAccumulator':
+        """
+        Remove the contribution of rows counted in another accumulator
+        (e.g. stored rows replaced by a newer version)
+
+        Args:
+            other: Accumulator of rows previously added to this one
+
+        Returns:
+            The accumulator itself
+        """
+        self.total_complaints -= other.total_complaints
+        self.total_responded -= other.total_responded
+        self.total_not_responded -= other.total_not_responded
+        self.within_deadline -= other.within_deadline
+        self.response_time_sum -= other.response_time_sum
+        self.response_time_count -= other.response_time_count
+        self.in_deadline_not_responded -= other.in_deadline_not_responded
+        self.overdue_not_responded -= other.overdue_not_responded
+
+        for alert, count in other.alert_counts.items():
+            remaining = self.alert_counts.get(alert, 0) - count
+            if remaining > 0:
+                self.alert_counts[alert] = remaining
+            else:
+                self.alert_counts.pop(alert, None)
+
+        if not other.companies.empty:
+            self.companies = self.companies.sub(other.companies[COMPANY_COLUMNS], fill_value=0)
+            # Companies whose rows were all removed leave the breakdown
+            self.companies = self.companies[self.companies['total'] > 0]
+        return self
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-compatible state of the accumulator (see from_state)"""
+        return {
+            'totals': {name: getattr(self, name) for name in STATE_FIELDS},
+            'alert_counts': dict(self.alert_counts),
+            'companies': {
+                'index': self.companies.index.tolist(),
+                'data': self.companies[COMPANY_COLUMNS].to_numpy().tolist() if not self.companies.empty else []
+            }
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'MetricsAccumulator':
+        """Rebuild an accumulator saved with to_state"""
+        accumulator = cls()
+        for name, value in state['totals'].items():
+            setattr(accumulator, name, value)
+        accumulator.alert_counts = dict(state['alert_counts'])
+        if state['companies']['index']:
+            accumulator.companies = pd.DataFrame(state['companies']['data'], index=state['companies']['index'],
+                                                 columns=COMPANY_COLUMNS, dtype=float)
+        return accumulator
+
+    def _merge_companies(self, grouped: pd.DataFrame):
+        """Add per-company partial sums"""
+        if self.companies.empty:
+            self.companies = grouped[COMPANY_COLUMNS].astype(float)
+        else:
+            self.companies = self.companies.add(grouped[COMPANY_COLUMNS], fill_value=0)
+
+    def result(self, processing_date: datetime) -> Dict[str, Any]:
+        """
+        Final metrics, in the same structure as ComplaintProcessor.calculate_metrics
+
+        Args:
+            processing_date: Reference date of the processing run
+
+        Returns:
+            Metrics dictionary
+        """
+        if self.total_complaints == 0:
+            return {
+                'total_complaints': 0,
+                'total_responded': 0,
+                'responded_percentage': 0,
+                'total_not_responded': 0,
+                'within_deadline': 0,
+                'within_deadline_percentage': 0,
+                'average_response_time': 0,
+                'in_deadline_not_responded': 0,
+                'overdue_not_responded': 0,
+                'alert_breakdown': {},
+                'company_breakdown': pd.DataFrame(),
+                'processing_date': processing_date
+            }
+
+        responded_percentage = self.total_responded / self.total_complaints * 100
+        within_deadline_percentage = (self.within_deadline / self.total_responded * 100) if self.total_responded > 0 else 0
+        average_response_time = (self.response_time_sum / self.response_time_count) if self.response_time_count > 0 else 0.0
+
+        # Same ordering as value_counts(): most frequent first
+        alert_breakdown = dict(sorted(self.alert_counts.items(), key=lambda item: -item[1]))
+
+        companies = self.companies.sort_index()
+        company_breakdown = pd.DataFrame({
+            'Total': companies['total'].astype('int64'),
+            'Respondidas': companies['responded'].astype('int64'),
+            'Dentro do Prazo': companies['within_deadline'].astype('int64'),
+            'Tempo Médio (dias)': companies['response_time_sum'] / companies['response_time_count'].replace(0, np.nan)
+        }).round(2)
+        company_breakdown.index.name = 'company_name'
+
+        return {
+            'total_complaints': self.total_complaints,
+            'total_responded': self.total_responded,
+            'responded_percentage': responded_percentage,
+            'total_not_responded': self.total_not_responded,
+            'within_deadline': self.within_deadline,
+            'within_deadline_percentage': within_deadline_percentage,
+            'average_response_time': average_response_time,
+            'in_deadline_not_responded': self.in_deadline_not_responded,
+            'overdue_not_responded': self.overdue_not_responded,
+            'alert_breakdown': alert_breakdown,
+            'company_breakdown': company_breakdown,
+            'processing_date': processing_date
+        }
@@ -0,0 +1,323 @@
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+from business_calendar import BusinessCalendar
+from complaint_processor import ComplaintProcessor
+from complaint_schema import concat_processed_frames
+from complaint_store import ComplaintStore
+from deduplication import DEFAULT_DEDUP_POLICY, DedupIndex
+from filter_index import FilterIndex
+from ingestion import (DEFAULT_CHUNK_SIZE, failed_job_result, is_csv, process_files_parallel,
+                       process_files_sequential, process_raw_frame, text_columns)
+from instrumentation import RunTrace
+from metrics_accumulator import MetricsAccumulator
+from profiling import DEFAULT_PROFILE_DIR, ProfileSession
+from upload_cache import UploadCache, processed_result_key, raw_frame_key
+
+NO_VALID_DATA = "Nenhum dado válido foi processado. Verifique o mapeamento de colunas e os dados nos arquivos."
+
+
+class NoValidDataError(ValueError):
+    """No row of the reports could be processed; errors holds the per-file messages"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__(NO_VALID_DATA)
+        self.errors = errors
+
+
+def process_reports(file_info: List[Dict[str, Any]], mappings: List[Dict[str, str]], header_row: int,
+                    chunksize: int | None, max_workers: int, dedup_policy: str | None,
+                    calendar: BusinessCalendar | None, cache: UploadCache, trace: RunTrace,
+                    processing_date: datetime,
+                    on_progress: Callable[[float, str], Any] | None = None) -> Dict[str, Any]:
+    """
+    Process the validated reports into one frame and its metrics
+
+    Processed results are reused from the cache, or parsed frames when only
+    the mapping changed. Without a process pool, spreadsheets are parsed
+    once through the report that already served their header.
+
+    Args:
+        file_info: Validated reports ('report', 'name', 'digest'), in upload order
+        mappings: Column mapping of each report
+        header_row: Row number where headers are located (1-based)
+        chunksize: Rows per chunk for CSV files (None reads whole files)
+        max_workers: Worker processes (1 processes in this process)
+        dedup_policy: Policy for complaints repeated across files (None keeps all)
+        calendar: Business calendar of the SLA counts (None counts calendar days)
+        cache: Cache of parsed and processed files
+        trace: Trace receiving the spans of the run
+        processing_date: Reference date of the run
+        on_progress: Called with (fraction_done, message)
+
+    Returns:
+        Analysis dictionary (see run_analysis)
+    """
+    report_progress = on_progress or (lambda fraction, message: None)
+    results = [None] * len(file_info)
+    use_pool = max_workers > 1 and len(file_info) > 1
+    pending = []
+    cached_files = 0
+    for position, info in enumerate(file_info):
+        result_key = processed_result_key(info['digest'], info['name'], header_row, mappings[position],
+                                          chunksize, processing_date.date(), calendar and calendar.key)
+        cached_result = cache.get(result_key)
+        if cached_result is not None:
+            results[position] = cached_result
+            cached_files += 1
+            continue
+
+        report = info['report']
+        columns_as_text = text_columns(mappings[position])
+        if not report.has_full_frame(header_row, columns_as_text) and (use_pool or (chunksize and is_csv(report.name))):
+            pending.append(position)
+            continue
+
+        report_progress(position / len(file_info), f"Processando {info['name']}...")
+        try:
+            with trace.span('read', info['name']) as span:
+                raw_df = report.read(header_row, text_columns=columns_as_text)
+                span['rows'] = len(raw_df)
+            results[position] = process_raw_frame(raw_df, info['name'], mappings[position],
+                                                  processing_date, calendar)
+        except Exception as e:
+            results[position] = failed_job_result(info['name'], e)
+            continue
+        trace.extend(results[position]['spans'])
+        cache.put(result_key, results[position])
+
+    files = [(file_info[position]['report'].data, file_info[position]['name']) for position in pending]
+
+    if use_pool and len(files) > 1:
+        def report_file_done(completed, total, name):
+            report_progress(completed / total, f"Processado {name} ({completed}/{total} arquivos)")
+
+        new_results = process_files_parallel(
+            files, None, header_row, chunksize,
+            processing_date, max_workers=max_workers, on_file_done=report_file_done, keep_raw=True,
+            file_mappings=[mappings[position] for position in pending], calendar=calendar
+        )
+    else:
+        rows_done = {}
+
+        def report_rows(position, rows_read, fraction):
+            rows_done[position] = rows_read
+            report_progress((position + fraction) / len(files),
+                            f"Processando {files[position][1]}: {sum(rows_done.values())} linhas processadas...")
+
+        new_results = process_files_sequential(
+            files, None, header_row, chunksize,
+            processing_date, on_progress=report_rows, keep_raw=True,
+            file_mappings=[mappings[position] for position in pending], calendar=calendar
+        )
+
+    for position, result in zip(pending, new_results):
+        info = file_info[position]
+        trace.extend(result['spans'])
+        raw_df = result.pop('raw', None)
+        if raw_df is not None:
+            cache.put(raw_frame_key(info['digest'], header_row, text_columns(mappings[position])), raw_df)
+        if not result.get('failed'):
+            cache.put(processed_result_key(info['digest'], info['name'], header_row, mappings[position],
+                                           chunksize, processing_date.date(), calendar and calendar.key), result)
+        results[position] = result
+    del new_results
+
+    # Merge in upload order so rows and errors are deterministic; with a
+    # deduplication policy, later files win ties
+    report_progress(1.0, "Consolidando resultados...")
+    accumulator = MetricsAccumulator()
+    dedup_index = DedupIndex(dedup_policy) if dedup_policy else None
+    all_data = []
+    data_files = []
+    failed_files = []
+    rows_read = 0
+    processing_errors = []
+    date_formats = {}
+    with trace.span('merge') as span:
+        for result in results:
+            rows_read += result['rows_read']
+            if result.get('failed'):
+                failed_files.append(result['name'])
+            if not result['processed'].empty:
+                all_data.append(result['processed'])
+                data_files.append(result['name'])
+                if dedup_index is not None:
+                    dedup_index.add(result['processed'])
+            accumulator.merge(result['accumulator'])
+            processing_errors.extend(result['errors'])
+            if result['date_formats']:
+                date_formats[result['name']] = result['date_formats']
+        span['rows'] = sum(len(frame) for frame in all_data)
+    del results
+
+    if not all_data:
+        raise NoValidDataError(processing_errors)
+
+    dedup_report = None
+    with trace.span('concat') as span:
+        if dedup_index is not None and dedup_index.collapsed:
+            combined_df = dedup_index.deduplicate(all_data)
+            dedup_report = {
+                'policy': dedup_policy,
+                'collapsed': dedup_index.collapsed,
+                'per_file': dict(zip(data_files, dedup_index.removed_per_frame()))
+            }
+        else:
+            combined_df = concat_processed_frames(all_data)
+        span['rows'] = len(combined_df)
+    del all_data, dedup_index
+    with trace.span('metrics', rows=len(combined_df)):
+        if dedup_report:
+            # Per-file accumulators counted the duplicates; recount the kept rows
+            accumulator = MetricsAccumulator.from_frame(combined_df)
+        metrics = accumulator.result(processing_date)
+
+    duplicates = f" ({dedup_report['collapsed']} duplicadas removidas)" if dedup_report else ""
+    return {
+        'processed_data': combined_df,
+        'metrics': metrics,
+        'errors': processing_errors,
+        'date_formats': date_formats,
+        'dedup_report': dedup_report,
+        'store_report': None,
+        'failed_files': failed_files,
+        'rows_read': rows_read,
+        'message': f"Processamento concluído! {len(combined_df)} reclamações analisadas{duplicates}.",
+        'run_info': {'files': len(file_info), 'cached_files': cached_files}
+    }
+
+
+def update_history(file_info: List[Dict[str, Any]], mappings: List[Dict[str, str]], header_row: int,
+                   store_dir: str, calendar: BusinessCalendar | None, trace: RunTrace,
+                   processing_date: datetime,
+                   on_progress: Callable[[float, str], Any] | None = None) -> Dict[str, Any]:
+    """
+    Add the reports to the persistent complaint history, processing only new or changed rows
+
+    Args:
+        file_info: Validated reports ('report', 'name'), in upload order
+        mappings: Column mapping of each report
+        header_row: Row number where headers are located (1-based)
+        store_dir: Directory of the complaint store
+        calendar: Business calendar of the SLA counts (None counts calendar days)
+        trace: Trace receiving the spans of the run
+        processing_date: Reference date of the run
+        on_progress: Called with (fraction_done, message)
+
+    Returns:
+        Analysis dictionary (see run_analysis) of the whole history
+    """
+    processor = ComplaintProcessor(calendar)
+    processor.processing_date = processing_date
+    processing_errors = []
+    failed_files = []
+    rows_read = 0
+    date_formats = {}
+    store_report = {'files': [], 'unchanged': 0, 'inserted': 0, 'changed': 0}
+    # The lock spans load → update → save: otherwise a concurrent run on the
+    # same history saves over this run's rows, or this run over its rows
+    with ComplaintStore(store_dir).locked() as store:
+        for position, info in enumerate(file_info):
+            if on_progress:
+                on_progress(position / len(file_info), f"Atualizando histórico com {info['name']}...")
+            try:
+                with trace.span('read', info['name']) as span:
+                    raw_df = info['report'].read(header_row, text_columns=text_columns(mappings[position]))
+                    span['rows'] = len(raw_df)
+                with trace.span('store_update', info['name'], len(raw_df)):
+                    summary = store.update(raw_df, info['name'], mappings[position], processor)
+            except Exception as e:
+                processing_errors.append(f"Erro crítico ao processar {info['name']}: {e}")
+                failed_files.append(info['name'])
+                continue
+            rows_read += summary['rows_read']
+            processing_errors.extend(summary['errors'])
+            if summary['date_formats']:
+                date_formats[info['name']] = summary['date_formats']
+            store_report['files'].append(info['name'])
+            for count in ('unchanged', 'inserted', 'changed'):
+                store_report[count] += summary[count]
+
+        with trace.span('metrics', rows=len(store)):
+            combined_df, metrics = store.result(processing_date)
+        if combined_df.empty:
+            raise NoValidDataError(processing_errors)
+        with trace.span('store_save', rows=len(combined_df)):
+            store.save()
+
+    return {
+        'processed_data': combined_df,
+        'metrics': metrics,
+        'errors': processing_errors,
+        'date_formats': date_formats,
+        'dedup_report': None,
+        'store_report': store_report,
+        'failed_files': failed_files,
+        'rows_read': rows_read,
+        'message': f"Histórico atualizado! {store_report['inserted']} novas, {store_report['changed']} alteradas, "
+                   f"{store_report['unchanged']} sem alteração; {len(combined_df)} reclamações no histórico.",
+        'run_info': {'files': len(file_info)}
+    }
+
+
+def run_analysis(file_info: List[Dict[str, Any]], mappings: List[Dict[str, str]], header_row: int,
+                 chunksize: int | None = DEFAULT_CHUNK_SIZE, max_workers: int = 1,
+                 dedup_policy: str | None = DEFAULT_DEDUP_POLICY, store_dir: str | None = None,
+                 calendar: BusinessCalendar | None = None, cache: UploadCache | None = None,
+                 trace: RunTrace | None = None, profiling: bool = False,
+                 processing_date: datetime | None = None, profile_dir: str = DEFAULT_PROFILE_DIR,
+                 on_progress: Callable[[float, str], Any] | None = None) -> Dict[str, Any]:
+    """
+    Full processing run of validated, mapped reports, without any Streamlit call
+
+    Runs in the script thread, in a background job or from the batch
+    runner alike.
+
+    Args:
+        file_info: Validated reports ('report', 'name', 'digest'), in upload order
+        mappings: Column mapping of each report
+        header_row: Row number where headers are located (1-based)
+        chunksize: Rows per chunk for CSV files (None reads whole files)
+        max_workers: Worker processes (1 processes in this process)
+        dedup_policy: Policy for complaints repeated across files (None keeps all)
+        store_dir: Directory of the complaint history to update (None for a one-off analysis)
+        calendar: Business calendar of the SLA counts (None counts calendar days)
+        cache: Cache of parsed and processed files
+        trace: Trace receiving the spans of the run
+        profiling: Write a profile of the run (see profiling.py); files then run in-process
+        processing_date: Reference date of the deadlines and alerts (default: now)
+        profile_dir: Directory of the profile artifacts
+        on_progress: Called with (fraction_done, message)
+
+    Returns:
+        Dictionary with processed_data, filter_index, metrics, errors,
+        date_formats, dedup_report, store_report, failed_files, rows_read,
+        calendar, message, performance and profile_artifacts
+
+    Raises:
+        NoValidDataError: When no valid row could be processed (a ValueError)
+    """
+    trace = trace or RunTrace()
+    cache = cache if cache is not None else UploadCache()
+    processing_date = processing_date or datetime.now()
+
+    profile_run = None
+    if profiling:
+        # Worker processes are invisible to the profiler, so files run in-process
+        max_workers = 1
+        profile_run = ProfileSession(trace.run_id, profile_dir)
+    with profile_run or nullcontext():
+        if store_dir:
+            analysis = update_history(file_info, mappings, header_row, store_dir, calendar, trace,
+                                      processing_date, on_progress)
+        else:
+            analysis = process_reports(file_info, mappings, header_row, chunksize, max_workers, dedup_policy,
+                                       calendar, cache, trace, processing_date, on_progress)
+        with trace.span('index', rows=len(analysis['processed_data'])):
+            analysis['filter_index'] = FilterIndex(analysis['processed_data'])
+
+    analysis['calendar'] = calendar
+    analysis['performance'] = trace.finish(len(analysis['processed_data']), **analysis.pop('run_info'))
+    analysis['profile_artifacts'] = profile_run.artifacts if profile_run is not None else None
+    return analysis
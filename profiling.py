@@ -0,0 +1,165 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+# Profiling of every processing run ('1' turns it on); otherwise runs are
+# profiled on demand from the hidden toggle (?profile=1) or batch --profiling
+PROFILE_ENABLED = os.environ.get('DATAJURIS_PROFILING', '').lower() in ('1', 'true', 'sim')
+DEFAULT_PROFILE_DIR = os.environ.get('DATAJURIS_PROFILING_DIR', 'profiling')
+
+# Sampling interval of the stack sampler, in seconds
+DEFAULT_SAMPLE_INTERVAL = 0.005
+# Bounds on the sampler's work: deepest stack walked and most samples kept
+MAX_STACK_DEPTH = 128
+MAX_SAMPLES = 200_000
+
+
+def _frame_label(code) -> str:
+    """'module.py:function' for a code object (no argument or local values)"""
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stack of one thread at a fixed interval
+
+    Only code locations are kept (file name and function), never frame
+    locals, so the samples carry no complaint data. The cost is one stack
+    walk per interval, independent of how many Python calls the profiled
+    code makes.
+    """
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        """
+        Args:
+            thread_id: Thread to sample (threading.get_ident() of that thread)
+            interval: Seconds between samples
+        """
+        super().__init__(name='datajuris-stack-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter[Tuple[str, ...]] = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval) and self.samples < MAX_SAMPLES:
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.counts[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def stop(self):
+        """Stop sampling and wait for the thread to end"""
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        """Samples in the collapsed-stack format of flamegraph.pl / speedscope ('a;b;c count' per line)"""
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in self.counts.most_common())
+
+
+class ProfileSession:
+    """
+    Profile of one processing run, written as artifacts when the run ends
+
+    Combines cProfile (exact call counts and times, saved as a .pstats
+    file) with a stack sampler (saved as a .collapsed flamegraph file)
+    on the calling thread. Work done in worker processes is not seen, so
+    callers run the files in-process while profiling. Artifacts are
+    written even when the run ends with an exception (including the
+    rerun Streamlit raises at the end of processing).
+
+    Usage:
+        session = ProfileSession(run_id)
+        with session:
+            process(...)
+        session.artifacts  # {'pstats': path, 'collapsed': path, 'summary': path}
+    """
+
+    def __init__(self, run_id: str | None = None, directory: str = DEFAULT_PROFILE_DIR,
+                 interval: float = DEFAULT_SAMPLE_INTERVAL, deterministic: bool = True):
+        """
+        Args:
+            run_id: Run identifier used in the artifact names (same as the RunTrace run id)
+            directory: Directory of the artifacts
+            interval: Seconds between stack samples
+            deterministic: Also run cProfile (adds per-call overhead to the row-wise engine)
+        """
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.directory = directory
+        self.interval = interval
+        self.deterministic = deterministic
+        # Filled when the session ends; the same dictionary object is kept
+        self.artifacts: Dict[str, str] = {}
+        self._profiler: cProfile.Profile | None = None
+        self._sampler: StackSampler | None = None
+        self._started = 0.0
+
+    def __enter__(self) -> 'ProfileSession':
+        self._started = time.perf_counter()
+        self._sampler = StackSampler(threading.get_ident(), self.interval)
+        self._sampler.start()
+        if self.deterministic:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self._profiler is not None:
+            self._profiler.disable()
+        self._sampler.stop()
+        try:
+            self.write(time.perf_counter() - self._started, exc_type)
+        except OSError as e:
+            # A profile that cannot be saved must not fail the run it measured
+            self.artifacts['error'] = str(e)
+        return False
+
+    def write(self, seconds: float, exc_type: type | None = None):
+        """Write the artifacts of the finished session"""
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.join(self.directory, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{self.run_id}")
+
+        if self._profiler is not None:
+            self.artifacts['pstats'] = f"{stem}.pstats"
+            self._profiler.dump_stats(self.artifacts['pstats'])
+
+        self.artifacts['collapsed'] = f"{stem}.collapsed"
+        with open(self.artifacts['collapsed'], 'w', encoding='utf-8') as f:
+            f.write(self._sampler.collapsed())
+
+        summary = {
+            'run': self.run_id,
+            'seconds': round(seconds, 3),
+            'samples': self._sampler.samples,
+            'sample_interval': self.interval,
+            'ended_with': exc_type.__name__ if exc_type is not None else None,
+            'top_functions': self.top_functions() if self._profiler is not None else []
+        }
+        self.artifacts['summary'] = f"{stem}.json"
+        with open(self.artifacts['summary'], 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    def top_functions(self, limit: int = 25) -> list[Dict[str, Any]]:
+        """Functions with the most cumulative time, from the cProfile data"""
+        stats = pstats.Stats(self._profiler).stats
+        ranked = sorted(stats.items(), key=lambda item: -item[1][3])[:limit]
+        return [{
+            'function': f"{os.path.basename(filename)}:{line}:{name}",
+            'calls': calls,
+            'total_seconds': round(total, 4),
+            'cumulative_seconds': round(cumulative, 4)
+        } for (filename, line, name), (_, calls, total, cumulative, _) in ranked]
@@ -0,0 +1,344 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from business_calendar import BusinessCalendar, calendar_from_description
+from filter_index import FilterIndex
+from snapshot import SNAPSHOT_EXTENSION, load_snapshot, save_snapshot
+from upload_cache import cache_file_path, estimate_size, evict_lru_files
+
+# Memory of the analyses shared by every session of the server process
+DEFAULT_SHARED_MEMORY_BUDGET = int(os.environ.get('DATAJURIS_SHARED_CACHE_MB', 1024)) * 1024 * 1024
+# Optional directory where shared analyses are also kept as Parquet snapshots
+SHARED_CACHE_DIR = os.environ.get('DATAJURIS_SHARED_CACHE_DIR')
+DEFAULT_DISK_BUDGET = 4 * 1024 * 1024 * 1024  # 4GB
+# A session that has not shown its analysis for this long no longer holds it
+DEFAULT_HOLDER_TTL = 60 * 60
+
+logger = logging.getLogger('datajuris.shared_results')
+
+
+def analysis_key(file_info: List[Dict[str, Any]], mappings: List[Dict[str, str]], header_row: int,
+                 processing_day: date, chunksize: int | None, dedup_policy: str | None,
+                 calendar: BusinessCalendar | None) -> Tuple:
+    """
+    Key of a one-off analysis of a set of reports
+
+    Besides the file contents, names (stored in source_file), mappings
+    and header row, the key holds everything else the result depends on:
+    the processing day (the as-of date of every day count), the
+    deduplication policy, the SLA calendar and whether CSVs were read in
+    chunks (dates are parsed per chunk).
+    """
+    files = tuple((info['digest'], info['name']) for info in file_info)
+    mapping = json.dumps(mappings, sort_keys=True)
+    return ('analysis', files, mapping, header_row, processing_day.isoformat(), bool(chunksize), dedup_policy,
+            calendar and calendar.key)
+
+
+def _value_buffers(values: Any) -> List[np.ndarray]:
+    """numpy arrays backing a column (data, mask, categorical codes), object arrays excluded"""
+    if isinstance(values, np.ndarray):
+        return [values]
+    buffers = []
+    for attribute in ('_ndarray', '_data', '_mask', '_codes'):
+        buffer = getattr(values, attribute, None)
+        if isinstance(buffer, np.ndarray):
+            buffers.append(buffer)
+    # pandas' Cython helpers (memory_usage, hashing) need writable object arrays
+    return [buffer for buffer in buffers if buffer.dtype != object]
+
+
+def make_read_only(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Mark the arrays of a frame as read-only, in place
+
+    Every session showing a shared analysis holds the same arrays; an
+    in-place write would change the data of the other sessions, so it
+    raises instead. Free-text object columns stay writable, because
+    pandas cannot read read-only object arrays. Derived frames (filters,
+    as-of recomputation) are built from copies or new columns.
+    """
+    for column in df.columns:
+        for buffer in _value_buffers(df[column].array):
+            # Columns are views of 2D blocks; later views come from the block array
+            while isinstance(buffer, np.ndarray):
+                buffer.flags.writeable = False
+                buffer = buffer.base
+    return df
+
+
+class SharedResultCache:
+    """
+    Process-wide cache of finished analyses, shared between sessions
+
+    Sessions that upload the same reports with the same mapping and
+    settings on the same day get the same analysis object: one processed
+    frame, filter index and metrics, held read-only, instead of a copy per
+    session. Each session registers as a holder of the analysis it shows
+    (see hold/release); only analyses nobody holds are evicted, least
+    recently used first, when the memory budget is exceeded. When every
+    analysis is held the cache stays over budget (those arrays are alive
+    in the sessions anyway): over_budget is set and a warning is logged.
+    With a disk directory, analyses are also written as Parquet snapshots
+    and loaded back after eviction or a server restart, without
+    reprocessing the reports.
+
+    An analysis being computed is recorded with its job id, so a second
+    session asking for it follows the running job instead of starting
+    another one.
+
+    Safe to use from the script threads of all sessions and from jobs.
+    """
+
+    def __init__(self, max_memory_bytes: int = DEFAULT_SHARED_MEMORY_BUDGET, disk_dir: str | None = SHARED_CACHE_DIR,
+                 max_disk_bytes: int = DEFAULT_DISK_BUDGET, holder_ttl: float = DEFAULT_HOLDER_TTL):
+        """
+        Args:
+            max_memory_bytes: Budget of the analyses kept in memory
+            disk_dir: Directory of the optional disk tier (None keeps analyses in memory only)
+            max_disk_bytes: Budget of the disk tier
+            holder_ttl: Seconds after which a holder that was not refreshed is dropped
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_dir = disk_dir
+        self.holder_ttl = holder_ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._sizes: Dict[Tuple, int] = {}
+        self._holders: Dict[Tuple, Dict[str, float]] = {}
+        self._pending: Dict[Tuple, str] = {}
+        self.memory_bytes = 0
+        self.over_budget = False
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def acquire(self, key: Tuple, holder: str) -> Dict[str, Any] | None:
+        """
+        Shared analysis for a key, registering the holder (None on a miss)
+
+        Args:
+            key: Key from analysis_key
+            holder: Identifier of the session that will show the analysis
+
+        Returns:
+            The shared analysis dictionary, or None when it is not cached
+        """
+        with self._lock:
+            analysis = self._entries.get(key)
+            if analysis is None:
+                analysis = self._load_from_disk(key)
+                if analysis is None:
+                    self.misses += 1
+                    return None
+                self._store_in_memory(key, analysis)
+            self.hits += 1
+            self._entries.move_to_end(key)
+            self._holders.setdefault(key, {})[holder] = time.time()
+            return analysis
+
+    def publish(self, key: Tuple, analysis: Dict[str, Any], holder: str | None = None) -> Dict[str, Any]:
+        """
+        Share a finished analysis
+
+        The processed frame is made read-only and the key is stored in the
+        analysis ('shared_key'). When another run already published the
+        same key, that analysis is kept and returned, so every session
+        ends up on one copy. Either way the holder is registered.
+
+        Args:
+            key: Key from analysis_key
+            analysis: Result of pipeline.run_analysis
+            holder: Identifier of the session that ran the analysis
+
+        Returns:
+            The shared analysis
+        """
+        with self._lock:
+            self._pending.pop(key, None)
+            if holder is not None:
+                # Registered before storing, so the new entry is not evicted at once
+                self._holders.setdefault(key, {})[holder] = time.time()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            make_read_only(analysis['processed_data'])
+            analysis['shared_key'] = key
+            self._store_in_memory(key, analysis)
+        self._save_to_disk(key, analysis)
+        return analysis
+
+    def compute(self, key: Tuple, holder: str | None, function: Callable[..., Dict[str, Any]],
+                *args, **kwargs) -> Dict[str, Any]:
+        """
+        Run an analysis and publish it; used as a job function
+
+        Args:
+            key: Key from analysis_key
+            holder: Identifier of the session that submitted the run
+            function: Analysis function (pipeline.run_analysis)
+            *args: Positional arguments of the function
+            **kwargs: Keyword arguments of the function
+
+        Returns:
+            The shared analysis
+        """
+        try:
+            analysis = function(*args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self._pending.pop(key, None)
+            raise
+        return self.publish(key, analysis, holder)
+
+    def hold(self, key: Tuple, holder: str):
+        """Register (or refresh) a session as holder of a cached analysis"""
+        with self._lock:
+            if key in self._entries:
+                self._holders.setdefault(key, {})[holder] = time.time()
+
+    def release(self, key: Tuple, holder: str):
+        """A session stops showing an analysis; it can then be evicted"""
+        with self._lock:
+            holders = self._holders.get(key)
+            if holders is not None:
+                holders.pop(holder, None)
+            self._evict_memory()
+
+    def pending_job(self, key: Tuple) -> str | None:
+        """Id of the job computing an analysis (None when none is running)"""
+        with self._lock:
+            return self._pending.get(key)
+
+    def mark_pending(self, key: Tuple, job_id: str):
+        """Record the job computing an analysis"""
+        with self._lock:
+            if key not in self._entries:
+                self._pending[key] = job_id
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache usage summary"""
+        with self._lock:
+            self._expire_holders()
+            return {
+                'entries': len(self._entries),
+                'held': sum(1 for key in self._entries if self._holders.get(key)),
+                'holders': sum(len(holders) for holders in self._holders.values()),
+                'pending': len(self._pending),
+                'memory_bytes': self.memory_bytes,
+                'max_memory_bytes': self.max_memory_bytes,
+                'over_budget': self.over_budget,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _store_in_memory(self, key: Tuple, analysis: Dict[str, Any]):
+        """Add an analysis to the memory tier and enforce its budget (lock held)"""
+        size = estimate_size(analysis['processed_data'])
+        self._entries[key] = analysis
+        self._sizes[key] = size
+        self.memory_bytes += size
+        self._evict_memory()
+
+    def _evict_memory(self):
+        """Drop least recently used analyses nobody holds while over budget (lock held)"""
+        if self.memory_bytes > self.max_memory_bytes:
+            self._expire_holders()
+            for key in list(self._entries):
+                if self.memory_bytes <= self.max_memory_bytes:
+                    break
+                if self._holders.get(key):
+                    # Sessions keep these arrays alive anyway; dropping them would only cause a copy later
+                    continue
+                del self._entries[key]
+                self._holders.pop(key, None)
+                self.memory_bytes -= self._sizes.pop(key, 0)
+
+        over_budget = self.memory_bytes > self.max_memory_bytes
+        if over_budget and not self.over_budget:
+            logger.warning("Shared result cache over budget: %.1f MB held by sessions, budget %.1f MB "
+                           "(%d analyses, all in use)", self.memory_bytes / 2**20, self.max_memory_bytes / 2**20,
+                           len(self._entries))
+        self.over_budget = over_budget
+
+    def _expire_holders(self):
+        """Forget holders not refreshed within holder_ttl, such as closed browser tabs (lock held)"""
+        limit = time.time() - self.holder_ttl
+        for key in list(self._holders):
+            holders = self._holders[key]
+            for holder in [holder for holder, seen in holders.items() if seen < limit]:
+                del holders[holder]
+            if not holders:
+                del self._holders[key]
+
+    def _disk_path(self, key: Tuple) -> str:
+        """Snapshot file of an analysis in the disk tier"""
+        return cache_file_path(self.disk_dir, key, SNAPSHOT_EXTENSION)
+
+    def _load_from_disk(self, key: Tuple) -> Dict[str, Any] | None:
+        """Load an analysis back from the disk tier"""
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            df, metrics, info = load_snapshot(path)
+            os.utime(path)  # Mark as recently used for disk eviction
+        except Exception:
+            return None
+        extra = info['extra']
+        return {
+            'processed_data': make_read_only(df),
+            'filter_index': FilterIndex(df),
+            'metrics': metrics,
+            'errors': extra.get('errors', []),
+            'date_formats': extra.get('date_formats', {}),
+            'dedup_report': extra.get('dedup_report'),
+            'store_report': None,
+            'failed_files': extra.get('failed_files', []),
+            'rows_read': extra.get('rows_read', len(df)),
+            'calendar': calendar_from_description(extra.get('calendar')),
+            'message': extra.get('message', ''),
+            'performance': extra.get('performance') or {'run': '-', 'seconds': 0.0, 'rows': len(df), 'spans': []},
+            'profile_artifacts': None,
+            'shared_key': key
+        }
+
+    def _save_to_disk(self, key: Tuple, analysis: Dict[str, Any]):
+        """Write an analysis to the disk tier and enforce its budget"""
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        calendar = analysis['calendar']
+        extra = {
+            'errors': analysis['errors'],
+            'failed_files': analysis['failed_files'],
+            'rows_read': analysis['rows_read'],
+            'date_formats': analysis['date_formats'],
+            'dedup_report': analysis['dedup_report'],
+            'calendar': calendar.describe() if calendar is not None else None,
+            'message': analysis['message'],
+            'performance': analysis['performance']
+        }
+        try:
+            save_snapshot(analysis['processed_data'], analysis['metrics'], path + '.tmp', extra)
+            os.replace(path + '.tmp', path)
+        except Exception:
+            # The disk tier is an optimization; the analysis stays shared in memory
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """Remove least recently used snapshots while the disk tier is over budget"""
+        evict_lru_files(self.disk_dir, SNAPSHOT_EXTENSION, self.max_disk_bytes)
@@ -0,0 +1,256 @@
+import pandas as pd
+import numpy as np
+import csv
+import io
+import itertools
+import math
+import os
+import zipfile
+from datetime import time
+from typing import Any, Iterator, List
+from xml.etree.ElementTree import iterparse
+from pandas.io.parsers import TextParser
+
+# Cell conversions follow pandas' own Excel readers, so headers and previews
+# read here have the same column names as the later full pd.read_excel
+
+ODF_TABLE = '{urn:oasis:names:tc:opendocument:xmlns:table:1.0}'
+ODF_OFFICE = '{urn:oasis:names:tc:opendocument:xmlns:office:1.0}'
+ODF_TEXT = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+
+
+def _numeric_cell(value: float) -> int | float:
+    """Excel numbers are floats; whole values are read as int like pandas does"""
+    if isinstance(value, float) and math.isfinite(value) and value == int(value):
+        return int(value)
+    return value
+
+
+def _xlsx_rows(data: bytes, n_rows: int) -> Iterator[List[Any]]:
+    """First rows of the first sheet of an .xlsx file, streamed in read-only mode"""
+    from openpyxl import load_workbook
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[0]
+        ws.reset_dimensions()
+        for row_number, row in enumerate(ws.rows):
+            if row_number >= n_rows:
+                break
+            values = []
+            for cell in row:
+                if cell.value is None:
+                    values.append('')
+                elif cell.data_type == TYPE_ERROR:
+                    values.append(np.nan)
+                elif cell.data_type == TYPE_NUMERIC:
+                    values.append(_numeric_cell(cell.value))
+                else:
+                    values.append(cell.value)
+            while values and values[-1] == '':
+                values.pop()
+            yield values
+    finally:
+        wb.close()
+
+
+def _xls_rows(data: bytes, n_rows: int) -> Iterator[List[Any]]:
+    """First rows of the first sheet of a legacy .xls file (sheets loaded on demand)"""
+    import xlrd
+    from xlrd import XL_CELL_BOOLEAN, XL_CELL_DATE, XL_CELL_ERROR, XL_CELL_NUMBER, xldate
+
+    book = xlrd.open_workbook(file_contents=data, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        for i in range(min(sheet.nrows, n_rows)):
+            values = []
+            for value, cell_type in zip(sheet.row_values(i), sheet.row_types(i)):
+                if cell_type == XL_CELL_DATE:
+                    try:
+                        value = xldate.xldate_as_datetime(value, book.datemode)
+                    except OverflowError:
+                        pass
+                    else:
+                        # Dates on the epoch are times only
+                        if value.timetuple()[0:3] in ((1899, 12, 31), (1904, 1, 1)):
+                            value = time(value.hour, value.minute, value.second, value.microsecond)
+                elif cell_type == XL_CELL_ERROR:
+                    value = np.nan
+                elif cell_type == XL_CELL_BOOLEAN:
+                    value = bool(value)
+                elif cell_type == XL_CELL_NUMBER:
+                    value = _numeric_cell(value)
+                values.append(value)
+            yield values
+    finally:
+        book.release_resources()
+
+
+def _odf_text(element) -> str:
+    """Text of an OpenDocument cell, expanding text:s runs of spaces"""
+    parts = [element.text.strip('\n')] if element.text else []
+    for child in element:
+        if child.tag == f'{ODF_TEXT}s':
+            parts.append(' ' * int(child.get(f'{ODF_TEXT}c', 1)))
+        elif child.tag != f'{ODF_OFFICE}annotation':
+            parts.append(_odf_text(child))
+        if child.tail:
+            parts.append(child.tail.strip('\n'))
+    return ''.join(parts)
+
+
+def _odf_cell_value(cell) -> Any:
+    """Value of an OpenDocument table cell"""
+    if cell.tag == f'{ODF_TABLE}covered-table-cell':
+        return ''
+    value_type = cell.get(f'{ODF_OFFICE}value-type')
+    if value_type is None:
+        return ''
+    if _odf_text(cell) == '#N/A':
+        return np.nan
+    if value_type == 'boolean':
+        return _odf_text(cell) == 'TRUE'
+    if value_type == 'float':
+        return _numeric_cell(float(cell.get(f'{ODF_OFFICE}value')))
+    if value_type in ('percentage', 'currency'):
+        return float(cell.get(f'{ODF_OFFICE}value'))
+    if value_type == 'string':
+        return _odf_text(cell)
+    if value_type == 'date':
+        return pd.Timestamp(cell.get(f'{ODF_OFFICE}date-value'))
+    if value_type == 'time':
+        return pd.Timestamp(_odf_text(cell)).time()
+    raise ValueError(f"Unrecognized type {value_type}")
+
+
+def _ods_rows(data: bytes, n_rows: int) -> Iterator[List[Any]]:
+    """First rows of the first sheet of an .ods file, parsed incrementally from content.xml"""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive, archive.open('content.xml') as content:
+        rows_done = 0
+        empty_rows = 0
+        for event, element in iterparse(content, events=('end',)):
+            if element.tag == f'{ODF_TABLE}table':
+                break  # Only the first sheet
+            if element.tag != f'{ODF_TABLE}table-row':
+                continue
+
+            values = []
+            empty_cells = 0
+            for cell in element:
+                if cell.tag not in (f'{ODF_TABLE}table-cell', f'{ODF_TABLE}covered-table-cell'):
+                    continue
+                value = _odf_cell_value(cell)
+                repeat = int(cell.get(f'{ODF_TABLE}number-columns-repeated', 1))
+                # Empty cells only count when some content follows them
+                if value == '':
+                    empty_cells += repeat
+                else:
+                    values.extend([''] * empty_cells)
+                    empty_cells = 0
+                    values.extend([value] * repeat)
+
+            repeat = int(element.get(f'{ODF_TABLE}number-rows-repeated', 1))
+            element.clear()
+            if not values:
+                empty_rows += repeat
+                continue
+
+            # Blank rows are only kept when some content follows them. Like
+            # pandas' reader, the whole batch is emitted before the row limit
+            # is checked, so the sheet width comes out the same
+            for _ in range(empty_rows):
+                yield ['']
+            for _ in range(repeat):
+                yield list(values)
+            rows_done += empty_rows + repeat
+            empty_rows = 0
+            if rows_done >= n_rows:
+                return
+
+
+def _csv_rows(data: bytes, n_rows: int) -> Iterator[List[Any]]:
+    """First rows of a CSV file (blank lines skipped, as pd.read_csv counts header rows)"""
+    text = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', errors='replace', newline='')
+    rows = (row for row in csv.reader(text) if row)
+    yield from itertools.islice(rows, n_rows)
+
+
+def iter_head_rows(data: bytes, filename: str, n_rows: int) -> Iterator[List[Any]]:
+    """
+    Stream the first rows of the first sheet of a report
+
+    Only the rows asked for are read: .xlsx goes through openpyxl's
+    read-only mode, .ods through an incremental parse of content.xml and
+    .xls through xlrd with sheets loaded on demand.
+
+    Args:
+        data: Raw file contents
+        filename: Name of the file (its extension picks the reader)
+        n_rows: Number of sheet rows to read
+
+    Yields:
+        Lists of cell values ('' for empty cells)
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        yield from _csv_rows(data, n_rows)
+    elif extension == '.ods':
+        yield from _ods_rows(data, n_rows)
+    elif extension == '.xls':
+        yield from _xls_rows(data, n_rows)
+    else:
+        yield from _xlsx_rows(data, n_rows)
+
+
+def head_rows(data: bytes, filename: str, n_rows: int) -> List[List[Any]]:
+    """
+    First rows of a report as a rectangular grid, trailing empty rows trimmed
+
+    Args:
+        data: Raw file contents
+        filename: Name of the file
+        n_rows: Number of sheet rows to read
+
+    Returns:
+        List of rows, all of the same width
+    """
+    rows = []
+    last_row_with_data = -1
+    for row in iter_head_rows(data, filename, n_rows):
+        if row:
+            last_row_with_data = len(rows)
+        rows.append(row)
+    rows = rows[:last_row_with_data + 1]
+
+    width = max((len(row) for row in rows), default=0)
+    return [row + [''] * (width - len(row)) for row in rows]
+
+
+def read_head(data: bytes, filename: str, header_row: int = 1, nrows: int = 5) -> pd.DataFrame:
+    """
+    Read the header and the first data rows of a spreadsheet without a full parse
+
+    CSV files are read with pd.read_csv, which already stops after nrows.
+
+    Args:
+        data: Raw file contents
+        filename: Name of the file
+        header_row: Row number where headers are located (1-based)
+        nrows: Number of data rows to read (0 reads only the header)
+
+    Returns:
+        Raw dataframe with the same columns as a full pd.read_excel
+    """
+    if filename.lower().endswith('.csv'):
+        return pd.read_csv(io.BytesIO(data), header=header_row - 1, nrows=nrows)
+
+    rows = head_rows(data, filename, header_row + nrows)
+    if len(rows) < header_row:
+        raise ValueError(f"Linha do cabeçalho {header_row} não encontrada em {filename}")
+
+    parser = TextParser(rows, header=header_row - 1, nrows=nrows, skip_blank_lines=False)
+    try:
+        return parser.read(nrows=nrows)
+    finally:
+        parser.close()
@@ -0,0 +1,177 @@
+import pandas as pd
+import numpy as np
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, List, Tuple
+from complaint_schema import CATEGORICAL_COLUMNS, apply_complaint_schema
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is listed in requirements.txt
+    pa = None
+    pq = None
+
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_EXTENSION = '.parquet'
+METADATA_KEY = b'datajuris.snapshot'
+
+
+def _require_pyarrow():
+    """Fail with a clear message when pyarrow is not installed"""
+    if pa is None:
+        raise ImportError("pyarrow é necessário para salvar e abrir análises (pip install pyarrow)")
+
+
+def metrics_to_json(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert the metrics dictionary into JSON-compatible values"""
+    serialized = {}
+    for key, value in metrics.items():
+        if key == 'company_breakdown':
+            serialized[key] = {
+                'index_name': value.index.name,
+                'index': value.index.tolist(),
+                'columns': value.columns.tolist(),
+                'data': [[None if pd.isna(item) else item for item in row] for row in value.to_numpy().tolist()]
+            }
+        elif key == 'processing_date':
+            serialized[key] = value.isoformat()
+        elif key == 'alert_breakdown':
+            serialized[key] = [[alert, int(count)] for alert, count in value.items()]
+        elif isinstance(value, np.generic):
+            serialized[key] = value.item()
+        else:
+            serialized[key] = value
+    return serialized
+
+
+def metrics_from_json(serialized: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild the metrics dictionary saved by metrics_to_json"""
+    metrics = dict(serialized)
+    metrics['processing_date'] = datetime.fromisoformat(serialized['processing_date'])
+    metrics['alert_breakdown'] = {alert: count for alert, count in serialized['alert_breakdown']}
+
+    breakdown = serialized['company_breakdown']
+    if breakdown['columns']:
+        company_breakdown = pd.DataFrame(breakdown['data'], index=breakdown['index'], columns=breakdown['columns'])
+        for column in company_breakdown.columns:
+            if column != 'Tempo Médio (dias)':
+                company_breakdown[column] = company_breakdown[column].astype('int64')
+        company_breakdown['Tempo Médio (dias)'] = company_breakdown['Tempo Médio (dias)'].astype(float)
+        company_breakdown.index.name = breakdown['index_name']
+    else:
+        company_breakdown = pd.DataFrame()
+    metrics['company_breakdown'] = company_breakdown
+    return metrics
+
+
+def save_snapshot(df: pd.DataFrame, metrics: Dict[str, Any], destination: str | BinaryIO | None = None,
+                  extra_metadata: Dict[str, Any] | None = None) -> bytes | None:
+    """
+    Save a processed complaints frame and its metrics as a Parquet snapshot
+
+    Args:
+        df: Processed complaints dataframe
+        metrics: Calculated metrics dictionary
+        destination: File path or binary file object (None returns the bytes)
+        extra_metadata: Additional JSON-compatible information stored with the snapshot
+
+    Returns:
+        Snapshot bytes when no destination is given, otherwise None
+    """
+    _require_pyarrow()
+
+    # Repeated text columns are stored dictionary-encoded
+    table_df = df.copy()
+    for column in CATEGORICAL_COLUMNS:
+        if column in table_df.columns and not isinstance(table_df[column].dtype, pd.CategoricalDtype):
+            table_df[column] = table_df[column].astype('category')
+
+    table = pa.Table.from_pandas(table_df, preserve_index=False)
+    snapshot_metadata = {
+        'version': SNAPSHOT_FORMAT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'rows': len(df),
+        'metrics': metrics_to_json(metrics),
+        'extra': extra_metadata or {}
+    }
+    metadata = dict(table.schema.metadata or {})
+    metadata[METADATA_KEY] = json.dumps(snapshot_metadata, ensure_ascii=False).encode('utf-8')
+    table = table.replace_schema_metadata(metadata)
+
+    if destination is None:
+        output = io.BytesIO()
+        pq.write_table(table, output, compression='zstd')
+        return output.getvalue()
+
+    pq.write_table(table, destination, compression='zstd')
+    return None
+
+
+def load_snapshot(source: str | bytes | BinaryIO) -> Tuple[pd.DataFrame, Dict[str, Any], Dict[str, Any]]:
+    """
+    Load a snapshot saved by save_snapshot
+
+    The zstd-compressed pages are decompressed and the whole frame is
+    materialized, so memory use is that of the loaded frame.
+
+    Args:
+        source: File path, snapshot bytes or binary file object
+
+    Returns:
+        Tuple of (processed_dataframe, metrics, snapshot_info)
+    """
+    _require_pyarrow()
+
+    if isinstance(source, (bytes, bytearray)):
+        source = pa.BufferReader(source)
+    table = pq.read_table(source)
+
+    metadata = (table.schema.metadata or {}).get(METADATA_KEY)
+    if metadata is None:
+        raise ValueError("Arquivo não é uma análise salva por este sistema")
+
+    snapshot_metadata = json.loads(metadata.decode('utf-8'))
+    version = snapshot_metadata.get('version')
+    if version != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Versão de análise salva não suportada: {version} (esperada {SNAPSHOT_FORMAT_VERSION})")
+
+    df = apply_complaint_schema(table.to_pandas())
+    metrics = metrics_from_json(snapshot_metadata['metrics'])
+    info = {
+        'version': version,
+        'created_at': snapshot_metadata['created_at'],
+        'rows': snapshot_metadata['rows'],
+        'extra': snapshot_metadata.get('extra', {})
+    }
+    return df, metrics, info
+
+
+def list_snapshots(directory: str) -> List[Dict[str, Any]]:
+    """
+    List the snapshots saved in a directory, newest first
+
+    Args:
+        directory: Snapshot directory
+
+    Returns:
+        List of dictionaries with name, path, size and modification time
+    """
+    if not directory or not os.path.isdir(directory):
+        return []
+
+    snapshots = []
+    for name in os.listdir(directory):
+        if not name.endswith(SNAPSHOT_EXTENSION):
+            continue
+        path = os.path.join(directory, name)
+        stat = os.stat(path)
+        snapshots.append({
+            'name': name,
+            'path': path,
+            'size': stat.st_size,
+            'modified': datetime.fromtimestamp(stat.st_mtime)
+        })
+    return sorted(snapshots, key=lambda snapshot: snapshot['modified'], reverse=True)
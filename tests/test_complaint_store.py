@@ -0,0 +1,53 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from benchmark import REPORT_COLUMNS, generate_report, write_report
+from complaint_store import ComplaintStore
+from pipeline import run_analysis
+from upload_session import UploadedReport
+
+PROCESSING_DATE = datetime(2025, 6, 30)
+
+
+def report_info(directory, name, df):
+    """File info of a report written to directory"""
+    write_report(df, str(directory / name))
+    report = UploadedReport((directory / name).read_bytes(), name)
+    return {'report': report, 'name': name, 'digest': report.digest}
+
+
+def update(store_dir, info):
+    """Add one report to the history"""
+    return run_analysis([info], [REPORT_COLUMNS], 1, store_dir=str(store_dir), processing_date=PROCESSING_DATE)
+
+
+def test_same_report_in_another_format_matches_stored_rows(tmp_path):
+    df = generate_report(1_000)
+    first = update(tmp_path / 'store', report_info(tmp_path, 'report.xlsx', df))
+    second = update(tmp_path / 'store', report_info(tmp_path, 'report.csv', df))
+
+    assert second['store_report']['inserted'] == 0
+    assert len(second['processed_data']) == len(first['processed_data'])
+    assert not second['processed_data']['case_id'].str.endswith('.0').any()
+
+
+def test_concurrent_updates_keep_both_runs_rows(tmp_path):
+    # Generated protocol numbers start at the same value whatever the seed; move the second report's elsewhere
+    first_df = generate_report(1_000, seed=1)
+    second_df = generate_report(1_000, seed=2)
+    second_df[REPORT_COLUMNS['id_case']] = second_df[REPORT_COLUMNS['id_case']].str.replace('2025', '2026', n=1)
+    infos = [report_info(tmp_path, 'first.csv', first_df), report_info(tmp_path, 'second.csv', second_df)]
+
+    results = {}
+    threads = [threading.Thread(target=lambda info=info: results.update({info['name']: update(tmp_path / 'store', info)}))
+               for info in infos]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    inserted = sum(result['store_report']['inserted'] for result in results.values())
+    assert len(ComplaintStore(str(tmp_path / 'store')).load()) == inserted
+    assert max(len(result['processed_data']) for result in results.values()) == inserted
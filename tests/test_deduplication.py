@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from benchmark import REPORT_COLUMNS, generate_report, write_report
+from deduplication import complaint_keys
+from pipeline import run_analysis
+from upload_session import UploadedReport
+
+PROCESSING_DATE = datetime(2025, 6, 30)
+
+
+@pytest.fixture(scope='module')
+def same_report_twice(tmp_path_factory):
+    """One generated report (with blank IDs, which make numeric ID columns float) as CSV and as XLSX"""
+    df = generate_report(2_000)
+    assert (df[REPORT_COLUMNS['id_case']] == '').any()
+    directory = tmp_path_factory.mktemp('reports')
+    file_info = []
+    for name in ('report.csv', 'report.xlsx'):
+        write_report(df, str(directory / name))
+        report = UploadedReport((directory / name).read_bytes(), name)
+        file_info.append({'report': report, 'name': name, 'digest': report.digest})
+    return file_info
+
+
+@pytest.mark.parametrize('chunksize', [500, None], ids=['chunked_csv', 'whole_csv'])
+def test_same_report_in_csv_and_xlsx_is_deduplicated(same_report_twice, chunksize):
+    analysis = run_analysis(same_report_twice, [REPORT_COLUMNS] * 2, 1, chunksize=chunksize,
+                            dedup_policy='latest_file', processing_date=PROCESSING_DATE)
+
+    rows = analysis['processed_data']
+    assert analysis['dedup_report']['collapsed'] == len(rows)
+    assert analysis['dedup_report']['per_file'] == {'report.csv': len(rows), 'report.xlsx': 0}
+    assert not rows['case_id'].str.endswith('.0').any()
+
+
+def test_complaint_keys_ignore_float_suffix_and_padding():
+    df = pd.DataFrame({
+        'case_id': ['202500000000', '202500000000.0', ' 202500000000 ', 'A-1.0'],
+        'company_name': ['Banco', 'Banco', 'Banco', 'Banco']
+    })
+    keys = complaint_keys(df)
+    assert keys[0] == keys[1] == keys[2]
+    assert keys[3] == 'A-1.0\x1fBanco'
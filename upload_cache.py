@@ -0,0 +1,221 @@
+import pandas as pd
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Tuple
+
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024  # 512MB
+DEFAULT_DISK_BUDGET = 2 * 1024 * 1024 * 1024  # 2GB
+
+
+def file_digest(data: bytes) -> str:
+    """Content hash of an uploaded file"""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def raw_frame_key(digest: str, header_row: int, text_columns: List[str] | None = None) -> Tuple:
+    """Cache key of a parsed (unprocessed) file, by the columns read as text"""
+    return ('raw', digest, header_row, tuple(sorted(text_columns or ())))
+
+
+def processed_result_key(digest: str, filename: str, header_row: int, column_mapping: Dict[str, str],
+                         chunksize: int | None, processing_day: date, calendar_key: str | None = None) -> Tuple:
+    """
+    Cache key of a processed file
+
+    The file name is part of the key because it is stored in source_file,
+    and the processing day and SLA calendar (None for calendar days)
+    because day counts depend on them.
+    """
+    mapping = json.dumps(column_mapping, sort_keys=True)
+    return ('processed', digest, filename, header_row, mapping, bool(chunksize), processing_day.isoformat(),
+            calendar_key)
+
+
+def cache_file_path(directory: str, key: Tuple, extension: str) -> str:
+    """File of a cache entry in a disk tier, named after a hash of its key"""
+    name = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=20).hexdigest()
+    return os.path.join(directory, f"{name}{extension}")
+
+
+def evict_lru_files(directory: str, extension: str, max_bytes: int):
+    """
+    Remove least recently used files of a disk tier while it is over budget
+
+    Files are ordered by modification time, which readers refresh with
+    os.utime on every hit.
+
+    Args:
+        directory: Directory of the disk tier
+        extension: Extension of its entry files
+        max_bytes: Budget of the directory
+    """
+    files = []
+    for name in os.listdir(directory):
+        if not name.endswith(extension):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            continue
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a cached value in bytes"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sum(estimate_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value)
+    if isinstance(value, str):
+        return len(value)
+    return 64
+
+
+class UploadCache:
+    """
+    LRU cache of parsed uploads and processed results under a memory/disk budget
+
+    Safe to share between the script thread and background processing jobs.
+    """
+
+    def __init__(self, max_memory_bytes: int = DEFAULT_MEMORY_BUDGET,
+                 disk_dir: str | None = None, max_disk_bytes: int = DEFAULT_DISK_BUDGET):
+        """
+        Args:
+            max_memory_bytes: Budget of the in-memory tier
+            disk_dir: Directory of the optional disk tier (None keeps the cache in memory only)
+            max_disk_bytes: Budget of the disk tier
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_dir = disk_dir
+        self._entries: OrderedDict = OrderedDict()
+        self._sizes: Dict[Tuple, int] = {}
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def get(self, key: Tuple) -> Any | None:
+        """Return a cached value (None on a miss), marking it as recently used"""
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: Tuple) -> Any | None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        value = self._load_from_disk(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._store_in_memory(key, value, estimate_size(value))
+        return value
+
+    def put(self, key: Tuple, value: Any, size: int | None = None):
+        """
+        Cache a value, evicting least recently used entries over budget
+
+        Args:
+            key: Cache key
+            value: Value to cache (must be picklable for the disk tier)
+            size: Memory footprint in bytes (estimated when omitted)
+        """
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            if key in self._entries:
+                self._remove_from_memory(key)
+            self._store_in_memory(key, value, size)
+            self._save_to_disk(key, value)
+
+    def clear(self):
+        """Drop every in-memory entry (the disk tier is kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.memory_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache usage summary"""
+        return {
+            'entries': len(self._entries),
+            'memory_bytes': self.memory_bytes,
+            'max_memory_bytes': self.max_memory_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def _store_in_memory(self, key: Tuple, value: Any, size: int):
+        """Add an entry to the memory tier and enforce its budget"""
+        if size > self.max_memory_bytes:
+            return
+        self._entries[key] = value
+        self._sizes[key] = size
+        self.memory_bytes += size
+        while self.memory_bytes > self.max_memory_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove_from_memory(oldest)
+
+    def _remove_from_memory(self, key: Tuple):
+        """Drop an entry from the memory tier"""
+        self._entries.pop(key, None)
+        self.memory_bytes -= self._sizes.pop(key, 0)
+
+    def _disk_path(self, key: Tuple) -> str:
+        """File of an entry in the disk tier"""
+        return cache_file_path(self.disk_dir, key, '.pkl')
+
+    def _load_from_disk(self, key: Tuple) -> Any | None:
+        """Read an entry from the disk tier"""
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)  # Mark as recently used for disk eviction
+            return value
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _save_to_disk(self, key: Tuple, value: Any):
+        """Write an entry to the disk tier and enforce its budget"""
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            with open(path + '.tmp', 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """Remove least recently used files while the disk tier is over budget"""
+        evict_lru_files(self.disk_dir, '.pkl', self.max_disk_bytes)
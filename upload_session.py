@@ -0,0 +1,170 @@
+import pandas as pd
+import os
+from typing import Dict, List, Tuple
+from ingestion import NamedBytesIO, is_csv
+from sheet_reader import head_rows, read_head
+from mapping_inference import HEADER_SCAN_ROWS, detect_header_row
+from upload_cache import UploadCache, file_digest, raw_frame_key
+
+
+class UploadedReport:
+    """An uploaded file opened once, serving headers, previews and the full data"""
+
+    def __init__(self, data: bytes, name: str, cache: UploadCache | None = None, digest: str | None = None):
+        """
+        Args:
+            data: Raw file contents
+            name: File name
+            cache: Cache where full parsed frames are kept (None keeps them on the report)
+            digest: Content hash, when already known
+        """
+        self.data = data
+        self.name = name
+        self.digest = digest or file_digest(data)
+        self.extension = os.path.splitext(name)[1].lower()
+        self.cache = cache
+        self._workbook: pd.ExcelFile | None = None
+        self._frames: Dict[Tuple, pd.DataFrame] = {}
+        self._header_row: int | None = None
+
+    @property
+    def size(self) -> int:
+        """File size in bytes"""
+        return len(self.data)
+
+    def open(self) -> NamedBytesIO:
+        """Fresh file object over the contents"""
+        return NamedBytesIO(self.data, self.name)
+
+    def workbook(self) -> pd.ExcelFile:
+        """Spreadsheet handle for the full parse, opened on first use"""
+        if self._workbook is None:
+            self._workbook = pd.ExcelFile(self.open())
+        return self._workbook
+
+    def read(self, header_row: int = 1, nrows: int | None = None,
+             text_columns: List[str] | None = None) -> pd.DataFrame:
+        """
+        Read the first sheet (or the CSV) with the given header row
+
+        Partial reads stream just the first rows of the sheet. A full read
+        is kept, so later reads with the same header row (and text
+        columns) are served from it.
+
+        Args:
+            header_row: Row number where headers are located (1-based)
+            nrows: Number of data rows to read (None reads everything)
+            text_columns: Columns of a full read kept as text (see ingestion.TEXT_FIELDS)
+
+        Returns:
+            Raw dataframe
+        """
+        frame = self._full_frame(header_row, text_columns)
+        if frame is not None:
+            return frame if nrows is None else frame.head(nrows)
+
+        if nrows is not None:
+            # Headers and previews stream only the rows they need
+            return read_head(self.data, self.name, header_row, nrows)
+        dtype = {col: str for col in text_columns} if text_columns else None
+        if is_csv(self.name):
+            frame = pd.read_csv(self.open(), header=header_row - 1, dtype=dtype)
+        else:
+            workbook = self.workbook()
+            frame = workbook.parse(header=header_row - 1, dtype=dtype)
+            # The parsed frame serves every later read; the document tree is not needed
+            self._workbook = None
+            workbook.close()
+
+        self._store_full_frame(header_row, text_columns, frame)
+        return frame
+
+    def columns(self, header_row: int = 1) -> List[str]:
+        """Column names found in the header row"""
+        return list(self.read(header_row, nrows=0).columns)
+
+    def preview(self, header_row: int = 1, preview_rows: int = 5) -> pd.DataFrame:
+        """First data rows below the header row"""
+        return self.read(header_row, nrows=preview_rows)
+
+    def detect_header_row(self) -> int:
+        """Most likely header row (1-based), found from the first rows of the sheet"""
+        if self._header_row is None:
+            self._header_row = detect_header_row(head_rows(self.data, self.name, HEADER_SCAN_ROWS))
+        return self._header_row
+
+    def has_full_frame(self, header_row: int = 1, text_columns: List[str] | None = None) -> bool:
+        """Whether the whole file was already parsed with this header row and text columns"""
+        return self._full_frame(header_row, text_columns) is not None
+
+    def detached(self) -> 'UploadedReport':
+        """
+        Report over the same contents and cache, with its own workbook handle
+
+        Background jobs read their own copy: the session closes its reports
+        when files are removed or replaced, possibly while a job is parsing.
+        """
+        return UploadedReport(self.data, self.name, self.cache, self.digest)
+
+    def close(self):
+        """Release the spreadsheet handle and the parsed frames kept on the report"""
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+        self._frames.clear()
+
+    def _full_frame(self, header_row: int, text_columns: List[str] | None) -> pd.DataFrame | None:
+        """Fully parsed frame for a header row and text columns, if any"""
+        key = raw_frame_key(self.digest, header_row, text_columns)
+        if self.cache is not None:
+            return self.cache.get(key)
+        return self._frames.get(key)
+
+    def _store_full_frame(self, header_row: int, text_columns: List[str] | None, frame: pd.DataFrame):
+        """Keep a fully parsed frame for later reads"""
+        key = raw_frame_key(self.digest, header_row, text_columns)
+        if self.cache is not None:
+            self.cache.put(key, frame)
+        else:
+            self._frames[key] = frame
+
+
+class UploadSession:
+    """The reports of the current upload, kept across reruns"""
+
+    def __init__(self, cache: UploadCache | None = None):
+        """
+        Args:
+            cache: Cache shared by the reports for their full parsed frames
+        """
+        self.cache = cache
+        self._reports: Dict[Tuple[str, str], UploadedReport] = {}
+
+    def sync(self, uploaded_files: List) -> List[UploadedReport]:
+        """
+        Reports of the uploaded files, in upload order
+
+        Files seen in an earlier rerun keep their report (and open
+        workbook); reports of files no longer uploaded are closed.
+
+        Args:
+            uploaded_files: Uploaded file objects
+
+        Returns:
+            One report per uploaded file
+        """
+        reports = [self.report(file) for file in uploaded_files]
+        current = {(report.digest, report.name) for report in reports}
+        for key in list(self._reports):
+            if key not in current:
+                self._reports.pop(key).close()
+        return reports
+
+    def report(self, file) -> UploadedReport:
+        """Report of one uploaded file"""
+        data = file.getvalue()
+        digest = file_digest(data)
+        key = (digest, file.name)
+        if key not in self._reports:
+            self._reports[key] = UploadedReport(data, file.name, self.cache, digest)
+        return self._reports[key]
@@ -2,7 +2,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from typing import Any, Dict
-import io
+from excel_export import export_excel_bytes
 
 def format_date(date_obj: Any) -> str:
     """Format date object for display"""
@@ -40,6 +40,8 @@ def export_to_excel(df: pd.DataFrame, metrics: Dict[str, Any]) -> bytes:
     """
     Export processed data and metrics to Excel format
     
+    The workbook is written by excel_export's streaming writer.
+    
     Args:
         df: Processed complaints dataframe
         metrics: Calculated metrics dictionary
@@ -47,87 +49,7 @@ def export_to_excel(df: pd.DataFrame, metrics: Dict[str, Any]) -> bytes:
     Returns:
         Excel file as bytes
     """
-    output = io.BytesIO()
-    
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        # Sheet 1: Processed Data
-        export_df = df.copy()
-        
-        # Format dates for export
-        date_columns = ['opening_date', 'deadline_date', 'response_date']
-        for col in date_columns:
-            if col in export_df.columns:
-                export_df[col] = export_df[col].apply(lambda x: format_date(x) if pd.notna(x) else '')
-        
-        # Rename columns for better readability
-        column_names = {
-            'case_id': 'ID da Reclamação',
-            'company_name': 'Empresa',
-            'opening_date': 'Data de Abertura',
-            'deadline_date': 'Data do Prazo',
-            'response_date': 'Data da Resposta',
-            'complaint_status': 'Status da Reclamação',
-            'response_time_days': 'Tempo de Resposta (dias)',
-            'deadline_status': 'Status do Prazo',
-            'days_to_deadline': 'Dias para o Prazo',
-            'status_pending': 'Status de Pendência',
-            'alert_level': 'Nível de Alerta',
-            'source_file': 'Arquivo de Origem',
-            'source_row': 'Linha de Origem'
-        }
-        
-        export_df = export_df.rename(columns=column_names)
-        export_df.to_excel(writer, sheet_name='Dados Processados', index=False)
-        
-        # Sheet 2: Metrics Summary
-        metrics_data = []
-        
-        # General metrics
-        metrics_data.extend([
-            ['MÉTRICAS GERAIS', ''],
-            ['Total de Reclamações', metrics['total_complaints']],
-            ['Total Respondidas', f"{metrics['total_responded']} ({metrics['responded_percentage']:.1f}%)"],
-            ['Total Não Respondidas', metrics['total_not_responded']],
-            ['Tempo Médio de Resposta', f"{metrics['average_response_time']:.1f} dias"],
-            [''],
-            
-            ['CUMPRIMENTO DE PRAZOS', ''],
-            ['Respondidas Dentro do Prazo', f"{metrics['within_deadline']} ({metrics['within_deadline_percentage']:.1f}%)"],
-            ['Respondidas Fora do Prazo', metrics['total_responded'] - metrics['within_deadline']],
-            [''],
-            
-            ['PENDÊNCIAS', ''],
-            ['No Prazo (Não Respondidas)', metrics['in_deadline_not_responded']],
-            ['Vencidas (Não Respondidas)', metrics['overdue_not_responded']],
-            [''],
-            
-            ['ALERTAS DE PRAZO', '']
-        ])
-        
-        # Alert breakdown
-        for alert_type, count in metrics['alert_breakdown'].items():
-            metrics_data.append([alert_type, count])
-        
-        metrics_data.extend([
-            [''],
-            ['Data de Processamento', metrics['processing_date'].strftime('%d/%m/%Y %H:%M:%S')]
-        ])
-        
-        metrics_df = pd.DataFrame(metrics_data, columns=['Métrica', 'Valor'])
-        metrics_df.to_excel(writer, sheet_name='Métricas', index=False)
-        
-        # Sheet 3: Company Breakdown
-        if not metrics['company_breakdown'].empty:
-            company_df = metrics['company_breakdown'].reset_index()
-            company_df.to_excel(writer, sheet_name='Por Empresa', index=False)
-        
-        # Sheet 4: Alert Summary
-        alert_summary = df.groupby(['company_name', 'alert_level']).size().unstack(fill_value=0)
-        if not alert_summary.empty:
-            alert_summary.to_excel(writer, sheet_name='Resumo de Alertas')
-    
-    output.seek(0)
-    return output.getvalue()
+    return export_excel_bytes(df, metrics)
 
 def calculate_business_days(start_date: datetime, end_date: datetime) -> int:
     """